@@ -0,0 +1,181 @@
+import math
+from statistics import NormalDist
+
+#Adaptive tournaments: players play seeds in rounds, and a round only goes to the players whose place in the
+#leaderboard is still uncertain. Scores are folded into running statistics (Welford) as games finish, nothing
+#else is kept. Players that play the same cells are compared on their paired differences, which cancel the
+#luck of the customers and separate players in far fewer games than independent samples would.
+#
+#The confidence level holds for the whole stopping decision, under the normal approximation of the differences: it
+#is split evenly over the adjacent pairs (Bonferroni), and each pair spends its share over the rounds it is looked at,
+#6/(pi^2 k^2) of it at round k, so looking again after every round does not inflate the error rate.
+
+
+class running_stats():
+    """Streaming mean and variance (Welford)"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count = self.count + 1
+        delta = value - self.mean
+        self.mean = self.mean + delta/self.count
+        self.m2 = self.m2 + delta*(value - self.mean)
+
+    def variance(self):
+        return self.m2/(self.count - 1) if self.count > 1 else math.inf
+
+    def half_width(self, z):
+        #half width of the normal confidence interval of the mean
+        if self.count < 2:
+            return math.inf
+        return z*math.sqrt(self.variance()/self.count)
+
+
+class adaptive_tournament():
+    """Leaderboard of a tournament played until adjacent players are told apart
+
+    The per player intervals are plain intervals at the confidence level, the adjacent differences are judged with
+    the corrected ones (pair_z).
+
+    Args:
+        players(list) : players competing
+        confidence(float) : confidence level of the intervals, e.g. 0.95
+        min_games(int) : games every player plays before it can be separated from its neighbours
+    """
+    def __init__(self, players, confidence, min_games):
+        self.players = list(players)
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(0.5 + confidence/2)
+        self.min_games = min_games
+        self.looks = 0          #rounds after which the leaderboard was checked
+        self.scores = {player: running_stats() for player in self.players}
+        self.differences = {(a, b): running_stats() for a in self.players for b in self.players if a < b}
+        self.pending = {}       #cell -> {player: S} of the cells some of their players are still playing
+        self.expected = {}      #cell -> players playing it
+
+    def scheduled(self, cell, players):
+        self.expected[cell] = set(self.expected.get(cell, set())) | set(players)
+
+    def game_finished(self, player, cell, score):
+        """Folds the total S of a finished game into the statistics
+
+        Args:
+            cell(tuple) : generator, toppings and seed index of the game
+            score(float) : total S, None for games that were not scored (they count for nobody)
+        """
+        scores = self.pending.setdefault(cell, {})
+        scores[player] = score
+        if score is not None:
+            self.scores[player].add(score)
+        if set(scores) >= self.expected[cell]:
+            for (a, b), difference in self.differences.items():
+                if scores.get(a) is not None and scores.get(b) is not None:
+                    difference.add(scores[a] - scores[b])
+            del self.pending[cell]
+            del self.expected[cell]
+
+    def look(self):
+        #the leaderboard is checked once more, after a round
+        self.looks = self.looks + 1
+
+    def pair_z(self):
+        #z of the adjacent differences at the current look: the error rate split over the pairs and spent over the looks
+        spent = (1 - self.confidence)/max(len(self.players) - 1, 1)*6/(math.pi**2*max(self.looks, 1)**2)
+        return NormalDist().inv_cdf(1 - spent/2)
+
+    def leaderboard(self):
+        return sorted(self.players, key=lambda player: -self.scores[player].mean if self.scores[player].count else math.inf)
+
+    def separation(self, a, b):
+        """How a and b compare
+
+        Returns:
+            mean, half_width(float) : paired difference a - b and its confidence half width (pair_z)
+            verdict(str) : "separated", "tied" (identical scores on every shared game) or "uncertain"
+        """
+        difference = self.differences[(a, b)] if a < b else self.differences[(b, a)]
+        sign = 1 if a < b else -1
+        if min(self.scores[a].count, self.scores[b].count) < self.min_games or difference.count < 2:
+            return sign*difference.mean, math.inf, "uncertain"
+        half_width = difference.half_width(self.pair_z())
+        if difference.m2 == 0 and difference.mean == 0:
+            return 0.0, 0.0, "tied"
+        if abs(difference.mean) > half_width:
+            return sign*difference.mean, half_width, "separated"
+        return sign*difference.mean, half_width, "uncertain"
+
+    def uncertain_players(self):
+        #players in an adjacent pair of the leaderboard that is not told apart yet
+        board = self.leaderboard()
+        players = set()
+        for a, b in zip(board, board[1:]):
+            if self.separation(a, b)[2] == "uncertain":
+                players.update([a, b])
+        return [player for player in self.players if player in players]
+
+    def report(self):
+        lines = [f"Leaderboard at {self.confidence:.0%} confidence:"]
+        board = self.leaderboard()
+        for rank, player in enumerate(board):
+            stats = self.scores[player]
+            lines.append(f"{rank + 1}. player {player} : mean S {stats.mean:.3f} +- {stats.half_width(self.z):.3f} over {stats.count} games")
+        for a, b in zip(board, board[1:]):
+            mean, half_width, verdict = self.separation(a, b)
+            lines.append(f"player {a} - player {b} : {mean:.3f} +- {half_width:.3f} ({verdict})")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        board = self.leaderboard()
+        pairs = []
+        for a, b in zip(board, board[1:]):
+            mean, half_width, verdict = self.separation(a, b)
+            pairs.append({"players": [a, b], "difference": mean, "half_width": half_width, "verdict": verdict})
+        return {"confidence": self.confidence, "pairs": pairs,
+                "leaderboard": [{"player": player, "games": self.scores[player].count, "mean": self.scores[player].mean,
+                                 "half_width": self.scores[player].half_width(self.z)} for player in board]}
+
+
+def play_rounds(board, cells, make_job, play, round_cells, budget, stored=None):
+    """Plays rounds of cells until the leaderboard is settled, the cells run out or the budget is spent
+
+    Every round takes the next cells and has all the players still uncertain play them, so the players
+    compared next are always compared on the same customers. A round only takes the cells all of them can
+    play within the budget, so the budget is never exceeded.
+
+    Args:
+        board(adaptive_tournament) : receives every finished game
+        cells(list) : (generator, num_toppings, seed_index) in the order they are played
+        make_job(function) : job of a player on a cell
+        play(function) : plays a list of jobs, yielding outcomes (dicts with player, generator, num_toppings, seed_index and totals)
+        round_cells(int) : cells per round
+        budget(int) : games the tournament may play at most
+        stored(dict) : (player, generator, num_toppings, seed_index) -> total S of games already played, reused instead of played again
+    Returns:
+        games(int) : games counted against the budget
+    """
+    stored = stored or {}
+    games = 0
+    cursor = 0
+    active = list(board.players)
+    while active and cursor < len(cells) and budget - games >= len(active):
+        cells_now = cells[cursor:cursor + min(round_cells, (budget - games)//len(active))]     #whole cells within the budget
+        cursor = cursor + len(cells_now)
+        jobs = []
+        for cell in cells_now:
+            board.scheduled(cell, active)
+            for player in active:
+                if (player,) + tuple(cell) in stored:
+                    board.game_finished(player, cell, stored[(player,) + tuple(cell)])
+                    games = games + 1
+                else:
+                    jobs.append(make_job(player, cell))
+        for outcome in play(jobs):
+            board.game_finished(outcome["player"], (outcome["generator"], outcome["num_toppings"], outcome["seed_index"]),
+                                outcome["totals"]["S"] if outcome["totals"] is not None else None)
+            games = games + 1
+        board.look()
+        active = board.uncertain_players()
+    return games
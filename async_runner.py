@@ -0,0 +1,196 @@
+import os
+import time
+import asyncio
+import concurrent.futures
+import constants as constants
+from game import Game, game_result
+from scheduler import job_instance, job_outcome, cell_of
+from player_process import async_player_process, async_remote_player, seeded_states, player_timeout
+
+#Tournament games played concurrently by one process on asyncio. Every game runs its flow (Game.play) as a coroutine,
+#its generator and player live in a player process, and the coroutine awaits their replies, so while a player thinks
+#the other games go on: with as many games at once as cores, every core has a player to run. Player calls keep the
+#deadlines of remote_player (only with -pt), scoring runs on a thread next to the event loop.
+#Jobs and outcomes go through bounded queues, so at most backlog jobs wait and, while the caller is busy with an
+#outcome, at most backlog finished games are held before the games stop being fed.
+#
+#Games draw from their own numpy and random global states (game_states) instead of those of the process, starting
+#from the seeded_states of the job seed, as the process globals do in play_job.
+
+
+async def drive(game, flow, worker, states, scorer):
+    """Runs a game flow (Game.customers, Game.play) on asyncio, as Game.drive does in-process
+
+    Args:
+        game(Game) : the game of the flow, it does not run itself (no shop, constants and stdout are not the game's)
+        worker(async_player_process) : process playing the generator and the player
+        states(game_states) : global random states of the game
+        scorer(Executor) : runs final_score
+    Returns:
+        what the flow returns
+    """
+    reply, error = None, None
+    while True:
+        try:
+            request = flow.send(reply) if error is None else flow.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            reply, error = await answer(game, request, worker, states, scorer), None
+        except Exception as raised:
+            reply, error = None, raised
+
+
+async def answer(game, request, worker, states, scorer):
+    kind = request[0]
+    if kind == "make":
+        index, rng, instances = request[1:]
+        player = async_remote_player(worker, game.num_toppings, rng, states, game.player_timeout, game.num_pizzas, game.toppings_pp)
+        return await player.make(index, instances)
+    if kind == "call":
+        instance, name, arguments = request[1:]
+        return await getattr(instance, name)(*arguments)
+    if kind == "cut":
+        instance, arguments, deadline = request[1:]
+        return await instance.choose_and_cut(*arguments, deadline=deadline)
+    if kind == "score":
+        return await asyncio.get_running_loop().run_in_executor(scorer, game.calculator.final_score, *request[1:])
+    if kind == "get_states":
+        return states.get()
+    if kind == "set_states":
+        states.set(request[1], request[2])
+        return None
+    raise ValueError("Unknown game flow request " + str(kind))
+
+
+class async_runner():
+    """Plays jobs concurrently on the event loop it is started on, see play_jobs_async
+
+    Every one of concurrency workers plays one game at a time in a warm player process of its own, replaced after
+    constants.player_process_games games or once a call past its deadline killed it.
+
+    Args:
+        jobs(list) : grid_jobs entries, played in this order
+        args(Namespace) : tournament arguments
+        concurrency(int) : games played at once (default the cores of the machine)
+        common_inputs(bool) : generate the customers of a cell once and feed them to all its players
+        backlog(int) : jobs queued for the workers, and outcomes queued for the caller (default constants.async_backlog)
+        started(function) : called with every job a worker starts
+    """
+    def __init__(self, jobs, args, concurrency=None, common_inputs=False, backlog=None, started=None):
+        self.given = list(jobs)
+        self.args = args
+        self.concurrency = int(os.cpu_count() if concurrency is None else concurrency)
+        self.common_inputs = common_inputs
+        self.backlog = int(constants.async_backlog if backlog is None else backlog)
+        self.started = started if started is not None else (lambda job: None)
+        self.cells = {}         #cell -> future of its customers, while jobs of the cell are to start
+        self.unstarted = {}
+        for job in self.given:
+            self.unstarted[cell_of(job)] = self.unstarted.get(cell_of(job), 0) + 1
+        self.scorer = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="scorer")
+        self.tasks = []
+
+    async def start(self):
+        self.jobs = asyncio.Queue(self.backlog)
+        self.outcomes = asyncio.Queue(self.backlog)
+        self.tasks = [asyncio.create_task(self.feed())] + [asyncio.create_task(self.work()) for number in range(self.concurrency)]
+
+    async def close(self, cancel=False):
+        #waits for the workers to kill their player processes, cancels their games first when the caller gave up
+        if cancel:
+            for task in self.tasks:
+                task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.scorer.shutdown()
+
+    async def feed(self):
+        for job in self.given:
+            await self.jobs.put(job)
+        for number in range(self.concurrency):
+            await self.jobs.put(None)
+
+    async def work(self):
+        worker = None
+        try:
+            while True:
+                job = await self.jobs.get()
+                if job is None:
+                    return
+                if worker is None or not worker.alive() or worker.games >= int(constants.player_process_games):
+                    if worker is not None:
+                        await worker.kill()
+                    worker = await async_player_process().start()
+                self.started(job)
+                outcome = await self.play(job, worker)
+                worker.games = worker.games + 1
+                await self.outcomes.put(outcome)
+        except Exception as error:
+            await self.outcomes.put(error)      #raised to the caller
+        finally:
+            if worker is not None:
+                await worker.kill()
+
+    async def play(self, job, worker):
+        #a job, as scheduler.play_job plays it
+        instance = job_instance(job, self.args, None)
+        game = instance.game()
+        game.cache_stats = False        #the games running meanwhile share the cache lookups
+        result = game_result(game.player, game.generator, game.num_toppings, game.seeds)
+        status = "ok"
+        start = time.perf_counter()
+        try:
+            if self.common_inputs:
+                instance.inputs = await self.inputs_of(job, worker)
+                start = time.perf_counter()     #as in play_jobs, generating the customers of a cell is not part of its games
+            await drive(game, game.play(result, instance.inputs), worker, seeded_states(job["seed"]), self.scorer)
+            instance.finish(result)
+        except player_timeout as error:
+            status = "timeout: " + str(error)
+        except Exception as error:
+            status = "error: " + type(error).__name__ + ": " + str(error)
+        return job_outcome(job, instance, status, time.perf_counter() - start, worker.process.pid)
+
+    async def inputs_of(self, job, worker):
+        #customers of the job's cell, generated by its first job and dropped once its last one started
+        cell = cell_of(job)
+        if cell not in self.cells:
+            self.cells[cell] = asyncio.get_running_loop().create_future()
+            game = Game(generator=job["generator"], num_toppings=job["num_toppings"], seed=job["seed"], gen_100_seed=job["gen_100_seed"], gen_10_seed=job["gen_10_seed"],
+                        num_pizzas=int(self.args.num_pizzas), toppings_pp=int(self.args.toppings_per_pizza), player_timeout=getattr(self.args, "player_timeout", None))
+            try:
+                self.cells[cell].set_result(await drive(game, game.customers(), worker, seeded_states(job["seed"]), self.scorer))
+            except Exception as error:
+                self.cells[cell].set_exception(error)
+        inputs = self.cells[cell]
+        self.unstarted[cell] = self.unstarted[cell] - 1
+        if not self.unstarted[cell]:
+            del self.cells[cell]
+        return await inputs
+
+
+def play_jobs_async(jobs, args, concurrency=None, common_inputs=False, started=None):
+    """Outcomes in completion order, as scheduler.play_jobs returns them, the games played concurrently by this process
+
+    The event loop runs while the caller waits for the next outcome.
+
+    Args:
+        concurrency(int) : games played at once, each with a player process (default the cores of the machine)
+        common_inputs(bool) : generate the customers of a cell once and feed them to all its players
+        started(function) : called with every job a worker starts
+    """
+    jobs = list(jobs)
+    runner = async_runner(jobs, args, concurrency, common_inputs, started=started)
+    loop = asyncio.new_event_loop()
+    finished = False
+    try:
+        loop.run_until_complete(runner.start())
+        for number in range(len(jobs)):
+            outcome = loop.run_until_complete(runner.outcomes.get())
+            if isinstance(outcome, BaseException):
+                raise outcome
+            yield outcome
+        finished = True
+    finally:
+        loop.run_until_complete(runner.close(cancel=not finished))
+        loop.close()
@@ -0,0 +1,156 @@
+import os
+import sys
+import io
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import constants as constants
+from pizza_no_gui import no_gui
+from instrumentation import phase_timer
+
+#End-to-end throughput of no_gui games: every player x generator x topping count over a fixed seed set.
+#Games run in a scratch directory so the summary log of the repository is left alone, and player prints are swallowed.
+
+player_names = {0: "default", 1: "team_1", 2: "team_2", 3: "team_3", 4: "team_4", 5: "p5", 6: "team_6"}
+player_calls = ["choose_toppings", "choose_and_cut"]
+
+
+def game_args(player, generator, num_toppings, seed):
+    return argparse.Namespace(gui="False", interface_size=40, seed=seed, gen_100_seed=seed + 1, gen_10_seed=seed + 2, generator_number=generator,
+                              player=player, num_toppings=num_toppings, tournament="False", num_pizzas=constants.number_of_initial_pizzas,
+                              toppings_per_pizza=constants.number_of_toppings_pp)
+
+
+def play_game(job):
+    player, generator, num_toppings, seed = job
+    random.seed(seed)      #team_1 draws from the random module
+    instance = no_gui(game_args(player, generator, num_toppings, seed))
+    instance.timer = phase_timer(enabled=True)
+    start = time.perf_counter()
+    status = "ok"
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            instance.run()
+        except Exception as error:
+            status = "error: " + type(error).__name__ + ": " + str(error)
+    wall = time.perf_counter() - start
+    if status == "ok" and len(instance.pizza_choice_order) != instance.num_pizzas:
+        status = "not served"     #bad pizza shape or overlapping toppings
+    phases = instance.timer.phase_totals()
+    player_seconds = sum(phases[name]["wall"] for name in player_calls if name in phases)
+    return {"player": player, "generator": generator, "num_toppings": num_toppings, "seed": seed, "status": status, "wall": wall,
+            "player_seconds": player_seconds, "over_timeout": player_seconds > constants.timeout,
+            "phases": {name: total["wall"] for name, total in phases.items()},
+            "choose_and_cut": [call["wall"] for call in instance.timer.calls_of("choose_and_cut")]}
+
+
+def init_worker(directory):
+    os.chdir(directory)
+
+
+def distribution(values):
+    if not len(values):
+        return {"count": 0}
+    values = np.asarray(values)
+    return {"count": int(len(values)), "mean": float(values.mean()), "p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99)), "max": float(values.max())}
+
+
+def summarise(games):
+    players = {}
+    for player in sorted(set(game["player"] for game in games)):
+        played = [game for game in games if game["player"] == player]
+        phase_names = []
+        for game in played:
+            phase_names = phase_names + [name for name in game["phases"] if name not in phase_names]
+        players[player_names[player]] = {
+            "games": len(played),
+            "failed": len([game for game in played if game["status"] != "ok"]),
+            "over_timeout": len([game for game in played if game["over_timeout"]]),
+            "game_wall": distribution([game["wall"] for game in played]),
+            "choose_and_cut": distribution([seconds for game in played for seconds in game["choose_and_cut"]]),
+            "phases": {name: distribution([game["phases"][name] for game in played if name in game["phases"]]) for name in phase_names},
+        }
+    return players
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", "-p", default="0,1,2,3,4,5,6", help="Comma separated players")
+    parser.add_argument("--generators", "-g_num", default="0,1,2,3,4,5,6", help="Comma separated preference generators")
+    parser.add_argument("--num_toppings", "-num_top", default="2,3,4", help="Comma separated topping counts")
+    parser.add_argument("--seeds", "-s", default="1", help="Comma separated seeds, or a number n for seeds 1..n")
+    parser.add_argument("--processes", "-j", default=1, help="Games run in parallel")
+    parser.add_argument("--json", "-o", default="bench_games.json", help="JSON report")
+    parser.add_argument("--compare", "-c", default=None, help="Earlier JSON report to compare mean game time against")
+    args = parser.parse_args()
+
+    split = lambda text: [int(value) for value in str(text).split(",") if value.strip()]
+    seeds = split(args.seeds) if "," in str(args.seeds) else list(range(1, int(args.seeds) + 1))
+    jobs = [(player, generator, num_toppings, seed) for player in split(args.players) for generator in split(args.generators)
+            for num_toppings in split(args.num_toppings) for seed in seeds]
+    #slowest players first so a parallel run does not end on one long straggler
+    jobs.sort(key=lambda job: job[0] not in (3, 6))
+
+    games = []
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as scratch:
+        workers = max(1, int(args.processes))
+        if workers == 1:
+            here = os.getcwd()
+            os.chdir(scratch)
+            try:
+                for number, job in enumerate(jobs):
+                    games.append(play_game(job))
+                    print(f"{number + 1}/{len(jobs)} player {job[0]} generator {job[1]} toppings {job[2]} seed {job[3]} : {games[-1]['wall']:.2f}s {games[-1]['status']}", flush=True)
+            finally:
+                os.chdir(here)
+        else:
+            with multiprocessing.Pool(workers, initializer=init_worker, initargs=(scratch,)) as pool:
+                for number, game in enumerate(pool.imap_unordered(play_game, jobs)):
+                    games.append(game)
+                    print(f"{number + 1}/{len(jobs)} player {game['player']} generator {game['generator']} toppings {game['num_toppings']} seed {game['seed']} : {game['wall']:.2f}s {game['status']}", flush=True)
+    elapsed = time.perf_counter() - start
+
+    games.sort(key=lambda game: (game["player"], game["generator"], game["num_toppings"], game["seed"]))
+    report = {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(), "processes": int(args.processes),
+              "timeout": constants.timeout, "throughput": {"games": len(games), "wall_seconds": elapsed, "games_per_sec": len(games)/elapsed},
+              "players": summarise(games), "games": games}
+    with open(args.json, "w") as f:
+        json.dump(report, f, indent=1)
+
+    print(f"\n{len(games)} games in {elapsed:.1f}s, {len(games)/elapsed:.2f} games/s")
+    for name, summary in report["players"].items():
+        cut = summary["choose_and_cut"]
+        line = f"{name:<8} {summary['games']:>4} games, game p50 {summary['game_wall']['p50']:.3f}s p95 {summary['game_wall']['p95']:.3f}s"
+        if cut["count"]:
+            line = line + f", choose_and_cut p50 {cut['p50']:.4f}s p95 {cut['p95']:.4f}s p99 {cut['p99']:.4f}s"
+        if summary["failed"]:
+            line = line + f", {summary['failed']} failed"
+        if summary["over_timeout"]:
+            line = line + f", {summary['over_timeout']} OVER the {constants.timeout}s timeout"
+        print(line)
+    for game in games:
+        if game["over_timeout"]:
+            print(f"TIMEOUT player {player_names[game['player']]} generator {game['generator']} toppings {game['num_toppings']} seed {game['seed']} : {game['player_seconds']:.2f}s in player calls")
+        elif game["status"] != "ok":
+            print(f"FAILED player {player_names[game['player']]} generator {game['generator']} toppings {game['num_toppings']} seed {game['seed']} : {game['status']}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+        print(f"\nThroughput {before['throughput']['games_per_sec']:.2f} -> {report['throughput']['games_per_sec']:.2f} games/s")
+        for name, summary in report["players"].items():
+            if name in before["players"]:
+                old = before["players"][name]["game_wall"]["mean"]
+                new = summary["game_wall"]["mean"]
+                print(f"{name:<8} mean game {old:.3f}s -> {new:.3f}s ({old/new:.2f}x)")
+    print("Report written to " + args.json)
@@ -0,0 +1,167 @@
+import os
+import sys
+import io
+import copy
+import json
+import time
+import random
+import argparse
+import platform
+import contextlib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import pizza_calculations
+from players.default_player import Player as default_player
+from players.team_1 import Player as p1
+from players.team_4 import Player as p4
+from players.team_6 import Player as p6
+
+#Micro-benchmarks of the pizza_calculations kernels on fixed-seed fixtures.
+#Every benchmark is named layout_t<toppings>/<cut case>/<kernel> and reports ops/sec and ns per topping
+#(slice areas do not depend on the toppings, their ns/topping is the time of one call).
+#The in-process score cache is switched off while measuring, so repeated cuts cost a full evaluation.
+
+multiplier = 40
+x = 12*multiplier
+y = 10*multiplier
+layouts = {"ring_team4": p4, "ring_team6": p6, "template_team1": p1, "random_default": default_player}
+cut_cases = ["center_in_topping", "near_edge", "far_off_center"]
+default_baseline = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_kernels.json")
+
+
+def make_pizzas(layout, num_toppings, seed):
+    #Pizzas built by the player owning the layout, from preferences of the default generator
+    preferences = default_player(num_toppings, np.random.default_rng(seed)).customer_gen(100, np.random.default_rng(seed + 1))
+    random.seed(seed)      #team_1 draws from the random module
+    with contextlib.redirect_stdout(io.StringIO()):
+        pizzas = layouts[layout](num_toppings, np.random.default_rng(seed + 2)).choose_toppings(preferences)
+    return np.ascontiguousarray(pizzas, dtype=np.float64)
+
+
+def make_cuts(pizzas, case, number, rng):
+    #Cuts in screen units (what the kernels take), as [pizza id, cut]
+    cuts = []
+    for i in range(number):
+        pizza_id = i % len(pizzas)
+        theta = rng.random()*2*np.pi
+        if case == "center_in_topping":
+            topping = pizzas[pizza_id][rng.integers(len(pizzas[pizza_id]))]
+            radius, angle = 0.3*rng.random(), rng.random()*2*np.pi
+            cx, cy = topping[0] + radius*np.cos(angle), topping[1] + radius*np.sin(angle)
+        else:
+            radius = rng.uniform(5.5, 5.95) if case == "near_edge" else rng.uniform(3, 5)
+            angle = rng.random()*2*np.pi
+            cx, cy = radius*np.cos(angle), radius*np.sin(angle)
+        cuts.append((pizza_id, [x + cx*multiplier, y - cy*multiplier, theta]))
+    return cuts
+
+
+def measure(function, operations, rounds, min_time):
+    #Best of rounds, each round repeated until it lasts min_time, returns seconds per operation
+    repeat = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(repeat):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        repeat = repeat*2
+    best = elapsed/repeat
+    for i in range(rounds - 1):
+        start = time.perf_counter()
+        for i in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - start)/repeat)
+    return best/operations
+
+
+def run_benchmarks(selected, rounds, min_time, num_cuts, seed):
+    calculator = pizza_calculations()
+    results = {}
+    for layout in layouts:
+        for num_toppings in [2, 3, 4]:
+            pizzas = make_pizzas(layout, num_toppings, seed)
+            toppings_pp = pizzas.shape[1]
+            rng = np.random.default_rng(seed)
+            benches = {}
+            for case in cut_cases:
+                game_rng = copy.deepcopy(rng)      #one cut per pizza, the first cuts of the case whatever num_cuts is
+                cuts = make_cuts(pizzas, case, num_cuts, rng)
+                benches[case + "/ratio_calculator"] = (lambda cuts=cuts: [calculator.ratio_calculator(pizzas[pizza_id], cut, num_toppings, multiplier, x, y) for pizza_id, cut in cuts], len(cuts), toppings_pp)
+                benches[case + "/slice_area_calculator"] = (lambda cuts=cuts: [calculator.slice_area_calculator(cut, multiplier, x, y) for pizza_id, cut in cuts], len(cuts), 1)
+                game_cuts = np.array([cut for pizza_id, cut in make_cuts(pizzas, case, len(pizzas), game_rng)])
+                preferences = np.asarray(default_player(num_toppings, np.random.default_rng(seed)).customer_gen(len(pizzas), np.random.default_rng(seed + 3)))
+                order = list(range(len(pizzas)))
+                benches[case + "/final_score"] = (lambda game_cuts=game_cuts, preferences=preferences: calculator.final_score(pizzas, order, preferences, game_cuts, num_toppings, multiplier, x, y), 1, len(pizzas)*toppings_pp)
+            placed = [(pizza, topping_id) for pizza in pizzas for topping_id in range(toppings_pp)]
+            benches["placement/clash_exists"] = (lambda: [pizza_calculations.clash_exists(pizza[topping_id][0], pizza[topping_id][1], pizza, topping_id) for pizza, topping_id in placed], len(placed), 1)
+            for bench, (function, operations, toppings) in benches.items():
+                name = layout + "_t" + str(num_toppings) + "/" + bench
+                if selected and selected not in name:
+                    continue
+                seconds = measure(function, operations, rounds, min_time)
+                results[name] = {"ops_per_sec": 1/seconds, "ns_per_topping": seconds*1e9/toppings}
+                print(f"{name:<60} {1/seconds:>12.1f} ops/s {seconds*1e9/toppings:>12.1f} ns/topping")
+    return results
+
+
+def compare(results, baseline, threshold):
+    #Benchmarks whose ops/sec dropped by more than threshold (fraction) against the baseline
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result["ops_per_sec"]/baseline[name]["ops_per_sec"] - 1
+        if change < -threshold:
+            regressions.append((name, change))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", "-b", default=default_baseline, help="JSON baseline to compare against (and to write with --save)")
+    parser.add_argument("--save", "-save", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", "-th", default=0.1, help="Slowdown (fraction of ops/sec) reported as a regression")
+    parser.add_argument("--filter", "-f", default=None, help="Only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", "-r", default=5, help="Timed rounds per benchmark, the best one is kept")
+    parser.add_argument("--min_time", "-mt", default=0.05, help="Minimum duration (s) of one timed round")
+    parser.add_argument("--cuts", "-c", default=40, help="Cuts per cut case")
+    parser.add_argument("--seed", "-s", default=7, help="Seed of the fixtures")
+    parser.add_argument("--json", "-j", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    cache = pizza_calculations.cache
+    pizza_calculations.cache = None
+    try:
+        results = run_benchmarks(args.filter, int(args.rounds), float(args.min_time), int(args.cuts), int(args.seed))
+    finally:
+        pizza_calculations.cache = cache
+    report = {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(), "processor": platform.processor(), "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.save:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                saved = json.load(f)
+            saved["results"].update(results)
+            results = saved["results"]
+        report["results"] = results
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        print("Baseline written to " + args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, float(args.threshold))
+        for name, change in regressions:
+            print(f"REGRESSION {name} : {change:+.1%} ops/s against the baseline")
+        compared = len([name for name in results if name in baseline])
+        print(f"{compared} benchmarks compared to {args.baseline}, {len(regressions)} regressions over {float(args.threshold):.0%}")
+        if regressions:
+            sys.exit(1)
+    else:
+        print("No baseline at " + args.baseline + ", run with --save to record one")
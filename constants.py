@@ -10,3 +10,25 @@ rng_seed = 5
 
 
 number_of_initial_pizzas = 10
+number_of_toppings_pp = 24     #toppings on every pizza
+
+ratio_cache_size = 65536    #entries kept by the in-process ratio/slice area cache in utils when enabled (-cache True or -sc), 0 disables it
+ratio_cache_bytes = None    #optional cap on the bytes held by that cache
+cut_quantum = 1e-9          #cuts closer than this (inches/radians) share a cache entry
+score_store_entries = 1000000   #entries kept by the persistent (--score_cache) store before evicting the least recently used
+score_store_bytes = None        #optional size limit of the persistent store file
+telemetry_flush_seconds = 10        #how often tournament telemetry (--telemetry) is rewritten
+trace_sample_every = 1             #tracing (--trace) records one game in this many
+trace_max_events = 1000000          #events one process writes to a trace file before it stops tracing
+trace_merge_gap = 0.001             #kernel calls closer than this (s) are drawn as one batch span
+adaptive_confidence = 0.95          #adaptive tournaments (--adaptive) stop once adjacent players are separated at this confidence
+adaptive_min_games = 20             #games every player plays before it can be separated from its neighbours
+adaptive_round_cells = 10           #generator x toppings x seed cells played by the uncertain players in every round
+queue_shard_size = 20               #jobs in a shard of a tournament work queue (tournament.py --queue)
+queue_stale_seconds = 600           #a claimed shard whose worker made no progress for this long is played again
+shared_block_bytes = 16*2**20       #shared memory blocks holding the arrays sent to worker processes (common inputs, re-scoring)
+player_process_games = 200          #games a player process serves before it is replaced (--out_of_process)
+async_backlog = 64                  #jobs queued for the games of tournament.py --async_games, and finished games held for the store
+anytime_reserve = 0.05              #share of the time limit anytime players leave unused, for their last search step and the reply
+daemon_port = 8765                  #localhost port of pizza_daemon.py, and where pizza_client.py looks for it
+profile_allocations = True          #--profile also traces allocations with tracemalloc (player code runs several times slower)
@@ -0,0 +1,340 @@
+import io
+import time
+import random
+import contextlib
+import numpy as np
+import constants as constants
+import results
+from utils import pizza_calculations, pizza_layouts
+from instrumentation import phase_timer, untimed_call
+from player_process import remote_player, player_timeout, deadline_in
+from players.default_player import Player as default_player
+from players.team_1 import Player as p1
+from players.team_2 import Player as p2
+from players.team_3 import Player as p3
+from players.team_4 import Player as p4
+from players.default_player import Player as p5
+from players.team_6 import Player as p6
+
+player_classes = [default_player, p1, p2, p3, p4, p5, p6]
+
+
+def anytime_cut(player, arguments, deadline):
+    """The cut a player makes for a customer, taken by the deadline
+
+    A player may have, next to choose_and_cut, a choose_and_cut_anytime generator yielding the best
+    (pizza_id, center, theta) it found so far as it searches (an anytime player). Its latest candidate is taken once
+    the deadline passes, or when it is done, and the search is closed. Without a deadline the search runs to its end.
+    A search that found nothing better yields the same candidate again, which lets it be stopped in time. Other
+    players are asked for their choose_and_cut.
+
+    Args:
+        player : the player instance
+        arguments(tuple) : pizzas, remaining_pizza_ids and customer_amounts
+        deadline(float) : time.monotonic() by which the customer is served, None to let the search finish
+    """
+    if not hasattr(player, "choose_and_cut_anytime"):
+        return player.choose_and_cut(*arguments)
+    cut = player.choose_and_cut_anytime(*arguments)
+    best = None
+    try:
+        for best in cut:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    finally:
+        cut.close()
+    if best is None:
+        raise ValueError("choose_and_cut_anytime yielded no cut")
+    return best
+
+
+class game_result():
+    """Everything a game produced, in memory
+
+    Attributes:
+        status(str) : "served" when every customer got a pizza, "bad shape" or "overlap" when the player's pizzas were refused
+        player, generator, num_toppings, seeds : what was played
+        preferences(array) : [num_pizzas, 2, num_toppings] customer preferences, in serving order
+        pizzas(array) : [num_pizzas, toppings_pp, 3] toppings the player placed
+        pizza_choice_order(array) : [served] pizza given to each customer
+        cuts(array) : [num_pizzas, 3] cut center (pizza units) and angle of every pizza
+        screen_cuts(array) : [num_pizzas, 3] the same cuts in screen units, as pizza_calculations takes them
+        B, C, U, obtained(array) : [served, 2, num_toppings] per customer score matrices and obtained preferences
+        scores(dict) : [served] arrays U, B, C, S, SliceMetric, CenterOffset of every customer
+        totals(dict) : game totals of the same metrics
+        pizza_layouts(pizza_layouts) : the pizzas grouped by identical layout, shared with the player's searches
+        placement_report(dict) : pizza_calculations.validate_pizzas of the pizzas
+        record(dict) : the results.game_record of the game, None unless served
+        output(str) : everything printed during the game, when it was captured
+    """
+    def __init__(self, player, generator, num_toppings, seeds):
+        self.status = None
+        self.player = player
+        self.generator = generator
+        self.num_toppings = num_toppings
+        self.seeds = seeds
+        self.preferences = None
+        self.preferences_100 = None
+        self.pizzas = None
+        self.pizza_choice_order = np.zeros(0, dtype=np.int64)
+        self.cuts = None
+        self.screen_cuts = None
+        self.B = self.C = self.U = self.obtained = None
+        self.scores = {}
+        self.totals = {}
+        self.pizza_layouts = None
+        self.placement_report = None
+        self.record = None
+        self.output = ""
+
+
+class game_inputs():
+    """Customers of a game and the random states the generator left, see Game.generate_inputs
+
+    Attributes:
+        preferences(array) : [num_pizzas, 2, num_toppings] customers served
+        preferences_100(list) : the 100 customers players make their pizzas for
+        rng_state, np_random_state, random_state : states of the player rng, numpy's global generator and the random module
+    """
+    def __init__(self, preferences, preferences_100, rng_state, np_random_state, random_state):
+        self.preferences = preferences
+        self.preferences_100 = preferences_100
+        self.rng_state = rng_state
+        self.np_random_state = np_random_state
+        self.random_state = random_state
+
+
+class Game():
+    """One no gui game, with explicit parameters and no file or console output
+
+    Args:
+        player(int) : player choosing toppings and cuts (0 default, 1-6 teams)
+        generator(int) : player generating customer preferences
+        num_toppings(int) : topping types
+        seed, gen_100_seed, gen_10_seed(int) : seeds of the player rng and of the 100 and 10 preference generators
+        num_pizzas(int) : pizzas made, and customers served
+        toppings_pp(int) : toppings on every pizza
+        multiplier(int) : screen units per inch the cuts are expressed in
+        timer(phase_timer) : optional timer receiving the phases of the game
+        profiler(player_profiler) : optional profiler wrapping the player calls
+        capture_output(bool) : keep what players print in result.output instead of letting it reach stdout
+        players(player_pool) : run the generator and the player in a process of this pool instead of in-process
+        player_timeout(float) : seconds for the player's choose_toppings and choose_and_cut calls together, None (the
+                                default) for no limit. An anytime player (see anytime_cut) gets an even share of what
+                                is left of it, less constants.anytime_reserve, otherwise it searches to its end. A
+                                generator call may take as long. With players, a call past it is killed, in-process it
+                                fails with player_timeout once it returns, so both play the same games.
+    """
+    def __init__(self, player=0, generator=0, num_toppings=2, seed=48, gen_100_seed=45, gen_10_seed=50, num_pizzas=None, toppings_pp=None,
+                 multiplier=40, timer=None, profiler=None, capture_output=True, players=None, player_timeout=None):
+        self.player = int(player)
+        self.generator = int(generator)
+        self.num_toppings = int(num_toppings)
+        self.seeds = {"seed": int(seed), "gen_100_seed": int(gen_100_seed), "gen_10_seed": int(gen_10_seed)}
+        self.num_pizzas = int(constants.number_of_initial_pizzas if num_pizzas is None else num_pizzas)
+        self.toppings_pp = int(constants.number_of_toppings_pp if toppings_pp is None else toppings_pp)
+        self.multiplier = int(multiplier)
+        self.x = 12*40     #Center Point x of pizza
+        self.y = 10*40     #Center Point y of pizza
+        self.timer = timer if timer is not None else phase_timer(enabled=False)
+        self.profiler = profiler
+        self.capture_output = capture_output
+        self.players = players
+        self.player_timeout = None if player_timeout is None else float(player_timeout)
+        self.calls_deadline = None      #of choose_toppings and all the cuts, in-process
+        self.worker = None      #player process of the game, with players
+        self.calculator = pizza_calculations()
+        self.cache_stats = True     #record the score cache lookups of the game, which only adds up when the process plays one game at a time
+
+    def profiled(self, player, kind):
+        #context profiling one player call when a profiler is attached
+        if self.profiler is None:
+            return untimed_call()
+        return self.profiler.call(player, kind)
+
+    @contextlib.contextmanager
+    def shop(self, output):
+        #what the players print, and the player process of the game while it runs
+        with contextlib.redirect_stdout(output) if self.capture_output else contextlib.nullcontext():
+            try:
+                if self.players is not None:
+                    self.worker = self.players.acquire()
+                yield
+            finally:
+                if self.worker is not None:
+                    self.players.release(self.worker)
+                    self.worker = None
+
+    def run(self, inputs=None):
+        """Plays the game
+
+        Args:
+            inputs(game_inputs) : customers generated beforehand by generate_inputs with the same generator, toppings,
+                                  seeds and shop size, generated now when None
+        Returns:
+            result(game_result)
+        """
+        result = game_result(self.player, self.generator, self.num_toppings, self.seeds)
+        output = io.StringIO()
+        with self.shop(output):
+            self.drive(self.play(result, inputs))
+        result.output = output.getvalue()
+        return result
+
+    def generate_inputs(self):
+        """Customers of the game, and the random states the generator left behind
+
+        Players only see the customers and the random states, so one generation can be fed to every player
+        meeting the same generator, toppings and seeds (common random numbers), with the same games as if each
+        of them had generated it.
+
+        Returns:
+            inputs(game_inputs)
+        """
+        output = io.StringIO()
+        with self.shop(output):
+            return self.drive(self.customers())
+
+    def drive(self, flow):
+        """Runs a game flow (customers, play) in this process
+
+        A flow yields what it needs from outside the game: the players made, their calls, the scoring and the global
+        random states, and gets the answer back (or the exception raised). async_runner drives the same flows from asyncio.
+
+        Returns:
+            what the flow returns
+        """
+        answer, error = None, None
+        while True:
+            try:
+                request = flow.send(answer) if error is None else flow.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                answer, error = self.answer(request), None
+            except Exception as raised:
+                answer, error = None, raised
+
+    def answer(self, request):
+        kind = request[0]
+        if kind == "make":
+            #a generator (1 instance) or a player and the autoplayer the interactive game makes (2)
+            index, rng, instances = request[1:]
+            if self.worker is not None:
+                return remote_player(self.worker, index, self.num_toppings, rng, instances, self.player_timeout, self.num_pizzas, self.toppings_pp)
+            made = [player_classes[index](self.num_toppings, rng, self.num_pizzas, self.toppings_pp) for number in range(instances)]
+            return made[0]
+        if kind == "call":
+            instance, name, arguments = request[1:]
+            if self.worker is not None:
+                return getattr(instance, name)(*arguments)
+            deadline = deadline_in(self.player_timeout)     #as remote_player sets them
+            if name == "choose_toppings":
+                self.calls_deadline = deadline
+            reply = getattr(instance, name)(*arguments)
+            self.check_deadline(deadline, name)
+            return reply
+        if kind == "cut":
+            #the player's cut, an anytime player stops searching at the deadline
+            instance, arguments, deadline = request[1:]
+            if self.worker is not None:
+                return instance.choose_and_cut(*arguments, deadline=deadline)
+            if self.calls_deadline is None:
+                self.calls_deadline = deadline_in(self.player_timeout)
+            cut = anytime_cut(instance, arguments, deadline)
+            self.check_deadline(self.calls_deadline, "choose_and_cut")
+            return cut
+        if kind == "score":
+            return self.calculator.final_score(*request[1:])
+        if kind == "get_states":
+            return np.random.get_state(), random.getstate()
+        if kind == "set_states":
+            np.random.set_state(request[1])
+            random.setstate(request[2])
+            return None
+        raise ValueError("Unknown game flow request " + str(kind))
+
+    def check_deadline(self, deadline, name):
+        #an in-process call cannot be stopped, one that ran past the deadline a player process is killed at fails as it would
+        if deadline is not None and time.monotonic() > deadline:
+            raise player_timeout(name + " ran past its deadline")
+
+    def customers(self):
+        rng = np.random.default_rng(self.seeds["seed"])
+        rng_generator_100 = np.random.default_rng(self.seeds["gen_100_seed"])
+        rng_generator_10 = np.random.default_rng(self.seeds["gen_10_seed"])
+        with self.timer.phase("setup"):
+            generator = yield ("make", self.generator, rng, 1)
+        with self.timer.phase("customer_gen"), self.profiled(self.generator, "customer_gen"):
+            preferences = np.asarray((yield ("call", generator, "customer_gen", (self.num_pizzas, rng_generator_10))), dtype=np.float64)
+            preferences_100 = yield ("call", generator, "customer_gen", (100, rng_generator_100))
+        if self.toppings_pp != 24:
+            #generators split 24 toppings (12 per half), scale the amounts to the toppings actually on the pizza
+            preferences = preferences*self.toppings_pp/24
+            preferences_100 = [np.asarray(preference)*self.toppings_pp/24 for preference in preferences_100]
+        #generators may draw from the rng they share with the player, or from the global random states
+        np_random_state, random_state = yield ("get_states",)
+        return game_inputs(preferences, preferences_100, rng.bit_generator.state, np_random_state, random_state)
+
+    def play(self, result, inputs=None):
+        cache_before = pizza_calculations.cache.stats() if pizza_calculations.cache is not None else {}
+        if inputs is None:
+            inputs = yield from self.customers()
+        rng = np.random.default_rng(self.seeds["seed"])
+        rng.bit_generator.state = inputs.rng_state
+        yield ("set_states", inputs.np_random_state, inputs.random_state)
+        preferences, preferences_100 = inputs.preferences, inputs.preferences_100
+        result.preferences = preferences
+        result.preferences_100 = preferences_100
+        with self.timer.phase("setup"):
+            #the player and the autoplayer, made the way the interactive game makes them
+            player_instance = yield ("make", self.player if 0 <= self.player < len(player_classes) else 0, rng, 2)
+        budget_end = deadline_in(None if self.player_timeout is None else self.player_timeout*(1 - constants.anytime_reserve))        #of choose_toppings and all the cuts
+        with self.timer.phase("choose_toppings"), self.profiled(self.player, "choose_toppings"):
+            pizzas = np.ascontiguousarray((yield ("call", player_instance, "choose_toppings", (preferences_100,))), dtype=np.float64)
+        result.pizzas = pizzas
+        if pizzas.shape != (self.num_pizzas, self.toppings_pp, 3):
+            result.status = "bad shape"
+            print("Player made pizzas of shape " + str(pizzas.shape) + ", expected " + str((self.num_pizzas, self.toppings_pp, 3)) + ". You cannot serve customers now.")
+            return
+        with self.timer.phase("validate"):
+            result.pizza_layouts = pizza_layouts.of(pizzas)
+            result.placement_report = pizza_calculations.validate_pizzas(pizzas)
+        if not result.placement_report["valid"]:
+            result.status = "overlap"
+            print("Overlapping placement. You cannot serve customers now.")
+            for line in pizza_calculations.describe_placement(result.placement_report):
+                print(line)
+            return
+
+        print("Your shop is now open!!!")
+        served = np.zeros(self.num_pizzas, dtype=bool)
+        screen_cuts = np.zeros((self.num_pizzas, 3))     #x, y coordinates of cut intscn (screen units) and angle of cut, for every pizza
+        pizza_choice_order = []
+        for j in range(self.num_pizzas):
+            options_pizza = np.flatnonzero(~served).tolist()
+            now = time.monotonic()
+            deadline = now + max(budget_end - now, 0)/(self.num_pizzas - j) if budget_end is not None else None     #the customers left share what is left of the budget
+            with self.timer.phase("choose_and_cut", customer=j+1) as call, self.profiled(self.player, "choose_and_cut"):
+                pizza_id, center, theta = yield ("cut", player_instance, (pizzas, options_pizza, preferences[j]), deadline)
+            call.info["pizza_id"] = pizza_id
+            pizza_choice_order.append(pizza_id)
+            served[pizza_id] = True
+            screen_cuts[pizza_id][0] = (self.x + center[0]*self.multiplier)
+            screen_cuts[pizza_id][1] = (self.y - center[1]*self.multiplier)
+            screen_cuts[pizza_id][2] = theta
+        result.status = "served"
+        result.pizza_choice_order = np.asarray(pizza_choice_order, dtype=np.int64)
+        result.screen_cuts = screen_cuts
+        result.cuts = np.stack([(screen_cuts[:, 0] - self.x)/self.multiplier, -(screen_cuts[:, 1] - self.y)/self.multiplier, screen_cuts[:, 2]], axis=1)
+
+        with self.timer.phase("final_score"):
+            scores = yield ("score", pizzas, pizza_choice_order, preferences, screen_cuts, self.num_toppings, self.multiplier, self.x, self.y)
+        B, C, U, obtained_preferences, center_offsets, slice_amount_metrics = scores
+        result.B, result.C, result.U, result.obtained = np.array(B), np.array(C), np.array(U), np.array(obtained_preferences)
+        result.scores = {"U": result.U.sum(axis=(1, 2)), "B": result.B.sum(axis=(1, 2)), "C": result.C.sum(axis=(1, 2)), "S": (result.B - result.C).sum(axis=(1, 2)),
+                         "SliceMetric": np.asarray(slice_amount_metrics, dtype=np.float64), "CenterOffset": np.asarray(center_offsets, dtype=np.float64)}
+        cache = pizza_calculations.cache.stats_since(cache_before) if self.cache_stats and pizza_calculations.cache is not None else None
+        run = dict(player=self.player, num_toppings=self.num_toppings, generator=self.generator, num_pizzas=self.num_pizzas, toppings_pp=self.toppings_pp, **self.seeds)
+        result.record = results.game_record(pizzas, pizza_choice_order, preferences, screen_cuts, scores, self.multiplier, self.x, self.y, run, cache)
+        result.totals = result.record["totals"]
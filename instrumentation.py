@@ -0,0 +1,119 @@
+import json
+import time
+
+
+class timed_call():
+    """One timed region of a phase_timer, used as a context manager"""
+    __slots__ = ("timer", "name", "info", "start", "wall", "cpu")
+
+    def __init__(self, timer, name, info):
+        self.timer = timer
+        self.name = name
+        self.info = info
+
+    def __enter__(self):
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall = time.perf_counter() - self.start
+        self.cpu = time.process_time() - self.cpu
+        self.timer.record(self)
+        return False
+
+
+class untimed_call():
+    """Stand-in for timed_call when timing is off, entering and leaving it does nothing"""
+    __slots__ = ("info",)
+
+    def __init__(self):
+        self.info = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class phase_timer():
+    """Wall and CPU time of the phases of a game
+
+    Every `with timer.phase(name, **info):` block is recorded, so a phase entered several times
+    (choose_and_cut once per customer) keeps its individual calls as well as the totals.
+    When disabled, phase() hands back a do-nothing context of its own (callers may still fill its info)
+    and nothing is recorded.
+
+    Args:
+        enabled(bool) : record timings or not
+        tracer(trace_recorder) : optional tracing.trace_recorder also receiving every call as a span
+    """
+    def __init__(self, enabled=True, tracer=None):
+        self.enabled = enabled
+        self.tracer = tracer
+        self.calls = []
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.process_time()
+
+    def phase(self, name, **info):
+        if not self.enabled:
+            return untimed_call()
+        return timed_call(self, name, info)
+
+    def record(self, call):
+        self.calls.append(call)
+        if self.tracer is not None:
+            self.tracer.span(call.name, call.start, call.wall, call.info)
+
+    def phase_totals(self):
+        #name -> {"calls", "wall", "cpu", "max_wall"}, in the order phases were first entered
+        totals = {}
+        for call in self.calls:
+            total = totals.setdefault(call.name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "max_wall": 0.0})
+            total["calls"] = total["calls"] + 1
+            total["wall"] = total["wall"] + call.wall
+            total["cpu"] = total["cpu"] + call.cpu
+            total["max_wall"] = max(total["max_wall"], call.wall)
+        return totals
+
+    def calls_of(self, name):
+        return [dict(call.info, wall=call.wall, cpu=call.cpu) for call in self.calls if call.name == name]
+
+    def report(self, **run):
+        """Timings as a JSON-serialisable dict
+
+        Args:
+            **run : description of the run (player, seeds, sizes...) stored under "run"
+        Returns:
+            report(dict) : run, total wall/cpu since the timer was created, per phase totals and every call
+        """
+        return {
+            "run": run,
+            "total": {"wall": time.perf_counter() - self.started_wall, "cpu": time.process_time() - self.started_cpu},
+            "phases": self.phase_totals(),
+            "calls": [dict(call.info, phase=call.name, wall=call.wall, cpu=call.cpu) for call in self.calls],
+        }
+
+    def digest(self):
+        #One line summary, phases that were entered more than once show their call count and slowest call
+        parts = []
+        for name, total in self.phase_totals().items():
+            part = f"{name} {total['wall']:.3f}s"
+            if total["calls"] > 1:
+                part = part + f" ({total['calls']} calls, max {total['max_wall']:.3f}s)"
+            parts.append(part)
+        wall = time.perf_counter() - self.started_wall
+        cpu = time.process_time() - self.started_cpu
+        return f"Timing : {wall:.3f}s wall, {cpu:.3f}s cpu | " + " | ".join(parts)
+
+    def write(self, path, **run):
+        with open(path, "w") as f:
+            json.dump(self.report(**run), f, indent=1, default=to_json)
+
+
+def to_json(value):
+    #numpy scalars (pizza ids, seeds) are not serialisable by json itself
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
@@ -0,0 +1,84 @@
+import os
+import struct
+import numpy as np
+
+#Decision journal: the inputs and decisions of every game, enough to score it again without the players.
+#
+#The file starts with the magic b"PZJ1" and holds one record per game:
+#    header : b"GAME", payload bytes (uint32), player, generator, num_toppings, num_pizzas, toppings_pp, customers served (int32),
+#             seed, gen_100_seed, gen_10_seed (int64), multiplier, x, y (float64)
+#    payload : preferences [num_pizzas, 2, num_toppings] float64, pizzas [num_pizzas, toppings_pp, 3] float64,
+#              pizza served to each customer [served] int32, cuts [num_pizzas, 3] float64 (screen units, as no_gui keeps them)
+#All little endian. A record is appended with a single write, so processes can share a journal.
+
+magic = b"PZJ1"
+header = struct.Struct("<4sI6i3q3d")
+
+
+class decision_journal():
+    """Appends games to a journal file
+
+    Args:
+        path(str) : journal file, created if missing
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, magic)
+
+    def append(self, player, generator, num_toppings, seeds, preferences, pizzas, pizza_choice_order, cuts, multiplier, x, y):
+        preferences = np.ascontiguousarray(preferences, dtype="<f8")
+        pizzas = np.ascontiguousarray(pizzas, dtype="<f8")
+        choices = np.ascontiguousarray(pizza_choice_order, dtype="<i4")
+        cuts = np.ascontiguousarray(cuts, dtype="<f8")
+        payload = preferences.tobytes() + pizzas.tobytes() + choices.tobytes() + cuts.tobytes()
+        record = header.pack(b"GAME", len(payload), int(player), int(generator), int(num_toppings), pizzas.shape[0], pizzas.shape[1], len(choices),
+                             int(seeds["seed"]), int(seeds["gen_100_seed"]), int(seeds["gen_10_seed"]), float(multiplier), float(x), float(y))
+        os.write(self.fd, record + payload)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+journals = {}
+
+
+def journal_for(path):
+    #One journal per file and process, shared by all the games this process plays
+    key = (path, os.getpid())
+    if key not in journals:
+        journals[key] = decision_journal(path)
+    return journals[key]
+
+
+def read_journal(path):
+    """Every game of a journal
+
+    Returns:
+        games(list) : dicts with player, generator, num_toppings, seed, gen_100_seed, gen_10_seed, multiplier, x, y,
+                      preferences, pizzas, pizza_choice_order and cuts (read-only arrays viewing the file contents)
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != magic:
+        raise ValueError(path + " is not a decision journal")
+    games = []
+    offset = 4
+    while offset + header.size <= len(data):
+        tag, length, player, generator, num_toppings, num_pizzas, toppings_pp, served, seed, gen_100_seed, gen_10_seed, multiplier, x, y = header.unpack_from(data, offset)
+        if tag != b"GAME" or offset + header.size + length > len(data):
+            print("Journal " + path + " ends with an incomplete game at byte " + str(offset) + ", ignoring it.")
+            break
+        offset = offset + header.size
+        arrays = []
+        for dtype, shape in [("<f8", (num_pizzas, 2, num_toppings)), ("<f8", (num_pizzas, toppings_pp, 3)), ("<i4", (served,)), ("<f8", (num_pizzas, 3))]:
+            count = int(np.prod(shape))
+            arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape))
+            offset = offset + count*np.dtype(dtype).itemsize
+        games.append({"player": player, "generator": generator, "num_toppings": num_toppings, "seed": seed, "gen_100_seed": gen_100_seed,
+                      "gen_10_seed": gen_10_seed, "multiplier": multiplier, "x": x, "y": y, "preferences": arrays[0], "pizzas": arrays[1],
+                      "pizza_choice_order": arrays[2], "cuts": arrays[3]})
+    return games
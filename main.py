@@ -19,8 +19,21 @@ if __name__ == '__main__':
     #only for no gui case
     parser.add_argument("--player", "-p", default=1, help="Team number playing the game if no gui")
     parser.add_argument("--num_toppings", "-num_top", default=4, help="Total different types of toppings")
+    parser.add_argument("--num_pizzas", "-num_piz", default=10, help="Number of pizzas made (and customers served) in a game, if no gui")
+    parser.add_argument("--toppings_per_pizza", "-top_pp", default=24, help="Toppings placed on every pizza, if no gui")
     
     parser.add_argument("--tournament", "-tmnt", default=False, help="Is this a tournament run or not")
+    parser.add_argument("--cache", "-cache", default="False", help="Cache cut scores in memory (constants.ratio_cache_size entries), -sc turns it on too")
+    parser.add_argument("--score_cache", "-sc", default=None, help="SQLite file caching cut scores across runs and processes")
+    parser.add_argument("--timing", "-tm", default=None, help="JSON file receiving per phase wall/cpu timings, if no gui")
+    parser.add_argument("--trace", "-tr", default=None, help="Chrome trace-event JSON file receiving a timeline of no gui games")
+    parser.add_argument("--trace_every", "-tr_every", default=None, help="Trace one game in this many (default constants.trace_sample_every)")
+    parser.add_argument("--profile", "-prof", default=None, help="Directory receiving per player cProfile/tracemalloc reports of the player calls, if no gui")
+    parser.add_argument("--log_level", "-log", default="full", help="Game results kept: none, summary or full")
+    parser.add_argument("--log_file", "-log_f", default=None, help="JSONL file receiving one result record per game (use {game} in the name for one file per game)")
+    parser.add_argument("--journal", "-jr", default=None, help="Binary decision journal receiving the inputs and cuts of every game, for rescore.py")
+    parser.add_argument("--out_of_process", "-op", default="False", help="Run the generator and the player in a separate, reused process that is killed when a call runs past its deadline, if no gui")
+    parser.add_argument("--player_timeout", "-pt", default=None, help="Seconds for choose_toppings and all choose_and_cut calls of a game (default no limit). When given, anytime players stop searching in time, and a call past it fails the game with a timeout, killed with -op")
     args = parser.parse_args()
     args.tournament = "False"
     if args.gui == "True":
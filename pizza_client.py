@@ -0,0 +1,65 @@
+import sys
+import json
+import argparse
+import urllib.error
+import urllib.request
+import constants as constants
+
+#Thin client of pizza_daemon.py: plays a no gui game with the options of main.py, and writes and prints what main.py
+#would. It imports neither numpy nor the players, so it starts in a few tens of milliseconds.
+
+daemon_options = ["player", "generator_number", "num_toppings", "seed", "gen_100_seed", "gen_10_seed", "num_pizzas", "toppings_per_pizza",
+                  "interface_size", "log_level", "out_of_process", "player_timeout"]
+
+
+def request(url, path, body=None):
+    """JSON reply of the daemon, POSTing body when given"""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url + path, data=data, headers={"Content-Type": "application/json"})) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        sys.exit("Daemon error: " + json.loads(error.read()).get("error", str(error)))
+    except urllib.error.URLError as error:
+        sys.exit("No daemon at " + url + " (" + str(error.reason) + "), start one with python pizza_daemon.py")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--daemon", "-d", default=f"http://127.0.0.1:{constants.daemon_port}", help="URL of the daemon")
+    parser.add_argument("--interface_size", "-sz", default=40, help="GUI Size")
+    parser.add_argument("--seed", "-s", default=48, help="General seed for your own functions")
+    parser.add_argument("--gen_100_seed", "-s100", default=45, help="Seed for generating 100 preferences")
+    parser.add_argument("--gen_10_seed", "-s10", default=50, help="Seed for generating 10 preferences")
+    parser.add_argument("--generator_number", "-g_num", default=0, help="Which player is the preference generator")
+    parser.add_argument("--player", "-p", default=1, help="Team number playing the game")
+    parser.add_argument("--num_toppings", "-num_top", default=4, help="Total different types of toppings")
+    parser.add_argument("--num_pizzas", "-num_piz", default=10, help="Number of pizzas made (and customers served) in a game")
+    parser.add_argument("--toppings_per_pizza", "-top_pp", default=24, help="Toppings placed on every pizza")
+    parser.add_argument("--log_level", "-log", default="full", help="Game results kept: none, summary or full")
+    parser.add_argument("--log_file", "-log_f", default=None, help="JSONL file receiving the result record of the game (use {game} in the name for one file per game)")
+    parser.add_argument("--out_of_process", "-op", default="False", help="Run the generator and the player in a separate player process of the daemon")
+    parser.add_argument("--player_timeout", "-pt", default=None, help="Seconds for choose_toppings and all choose_and_cut calls of a game (default no limit). When given, anytime players stop searching in time, and a call past it fails the game with a timeout, killed with -op")
+    parser.add_argument("--score", "-score", default=None, help="Score the game(s) of this JSON file (see pizza_daemon.score_games) instead of playing one")
+    parser.add_argument("--status", "-status", default="False", help="Print the status of the daemon")
+    args = parser.parse_args()
+
+    if args.status == "True":
+        print(json.dumps(request(args.daemon, "/status"), indent=2))
+    elif args.score:
+        with open(args.score) as f:
+            print(json.dumps(request(args.daemon, "/score", json.load(f))))
+    else:
+        spec = {name: getattr(args, name) for name in daemon_options}
+        for name in ["player", "generator_number", "num_toppings", "seed", "gen_100_seed", "gen_10_seed", "num_pizzas", "toppings_per_pizza", "interface_size"]:
+            spec[name] = int(spec[name])
+        reply = request(args.daemon, "/game", spec)
+        sys.stdout.write(reply["output"])
+        if reply["record"] is not None:
+            #what no_gui.see_score does for a single game
+            if args.log_file:
+                with open(args.log_file.format(game=reply["record"]["run"].get("game", 1)) if "{game}" in args.log_file else args.log_file, "a") as f:
+                    f.write(json.dumps(reply["record"], separators=(",", ":")) + "\n")
+            with open("summary_log_nogui.txt", "w") as f:
+                f.write(reply["text"])
+            print(reply["console"])
@@ -0,0 +1,179 @@
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import constants as constants
+import results
+import rescore
+from game import Game
+from utils import pizza_calculations
+from instrumentation import to_json
+from player_process import pool_for, seeded_globals
+
+#Local game and scoring daemon. The interpreter, numpy, scipy, shapely and the players are loaded once, and the worker
+#processes are forked from the loaded daemon, so a request only pays for its game. JSON over HTTP on localhost:
+#    POST /game     a game, with the names of main.py's options -> status, totals, record, console and text renderings
+#    POST /score    pizzas, cuts and preferences of one game, or {"games": [...]} -> U, B, C, S, SliceMetric and
+#                   CenterOffset of every customer, and their totals
+#    GET /status    uptime, workers and requests served
+#pizza_client.py plays games through it with the options of main.py.
+
+game_defaults = {"player": 1, "generator_number": 0, "num_toppings": 4, "seed": 48, "gen_100_seed": 45, "gen_10_seed": 50,
+                 "num_pizzas": 10, "toppings_per_pizza": 24, "interface_size": 40, "log_level": "full", "out_of_process": "False", "player_timeout": None}
+
+
+def play_game(spec):
+    """A game of the daemon, in a worker
+
+    Args:
+        spec(dict) : main.py option names (player, generator_number, num_toppings, seed, gen_100_seed, gen_10_seed,
+                     num_pizzas, toppings_per_pizza, interface_size, log_level, out_of_process, player_timeout),
+                     missing ones take main.py's defaults
+    Returns:
+        reply(dict) : status, seconds, totals, record at the log level, console and text renderings and what the players printed
+    """
+    unknown = set(spec) - set(game_defaults)
+    if unknown:
+        raise ValueError("Unknown game options " + ", ".join(sorted(unknown)))
+    spec = dict(game_defaults, **spec)
+    if spec["log_level"] not in results.levels:
+        raise ValueError("Unknown result level " + str(spec["log_level"]) + ", use one of " + ", ".join(results.levels))
+    game = Game(spec["player"], spec["generator_number"], spec["num_toppings"], int(spec["seed"]), int(spec["gen_100_seed"]), int(spec["gen_10_seed"]),
+                num_pizzas=spec["num_pizzas"], toppings_pp=spec["toppings_per_pizza"], multiplier=spec["interface_size"],
+                players=pool_for() if str(spec["out_of_process"]) == "True" else None, player_timeout=spec["player_timeout"])
+    start = time.perf_counter()
+    with seeded_globals(int(spec["seed"])):       #as tournament games do
+        result = game.run()
+    reply = {"status": result.status, "seconds": time.perf_counter() - start, "totals": result.totals, "output": result.output,
+             "record": None, "console": None, "text": None}
+    if result.record is not None and spec["log_level"] != "none":
+        reply["record"] = results.at_level(result.record, spec["log_level"])
+        reply["console"] = results.render_console(result.record)
+        reply["text"] = results.render_text(result.record)
+    return reply
+
+
+def score_games(request):
+    """Scores of raw games, in a worker
+
+    Args:
+        request(dict) : a game, or {"games": [games]}. A game holds num_toppings, pizzas [num_pizzas, toppings, 3],
+                        preferences [customers, 2, num_toppings] in serving order, pizza_choice_order (the pizza of
+                        every customer) and cuts [num_pizzas, 3] (center x, y in inches from the pizza center and the
+                        angle, per pizza, like game_result.cuts)
+    Returns:
+        reply(dict) : "games", per game the per customer U, B, C, S, SliceMetric and CenterOffset and their totals
+    """
+    multiplier, x, y = 40, 12*40, 10*40
+    games = []
+    for game in request["games"] if "games" in request else [request]:
+        cuts = np.asarray(game["cuts"], dtype=np.float64).reshape(-1, 3)
+        games.append({"num_toppings": int(game["num_toppings"]), "pizzas": np.asarray(game["pizzas"], dtype=np.float64),
+                      "preferences": np.asarray(game["preferences"], dtype=np.float64), "pizza_choice_order": list(game["pizza_choice_order"]),
+                      "cuts": np.stack([x + cuts[:, 0]*multiplier, y - cuts[:, 1]*multiplier, cuts[:, 2]], axis=1), "multiplier": multiplier, "x": x, "y": y})
+    scores = rescore.rescore(games)
+    totals = rescore.game_totals(games, scores)
+    names = ["U", "B", "C", "S", "SliceMetric", "CenterOffset"]
+    reply = []
+    for number in range(len(games)):
+        mine = scores["game"] == number
+        if not mine.any():
+            reply.append({"error": "customers and pizza_choice_order differ in length, the game was not scored"})
+            continue
+        reply.append({"customers": {name: scores[name][mine].tolist() for name in names}, "totals": {name: float(totals[name][number]) for name in names}})
+    return {"games": reply}
+
+
+def warm_up(score_cache, cache=False):
+    #runs in every worker: the caches a request would otherwise fill first
+    if cache:
+        pizza_calculations.enable_cache()
+    if score_cache:
+        pizza_calculations.attach_store(score_cache)
+
+
+class daemon_handler(BaseHTTPRequestHandler):
+    routes = {"/game": play_game, "/score": score_games}
+
+    def do_GET(self):
+        if self.path != "/status":
+            return self.reply(404, {"error": "Unknown path " + self.path})
+        daemon = self.server.owner
+        with daemon.lock:
+            served = dict(daemon.served)
+        self.reply(200, {"uptime": time.time() - daemon.started, "workers": daemon.processes, "served": served})
+
+    def do_POST(self):
+        if self.path not in self.routes:
+            return self.reply(404, {"error": "Unknown path " + self.path})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError as error:
+            return self.reply(400, {"error": "Bad JSON: " + str(error)})
+        try:
+            reply = self.server.owner.pool.apply(self.routes[self.path], (request,))
+        except Exception as error:
+            return self.reply(500, {"error": type(error).__name__ + ": " + str(error)})
+        with self.server.owner.lock:
+            self.server.owner.served[self.path] = self.server.owner.served.get(self.path, 0) + 1
+        self.reply(200, reply)
+
+    def reply(self, code, body):
+        data = json.dumps(body, default=to_json).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass        #one line per request would drown the console
+
+
+class pizza_daemon():
+    """The daemon: an HTTP server on localhost and the worker pool playing its requests
+
+    Args:
+        host(str), port(int) : address served
+        processes(int) : worker processes, games and scoring requests run in parallel on them
+        score_cache(str) : SQLite score cache the workers share, as -sc of main.py
+        cache(bool) : cache cut scores in memory in every worker, as -cache of main.py
+    """
+    def __init__(self, host, port, processes, score_cache=None, cache=False):
+        self.processes = processes
+        self.pool = multiprocessing.Pool(processes, initializer=warm_up, initargs=(score_cache, cache))
+        self.server = ThreadingHTTPServer((host, port), daemon_handler)
+        self.server.owner = self
+        self.started = time.time()
+        self.served = {}
+        self.lock = threading.Lock()
+
+    def serve(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.pool.terminate()
+            self.pool.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", "-host", default="127.0.0.1", help="Address to listen on (keep it local, requests run player code)")
+    parser.add_argument("--port", "-port", default=constants.daemon_port, help="Port to listen on")
+    parser.add_argument("--processes", "-j", default=multiprocessing.cpu_count(), help="Worker processes")
+    parser.add_argument("--cache", "-cache", default="False", help="Cache cut scores in memory in every worker (constants.ratio_cache_size entries), -sc turns it on too")
+    parser.add_argument("--score_cache", "-sc", default=None, help="SQLite file caching cut scores across requests and workers")
+    args = parser.parse_args()
+    daemon = pizza_daemon(args.host, int(args.port), int(args.processes), args.score_cache, str(args.cache) == "True")
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit())        #kill stops the workers too
+    print(f"Serving on http://{args.host}:{args.port} with {args.processes} workers", flush=True)
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
@@ -13,6 +13,7 @@ import time
 import copy
 import argparse
 from utils import pizza_calculations
+import results
 from players.default_player import Player as default_player
 from players.team_1 import Player as p1
 from players.team_2 import Player as p2
@@ -59,6 +60,12 @@ class gui():
         self.multiplier = int(args.interface_size) #(default 40)
         self.rng_generator_100 = np.random.default_rng(int(args.gen_100_seed))
         self.rng_generator_10 = np.random.default_rng(int(args.gen_10_seed))
+        if str(getattr(args, "cache", "False")) == "True":
+            pizza_calculations.enable_cache()
+        self.score_cache_path = getattr(args, "score_cache", None)
+        if self.score_cache_path:
+            pizza_calculations.attach_store(self.score_cache_path)
+        self.record = None
 
     def initialise_player(self, player_px, autoplayer) :
             #setting player
@@ -324,15 +331,9 @@ class gui():
             self.button.destroy()
             self.pizzas = self.player_instance.choose_toppings(self.preferences_100)
             self.pizzas_drawn = constants.number_of_initial_pizzas
-            clash_exists_overall = False
-            for i in range(constants.number_of_initial_pizzas):
-                for j in range(24):
-                    pizza = self.pizzas[i]
-                    clash_exists = pizza_calculations.clash_exists(self.pizzas[i][j][0], self.pizzas[i][j][1], pizza, j)
-                    if clash_exists == True:
-                        clash_exists_overall = True
-            if clash_exists_overall:
-                self.label.config( text = "Overlapping placement. You cannot serve customers now.")
+            self.placement_report = pizza_calculations.validate_pizzas(self.pizzas)
+            if not self.placement_report["valid"]:
+                self.label.config( text = "Overlapping placement. You cannot serve customers now. " + " ".join(pizza_calculations.describe_placement(self.placement_report, limit=2)))
                 self.button.destroy()
                 self.button = Button( self.root , text = "Exit" , command = self.end_run)
                 self.button.place(x=123, y=20)
@@ -437,71 +438,19 @@ class gui():
             self.canvas.bind("<Button-1>", self.clickevent_cut)
 
     def see_score(self):
-        B, C, U, obtained_preferences, center_offsets, slice_amount_metrics = self.calculator.final_score(self.pizzas, self.pizza_choice_order, self.preferences, self.cuts, self.num_toppings, self.multiplier, self.x, self.y)
+        scores = self.calculator.final_score(self.pizzas, self.pizza_choice_order, self.preferences, self.cuts, self.num_toppings, self.multiplier, self.x, self.y)
+        B, C, U, obtained_preferences, center_offsets, slice_amount_metrics = scores
         list_scores = [('Customer Number', "Pizza Number", "U", "B", "C", "S" , "Center offsets", "Slice metric")]
+        cache = None
+        if pizza_calculations.cache is not None:
+            cache = dict(pizza_calculations.cache.stats(), store_path=self.score_cache_path)
+        self.record = results.game_record(self.pizzas, self.pizza_choice_order, self.preferences, self.cuts, scores, self.multiplier, self.x, self.y, cache=cache)
         with open("summary_log_gui.txt", "w") as f:
-            U_total = 0
-            B_total = 0
-            C_total = 0
-            S_total = 0
-            for i in range(len(self.pizzas)):
-                pizza_id = self.pizza_choice_order[i]
-                f.write('\n')
-                f.write('\n')
-                f.write("Customer " + str(i+1) + " :" )
-                f.write('\n')
-                f.write("Pizza " + str(pizza_id))
-                f.write('\n')
-                f.write("Cut at (" + str((self.cuts[pizza_id][0]-self.x)/self.multiplier) + ", " + str((self.cuts[pizza_id][1]-self.y)/self.multiplier) + ") and angle " + str(self.cuts[pizza_id][2]) + "radians.")
-                f.write('\n')
-                f.write("Center offset : " + str(center_offsets[i]))
-                f.write('\n')
-                for j in range(24):
-                    f.write("Topping " + str(self.pizzas[pizza_id][j][2]) + " at (" + str(self.pizzas[pizza_id][j][0]) + "," + str(self.pizzas[pizza_id][j][1]) + ")")
-                    f.write('\n')
-                f.write("U : " + str(U[i]))
-                f.write('\n')
-                f.write("Total : " + str(U[i].sum()))
-                f.write('\n')
-                U_total = U_total + U[i].sum()
-                f.write("B : " + str(B[i]))
-                f.write('\n')
-                f.write("Total : " + str(B[i].sum()))
-                f.write('\n')
-                B_total = B_total + B[i].sum()
-                f.write("C : " + str(C[i]))
-                f.write('\n')
-                f.write("Total : " + str(C[i].sum()))
-                f.write('\n')
-                C_total = C_total + C[i].sum()
-                f.write("S : " + str((B[i] - C[i])))
-                f.write('\n')
-                f.write("Total : " + str((B[i] - C[i]).sum()))
-                f.write('\n')
-                S_total = S_total + (B[i] - C[i]).sum()
-                f.write("Desired Preferences : " + str(self.preferences[i]))
-                f.write('\n')
-                f.write("Obtained Preferences : " + str(obtained_preferences[i]))
-                f.write('\n')
-                f.write("Slice by slice amount differences sum : " + str(slice_amount_metrics[i]))
-                f.write('\n')
-                f.write('\n')
-                f.write('\n')
-                #list_scores.append((str(i+1), str(pizza_id), str(np.round(U[i].sum(), 2)), str(np.round(B[i].sum(), 2)), str(np.round(C[i].sum(), 2 )), str(np.round((B[i] - C[i]).sum(), 2))))
-                list_scores.append((str(i+1), str(pizza_id), str(np.round(U[i].sum(), 2)), str(np.round(B[i].sum(), 2)), str(np.round(C[i].sum(), 2 )), str(np.round((np.sum(B[i], axis = 1) - np.sum(C[i], axis = 1)).sum(), 2)),  str(np.round(center_offsets[i], 2)),  str(np.round(slice_amount_metrics[i], 2)  )))
-            f.write("Total Score U : " + str(U_total))
-            f.write('\n')
-            f.write("Total score B : " + str(B_total))
-            f.write('\n')
-            f.write("Total score C : " + str(C_total))
-            f.write('\n')
-            f.write("Total score S : " + str(S_total))
-            f.write('\n')
-            f.write("Total Slice by slice metric : " + str(np.sum(slice_amount_metrics)))
-            f.write('\n')
-            f.write("Total center offsets : " + str(np.sum(center_offsets)))
-            f.write('\n')
-            f.write('\n')
+            f.write(results.render_text(self.record))
+        for i in range(len(self.pizzas)):
+            pizza_id = self.pizza_choice_order[i]
+            #list_scores.append((str(i+1), str(pizza_id), str(np.round(U[i].sum(), 2)), str(np.round(B[i].sum(), 2)), str(np.round(C[i].sum(), 2 )), str(np.round((B[i] - C[i]).sum(), 2))))
+            list_scores.append((str(i+1), str(pizza_id), str(np.round(U[i].sum(), 2)), str(np.round(B[i].sum(), 2)), str(np.round(C[i].sum(), 2 )), str(np.round((np.sum(B[i], axis = 1) - np.sum(C[i], axis = 1)).sum(), 2)),  str(np.round(center_offsets[i], 2)),  str(np.round(slice_amount_metrics[i], 2)  )))
         
         self.root_1 = Tkinter.Tk()
         for i in range(constants.number_of_initial_pizzas + 1):
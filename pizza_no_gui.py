@@ -5,14 +5,13 @@ import time
 import copy
 import argparse
 from utils import pizza_calculations
-from players.default_player import Player as default_player
-from players.team_1 import Player as p1
-from players.team_2 import Player as p2
-from players.team_3 import Player as p3
-from players.team_4 import Player as p4
-from players.default_player import Player as p5
-from players.team_6 import Player as p6
-import pickle as pkl
+from instrumentation import phase_timer
+from tracing import tracer_for
+from profiling import profiler_for
+import results
+from journal import journal_for
+from game import Game
+from player_process import pool_for
 
 class no_gui():
 
@@ -27,9 +26,12 @@ class no_gui():
         self.xs = [30, 60, 90, 120, 150, 30, 60, 90, 120, 150]
         self.ys = [30, 30, 30, 30, 30, 60, 60, 60, 60, 60]
 
-        self.pizzas = np.zeros((10, 24, 3))   #10 pizzas, 27 toppings, each has [x, y, topping type] (x and y wrt pizza center)
+        self.num_pizzas = int(getattr(args, "num_pizzas", constants.number_of_initial_pizzas))          #pizzas made, and customers served
+        self.toppings_pp = int(getattr(args, "toppings_per_pizza", constants.number_of_toppings_pp))
+        self.pizzas = np.zeros((self.num_pizzas, self.toppings_pp, 3))   #each topping has [x, y, topping type] (x and y wrt pizza center)
         self.pizza_id = 0
-        self.cuts = list(np.zeros((10,3)))  #10 pizzas, x, y coordinates of cut intscn wrt pizza center and angle of cut in the 0-45 degree range
+        self.cuts = np.zeros((self.num_pizzas, 3))  #x, y coordinates of cut intscn (screen units) and angle of cut, for every pizza
+        self.served = np.zeros(self.num_pizzas, dtype=bool)     #pizzas already given to a customer
         self.type_p = ""
         self.pizzas_drawn = 0
         self.options_player = ["custom_player","default_player", "p1", "p2", "p3","p4","p5", "p6"]
@@ -45,6 +47,7 @@ class no_gui():
         self.pizza_choice_order = []
         self.calculator = pizza_calculations()
         self.preferences_100 = None
+        self.pizza_layouts = None       #the pizzas grouped by identical layout, once choose_toppings returned them
 
         #replace with arguments
         #self.autoplayer_number = args.autoplayer_number
@@ -55,160 +58,104 @@ class no_gui():
         self.player_nogui = int(args.player)
         self.num_toppings_nogui = int(args.num_toppings)
         self.is_tournament = True if str(args.tournament) == "True" else False
+        if str(getattr(args, "cache", "False")) == "True":
+            pizza_calculations.enable_cache()
+        self.score_cache_path = getattr(args, "score_cache", None)
+        if self.score_cache_path:
+            pizza_calculations.attach_store(self.score_cache_path)
+        self.timing_path = getattr(args, "timing", None)
+        self.trace_path = getattr(args, "trace", None)
+        self.tracer = tracer_for(self.trace_path, getattr(args, "trace_every", None), fresh=not self.is_tournament) if self.trace_path else None
+        self.timer = phase_timer(enabled=bool(self.timing_path) or bool(getattr(args, "telemetry", None)) or self.tracer is not None, tracer=self.tracer)     #tournament telemetry reads the choose_and_cut timings
+        self.profile_path = getattr(args, "profile", None)
+        self.profiler = profiler_for(self.profile_path) if self.profile_path else None
+        self.log_level = getattr(args, "log_level", None) or "full"
+        self.log_file = getattr(args, "log_file", None)
+        self.result_writer = results.writer_for(self.log_file, self.log_level) if self.log_file else None
+        self.record = None
+        self.tournament_result = None
+        self.inputs = None      #customers generated beforehand (game.game_inputs), shared by the players of a tournament cell
+        self.journal_path = getattr(args, "journal", None)
+        self.journal = journal_for(self.journal_path) if self.journal_path else None
+        self.seeds = {"seed": int(args.seed), "gen_100_seed": int(args.gen_100_seed), "gen_10_seed": int(args.gen_10_seed)}
+        self.players = pool_for() if str(getattr(args, "out_of_process", "False")) == "True" else None       #player processes, reused by the games of this process
+        self.player_timeout = getattr(args, "player_timeout", None)
 
-    def initialise_player(self, player_px, autoplayer) :
-            #setting player
-            if player_px == 0:
-                self.player_instance = default_player(self.num_toppings, self.rng)
-            elif player_px == 1:
-                self.player_instance = p1(self.num_toppings, self.rng)
-            elif player_px == 2:
-                self.player_instance = p2(self.num_toppings, self.rng)
-            elif player_px == 3:
-                self.player_instance = p3(self.num_toppings, self.rng)
-            elif player_px == 4:
-                self.player_instance = p4(self.num_toppings, self.rng)
-            elif player_px == 5:
-                self.player_instance = p5(self.num_toppings, self.rng)
-            elif player_px == 6:
-                self.player_instance = p6(self.num_toppings, self.rng)
-            else:
-                self.player_instance = default_player(self.num_toppings, self.rng)
-            #setting autoplayer
-            if autoplayer == 0:
-                self.auto_player = default_player(self.num_toppings, self.rng)
-            elif autoplayer == 1:
-                self.auto_player = p1(self.num_toppings, self.rng)
-            elif autoplayer == 2:
-                self.auto_player = p2(self.num_toppings, self.rng)
-            elif autoplayer == 3:
-                self.auto_player = p3(self.num_toppings, self.rng)
-            elif autoplayer == 4:
-                self.auto_player = p4(self.num_toppings, self.rng)
-            elif autoplayer == 5:
-                self.auto_player = p5(self.num_toppings, self.rng)
-            elif autoplayer == 6:
-                self.auto_player = p6(self.num_toppings, self.rng)
-            else:
-                self.auto_player = default_player(self.num_toppings, self.rng)
+    def write_reports(self):
+        if self.profiler is not None:
+            self.profiler.game_finished([self.generator_number, self.num_player])
+            self.profiler.write()
+        if not self.timing_path:
+            return
+        self.timer.write(self.timing_path, player=self.player_nogui, num_toppings=self.num_toppings_nogui, generator=self.generator_number,
+                         num_pizzas=self.num_pizzas, toppings_pp=self.toppings_pp, **self.seeds)
+        print(self.timer.digest())
 
     def see_score(self):
-        B, C, U, obtained_preferences, center_offsets, slice_amount_metrics = self.calculator.final_score(self.pizzas, self.pizza_choice_order, self.preferences, self.cuts, self.num_toppings, self.multiplier, self.x, self.y)
-        with open("summary_log_nogui.txt", "w") as f:
-            U_total = 0
-            B_total = 0
-            C_total = 0
-            S_total = 0
-            results_run = [self.pizzas]
-            for i in range(len(self.pizzas)):
-                pizza_id = self.pizza_choice_order[i]
-                f.write('\n')
-                f.write('\n')
-                f.write("Customer " + str(i+1) + " :" )
-                f.write('\n')
-                f.write("Pizza " + str(pizza_id))
-                f.write('\n')
-                f.write("Cut at (" + str((self.cuts[pizza_id][0]-self.x)/self.multiplier) + ", " + str((self.cuts[pizza_id][1]-self.y)/self.multiplier) + ") and angle " + str(self.cuts[pizza_id][2]) + "radians.")
-                f.write('\n')
-                f.write("Center offset : " + str(center_offsets[i]))
-                f.write('\n')
-                for j in range(24):
-                    f.write("Topping " + str(self.pizzas[pizza_id][j][2]) + " at (" + str(self.pizzas[pizza_id][j][0]) + "," + str(self.pizzas[pizza_id][j][1]) + ")")
-                    f.write('\n')
-                f.write("U : " + str(U[i]))
-                f.write('\n')
-                f.write("Total : " + str(U[i].sum()))
-                f.write('\n')
-                U_total = U_total + U[i].sum()
-                f.write("B : " + str(B[i]))
-                f.write('\n')
-                f.write("Total : " + str(B[i].sum()))
-                f.write('\n')
-                B_total = B_total + B[i].sum()
-                f.write("C : " + str(C[i]))
-                f.write('\n')
-                f.write("Total : " + str(C[i].sum()))
-                f.write('\n')
-                C_total = C_total + C[i].sum()
-                f.write("S : " + str((B[i] - C[i])))
-                f.write('\n')
-                f.write("Total : " + str((B[i] - C[i]).sum()))
-                f.write('\n')
-                S_total = S_total + (B[i] - C[i]).sum()
-                f.write("Desired Preferences : " + str(self.preferences[i]))
-                f.write('\n')
-                f.write("Obtained Preferences : " + str(obtained_preferences[i]))
-                f.write('\n')
-                f.write("Slice by slice amount differences sum : " + str(slice_amount_metrics[i]))
-                f.write('\n')
-                f.write('\n')
-                f.write('\n')
-                print(f"Customer {str(i+1)}, pizza {str(pizza_id)}, U = {str(np.round(U[i].sum(), 2))}, B = {str(np.round(B[i].sum(), 2))}, C = {str(np.round(C[i].sum(), 2 ))}, S = {str(np.round((np.sum(B[i], axis = 1) - np.sum(C[i], axis = 1)).sum(), 2))}, SliceMetric = {str(slice_amount_metrics[i])}, CenterOffset = {str(center_offsets[i])}")
-                written_cut = [((self.cuts[pizza_id][0]-self.x)/self.multiplier), ((self.cuts[pizza_id][1]-self.y)/self.multiplier), (self.cuts[pizza_id][2])]
-                result = {"Customer": i+1, "Cut" : written_cut ,"Pizza_id": pizza_id, "U": np.round(U[i].sum(), 2), "B": np.round(B[i].sum(), 2), "C": np.round(C[i].sum(), 2 ), "S": np.round((np.sum(B[i], axis = 1) - np.sum(C[i], axis = 1)).sum(), 2),  "SliceMetric" : slice_amount_metrics[i] , "CenterOffset" : center_offsets[i]}
-                results_run.append(result)
-            f.write("Total Score U : " + str(U_total))
-            print("Total Score U : " + str(U_total))
-            f.write('\n')
-            f.write("Total score B : " + str(B_total))
-            print("Total score B : " + str(B_total))
-            f.write('\n')
-            f.write("Total score C : " + str(C_total))
-            print("Total score C : " + str(C_total))
-            f.write('\n')
-            f.write("Total score S : " + str(S_total))
-            print("Total score S : " + str(S_total))
-            f.write('\n')
-            f.write("Total Slice by slice metric : " + str(np.sum(slice_amount_metrics)))
-            print("Total Slice by slice metric : " + str(np.sum(slice_amount_metrics)))
-            f.write('\n')
-            f.write("Total center offsets : " + str(np.sum(center_offsets)))
-            print("Total center offsets : " + str(np.sum(center_offsets)))
-            f.write('\n')
-            f.write('\n')
-            results_run.append({"U":U_total, "B":B_total, "C":C_total, "S":S_total, "SliceMetric": np.sum(slice_amount_metrics), "CenterOffset" : np.sum(center_offsets)})
+        with self.timer.phase("see_score"):
+            if self.record["cache"] is not None:
+                self.record["cache"]["store_path"] = self.score_cache_path
+            if self.result_writer is not None:
+                self.result_writer.write(self.record)
+            if not self.is_tournament and self.log_level != "none":
+                #single games keep their readable log and console summary, tournaments only keep structured results
+                with open("summary_log_nogui.txt", "w") as f:
+                    f.write(results.render_text(self.record))
+                print(results.render_console(self.record))
             if self.is_tournament:
-                with open("tournament_results.pkl", "rb") as fp:
-                    a = pkl.load(fp)
-                    a[self.player_nogui-1].append(results_run)
-                with open("tournament_results.pkl", "wb") as fp:
-                    pkl.dump(a, fp)
+                self.save_tournament_result()
+
+    def save_tournament_result(self):
+        #the pickle entry of this game, tournament.py gathers them and writes tournament_results.pkl
+        results_run = [self.pizzas]
+        for customer in self.record["customers"]:
+            results_run.append(dict({"Customer": customer["customer"], "Cut": customer["cut"], "Pizza_id": customer["pizza_id"]},
+                                    **results.customer_scores(customer), SliceMetric=customer["slice_metric"], CenterOffset=customer["center_offset"]))
+        results_run.append(dict(self.record["totals"]))
+        self.tournament_result = results_run
 
     def run(self):
+        if self.tracer is None or not self.tracer.begin_game(player=self.player_nogui, num_toppings=self.num_toppings_nogui, generator=self.generator_number, **self.seeds):
+            return self.play()
+        pizza_calculations.tracer = self.tracer
+        try:
+            self.play()
+        finally:
+            pizza_calculations.tracer = None
+            self.tracer.end_game()
+
+    def play(self):
+        self.finish(self.game().run(self.inputs))
+
+    def game(self):
+        #the Game this instance plays, async_runner drives its flow itself
         self.num_player = self.player_nogui
         self.num_toppings = self.num_toppings_nogui
-        self.all_player_instances = [ default_player(self.num_toppings, self.rng), p1(self.num_toppings, self.rng), p2(self.num_toppings, self.rng), p3(self.num_toppings, self.rng), p4(self.num_toppings, self.rng), p5(self.num_toppings, self.rng), p6(self.num_toppings, self.rng)]
-        # print("Customer prefernces are being generated..")
-        # print("self.generator_number", self.generator_number)
-        self.preferences = self.all_player_instances[self.generator_number].customer_gen(10, self.rng_generator_10)
-        self.preferences_100 = self.all_player_instances[self.generator_number].customer_gen(100, self.rng_generator_100)
-        # print("Generated preferences are:", self.preferences)
-        self.initialise_player(self.num_player, self.num_player)
-        self.pizzas = self.player_instance.choose_toppings(self.preferences_100)
-        self.pizzas_drawn = constants.number_of_initial_pizzas
-        clash_exists_overall = False
-        for i in range(constants.number_of_initial_pizzas):
-            for j in range(24):
-                pizza = self.pizzas[i]
-                clash_exists = pizza_calculations.clash_exists(self.pizzas[i][j][0], self.pizzas[i][j][1], pizza, j)
-                if clash_exists == True:
-                    clash_exists_overall = True
-        if clash_exists_overall:
-            print("Overlapping placement. You cannot serve customers now.")
-        else:
-            print("Your shop is now open!!!")
-            for j in range(constants.number_of_initial_pizzas):
-                options_pizza = []
-                for i in range(len(self.cuts)):
-                    if list(self.cuts[i]) == [0,0,0]:
-                        options_pizza.append(i)
-                pizza_id, center, theta = self.player_instance.choose_and_cut(self.pizzas, options_pizza, self.preferences[j])
-                self.pizza_choice_order.append(pizza_id)
-                self.pizza_id = pizza_id
-                self.cuts[pizza_id][0] = (self.x + center[0]*self.multiplier)
-                self.cuts[pizza_id][1] = (self.y - center[1]*self.multiplier)
-                self.cuts[pizza_id][2] = theta
+        game = Game(self.player_nogui, self.generator_number, self.num_toppings, num_pizzas=self.num_pizzas, toppings_pp=self.toppings_pp,
+                    multiplier=self.multiplier, timer=self.timer, profiler=self.profiler, capture_output=False, players=self.players,
+                    player_timeout=self.player_timeout, **self.seeds)
+        self.calculator = game.calculator
+        return game
+
+    def finish(self, result):
+        #takes the result of the game: scores, logs and reports
+        self.preferences = result.preferences
+        self.preferences_100 = result.preferences_100
+        if result.pizzas is not None:
+            self.pizzas = result.pizzas
+        self.pizza_layouts = result.pizza_layouts
+        self.placement_report = result.placement_report
+        if result.status == "served":
+            self.pizzas_drawn = self.num_pizzas
+            self.pizza_choice_order = list(result.pizza_choice_order)
+            self.pizza_id = self.pizza_choice_order[-1]
+            self.served[self.pizza_choice_order] = True
+            self.cuts = result.screen_cuts
+            self.record = result.record
+            if self.journal is not None:
+                self.journal.append(self.player_nogui, self.generator_number, self.num_toppings, self.seeds, self.preferences, self.pizzas, self.pizza_choice_order, self.cuts, self.multiplier, self.x, self.y)
             self.see_score()
+        self.write_reports()
 
 
 
@@ -0,0 +1,497 @@
+import os
+import sys
+import time
+import math
+import array
+import contextlib
+import random
+import asyncio
+import select
+import struct
+import subprocess
+import numpy as np
+import constants as constants
+
+#Out-of-process players. A player process is a long-lived python process hosting the generator or the player of one
+#game at a time. The simulator talks to it through remote_player, which has the interface of a player, over a binary
+#request/response protocol on its stdin and stdout pipes (async_remote_player on asyncio, for async_runner).
+#What the players print goes to /dev/null.
+#
+#Every frame is a header (payload bytes uint32, opcode uint8) and a payload, little endian. Both ways, the payload
+#starts with the random states players draw from: the state of the rng the game gives its players (PCG64), numpy's
+#global MT19937 state and the random module state. The process runs every call on the states of the simulator and
+#sends back the states the call left, so a game plays exactly as it would in-process. Then, by opcode:
+#    NEW        player index, num_toppings, num_pizzas, toppings_pp, instances (int32) -> nothing
+#    GENERATE   num_cust (int32), state of the generator rng -> returned a list (uint8), preferences, state of the generator rng
+#    TOPPINGS   is a list (uint8), preferences -> pizzas
+#    CUT        seconds an anytime player may search (float64, inf to finish), pizzas follow (uint8), [pizzas], remaining pizza ids,
+#               customer_amounts -> pizza_id (int64), center x, y, theta (float64)
+#Arrays are ndim (uint8), shape (int64 each) and the contiguous float64 (int64 for pizza ids) data. A call that raises
+#answers ERROR with the message, utf-8.
+
+frame = struct.Struct("<IB")
+NEW, GENERATE, TOPPINGS, CUT, OK, ERROR = 1, 2, 3, 4, 128, 255
+pcg_state = struct.Struct("<16s16sIQ")      #state, inc, has_uint32, uinteger
+mt_state = struct.Struct("<iid")            #pos, has_gauss, cached_gaussian
+random_state = struct.Struct("<?d")         #has gauss_next, gauss_next
+new_request = struct.Struct("<5i")
+cut_reply = struct.Struct("<q3d")
+
+
+def deadline_in(budget):
+    #time.monotonic() budget seconds from now, None (no deadline) without a budget
+    return None if budget is None else time.monotonic() + budget
+
+
+class player_timeout(Exception):
+    """A player call ran past its deadline, its process was killed"""
+
+
+class player_process_error(Exception):
+    """A player call raised in its process, or the process died"""
+
+
+def pack_array(array, dtype="<f8"):
+    array = np.ascontiguousarray(array, dtype=dtype)
+    return struct.pack("<B", array.ndim) + struct.pack(f"<{array.ndim}q", *array.shape) + array.tobytes()
+
+
+def unpack_array(data, offset, dtype="<f8"):
+    ndim = data[offset]
+    shape = struct.unpack_from(f"<{ndim}q", data, offset + 1)
+    offset = offset + 1 + 8*ndim
+    count = int(np.prod(shape))
+    array = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape).copy()
+    return array, offset + count*np.dtype(dtype).itemsize
+
+
+def pack_rng(rng):
+    state = rng.bit_generator.state
+    return pcg_state.pack(state["state"]["state"].to_bytes(16, "little"), state["state"]["inc"].to_bytes(16, "little"), state["has_uint32"], state["uinteger"])
+
+
+def unpack_rng(data, offset, rng):
+    state, inc, has_uint32, uinteger = pcg_state.unpack_from(data, offset)
+    rng.bit_generator.state = {"bit_generator": "PCG64", "state": {"state": int.from_bytes(state, "little"), "inc": int.from_bytes(inc, "little")},
+                               "has_uint32": has_uint32, "uinteger": uinteger}
+    return offset + pcg_state.size
+
+
+global_states_size = 624*4 + mt_state.size + 625*4 + random_state.size
+
+
+def pack_global_states(np_state=None, state=None):
+    #numpy's global MT19937 and the random module states, of this process unless given (as their get_state returns them)
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state() if np_state is None else np_state
+    version, internal, gauss_next = random.getstate() if state is None else state
+    return (np.asarray(keys).astype("<u4").tobytes() + mt_state.pack(pos, has_gauss, cached_gaussian)
+            + array.array("I", internal).tobytes() + random_state.pack(gauss_next is not None, gauss_next or 0.0))
+
+
+def unpack_global_states(data, offset=0):
+    #numpy's and random's states as get_state returns them, from packed global states
+    keys = np.frombuffer(data, dtype="<u4", count=624, offset=offset).astype(np.uint32)
+    pos, has_gauss, cached_gaussian = mt_state.unpack_from(data, offset + 624*4)
+    internal = array.array("I", data[offset + 624*4 + mt_state.size:offset + 624*4 + mt_state.size + 625*4])
+    has_gauss_next, gauss_next = random_state.unpack_from(data, offset + 624*4 + mt_state.size + 625*4)
+    return ("MT19937", keys, pos, has_gauss, cached_gaussian), (3, tuple(internal), gauss_next if has_gauss_next else None)
+
+
+def unpack_states(data, offset, rng, current=None):
+    """Sets the rng and the global random states from a frame
+
+    Args:
+        current(bytes) : packed global states this process holds, setting them again is skipped (most calls
+                         leave them alone, and numpy's set_state is the slowest part of a call)
+    Returns:
+        offset(int) : after the states
+        global_states(bytes) : the packed global states
+    """
+    offset = unpack_rng(data, offset, rng)
+    global_states = bytes(data[offset:offset + global_states_size])
+    if global_states != current:
+        np_state, state = unpack_global_states(global_states)
+        np.random.set_state(np_state)
+        random.setstate(state)
+    return offset + global_states_size, global_states
+
+
+class game_states():
+    """numpy's and random's global states of a game played away from the process globals, packed as frames carry them
+
+    async_runner plays many games at once in one process, each of them draws from its own states.
+    """
+    def __init__(self, np_state, state):
+        self.packed = pack_global_states(np_state, state)
+
+    def get(self):
+        return unpack_global_states(self.packed)
+
+    def set(self, np_state, state):
+        self.packed = pack_global_states(np_state, state)
+
+
+def seeded_states(seed):
+    """numpy's and random's global states a game of this seed starts from
+
+    Tournament games, daemon games and the games of async_runner all start from them, so generators and players that
+    draw from the global states (team_1, generators 2 and 6) play the same whichever of them runs the game.
+    """
+    return game_states(np.random.RandomState(seed % 2**32).get_state(), random.Random(seed).getstate())
+
+
+@contextlib.contextmanager
+def seeded_globals(seed):
+    #sets numpy's and random's global states to seeded_states(seed) for the block, then restores those it found
+    saved = np.random.get_state(), random.getstate()
+    np_state, state = seeded_states(seed).get()
+    np.random.set_state(np_state)
+    random.setstate(state)
+    try:
+        yield
+    finally:
+        np.random.set_state(saved[0])
+        random.setstate(saved[1])
+
+
+class player_process():
+    """A player process and its pipes, serving one game at a time"""
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self.games = 0
+        self.pizzas = None      #pizzas the process holds for choose_and_cut
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+    def call(self, opcode, payload, rng, deadline, name):
+        """Sends a request and waits for its reply
+
+        Args:
+            rng(Generator) : the player rng, sent with numpy's and random's global states and updated from the reply
+            deadline(float) : time.monotonic() by which the reply must be in, the process is killed past it (None waits)
+            name(str) : call, for the error messages
+        Returns:
+            data(bytes), offset(int) : the reply and where its payload starts after the random states
+        """
+        global_states = pack_global_states()
+        request = pack_rng(rng) + global_states + payload
+        try:
+            write_all(self.process.stdin.fileno(), frame.pack(len(request), opcode) + request)
+        except OSError:
+            self.kill()
+            raise player_process_error(name + ": the player process died")
+        length, status = frame.unpack(self.read(frame.size, deadline, name))
+        data = self.read(length, deadline, name)
+        if status == ERROR:
+            raise player_process_error(name + ": " + data.decode("utf-8", "replace"))
+        return data, unpack_states(data, 0, rng, global_states)[0]
+
+    def read(self, size, deadline, name):
+        chunks = []
+        fd = self.process.stdout.fileno()
+        while size:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or not select.select([fd], [], [], remaining)[0]:
+                self.kill()
+                raise player_timeout(name + " ran past its deadline")
+            chunk = os.read(fd, size)
+            if not chunk:
+                self.kill()
+                raise player_process_error(name + ": the player process died")
+            chunks.append(chunk)
+            size = size - len(chunk)
+        return b"".join(chunks)
+
+
+class remote_player():
+    """A generator or player living in a player process, with the interface the simulator calls
+
+    Args:
+        worker(player_process) : process hosting it for this game
+        index(int) : player class (game.player_classes)
+        num_toppings(int) : topping types
+        rng(Generator) : rng of the game, shared with the other players of the game
+        instances(int) : instances made, 1 for a generator, 2 for a player and the autoplayer the interactive game makes
+        budget(float) : seconds a customer_gen call may take, and choose_toppings and all choose_and_cut calls
+                        together, None for no deadline (games without -pt)
+        num_pizzas, toppings_pp(int) : shop size of the game
+    """
+    def __init__(self, worker, index, num_toppings, rng, instances, budget, num_pizzas, toppings_pp):
+        self.worker = worker
+        self.rng = rng
+        self.budget = budget
+        self.deadline = None        #of choose_toppings and choose_and_cut, set by the first of them
+        worker.pizzas = None
+        worker.call(NEW, new_request.pack(index, num_toppings, num_pizzas, toppings_pp, instances), rng, None, "player " + str(index))     #not timed, a new process spends it loading
+
+    def customer_gen(self, num_cust, rng=None):
+        data, offset = self.worker.call(GENERATE, generate_payload(num_cust, rng), self.rng, deadline_in(self.budget), "customer_gen")
+        return generated(data, offset, rng)
+
+    def choose_toppings(self, preferences):
+        self.deadline = deadline_in(self.budget)
+        data, offset = self.worker.call(TOPPINGS, toppings_payload(preferences), self.rng, self.deadline, "choose_toppings")
+        return unpack_array(data, offset)[0]
+
+    def choose_and_cut(self, pizzas, remaining_pizza_ids, customer_amounts, deadline=None):
+        #an anytime player's search stops at deadline (default the end of the budget), see game.anytime_cut
+        if self.deadline is None:
+            self.deadline = deadline_in(self.budget)
+        payload = cut_payload(self.worker, pizzas, remaining_pizza_ids, customer_amounts, search_end(self.deadline, deadline))
+        data, offset = self.worker.call(CUT, payload, self.rng, self.deadline, "choose_and_cut")
+        self.worker.pizzas = pizzas
+        return cut_of(data, offset)
+
+
+def generate_payload(num_cust, rng):
+    return struct.pack("<i", num_cust) + pack_rng(rng)
+
+
+def generated(data, offset, rng):
+    #preferences of a GENERATE reply, as the generator returned them, and the state it left in its rng
+    listed = data[offset]
+    preferences, offset = unpack_array(data, offset + 1)
+    unpack_rng(data, offset, rng)
+    return preferences.tolist() if listed else preferences
+
+
+def toppings_payload(preferences):
+    return struct.pack("<B", isinstance(preferences, list)) + pack_array(preferences)
+
+
+def search_end(budget_deadline, deadline):
+    #when an anytime search stops, None to let it finish
+    if budget_deadline is None or deadline is None:
+        return deadline if budget_deadline is None else budget_deadline
+    return min(budget_deadline, deadline)
+
+
+def cut_payload(worker, pizzas, remaining_pizza_ids, customer_amounts, deadline):
+    #the pizzas only go when the process does not hold them already, an infinite search time lets the search finish
+    payload = struct.pack("<dB", math.inf if deadline is None else deadline - time.monotonic(), worker.pizzas is not pizzas)
+    if worker.pizzas is not pizzas:
+        payload = payload + pack_array(pizzas)
+    return payload + pack_array(remaining_pizza_ids, "<i8") + pack_array(customer_amounts)
+
+
+def cut_of(data, offset):
+    pizza_id, x, y, theta = cut_reply.unpack_from(data, offset)
+    return pizza_id, [x, y], theta
+
+
+class async_player_process():
+    """A player process driven from asyncio, see async_runner. Make it with await async_player_process().start()"""
+    def __init__(self):
+        self.process = None
+        self.games = 0
+        self.pizzas = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return self
+
+    def alive(self):
+        return self.process.returncode is None
+
+    async def kill(self):
+        if self.alive():
+            self.process.kill()
+        await self.process.communicate()        #until its pipes are closed too
+
+    async def call(self, opcode, payload, rng, states, deadline, name):
+        """Sends a request and awaits its reply, as player_process.call
+
+        Args:
+            states(game_states) : global random states of the game, sent and updated from the reply
+        """
+        request = pack_rng(rng) + states.packed + payload
+        try:
+            status, data = await asyncio.wait_for(self.exchange(frame.pack(len(request), opcode) + request),
+                                                  None if deadline is None else max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            await self.kill()
+            raise player_timeout(name + " ran past its deadline")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.kill()
+            raise player_process_error(name + ": the player process died")
+        if status == ERROR:
+            raise player_process_error(name + ": " + data.decode("utf-8", "replace"))
+        offset = unpack_rng(data, 0, rng)
+        states.packed = data[offset:offset + global_states_size]
+        return data, offset + global_states_size
+
+    async def exchange(self, request):
+        self.process.stdin.write(request)
+        await self.process.stdin.drain()
+        length, status = frame.unpack(await self.process.stdout.readexactly(frame.size))
+        return status, await self.process.stdout.readexactly(length)
+
+
+class async_remote_player():
+    """remote_player for asyncio: the same calls, awaited, drawing from the random states of its game
+
+    Make it with await async_remote_player(...).make(index, instances).
+
+    Args:
+        worker(async_player_process) : process hosting it for this game
+        states(game_states) : global random states of the game
+        others : as remote_player
+    """
+    def __init__(self, worker, num_toppings, rng, states, budget, num_pizzas, toppings_pp):
+        self.worker = worker
+        self.num_toppings = num_toppings
+        self.rng = rng
+        self.states = states
+        self.budget = budget
+        self.shop_size = (num_pizzas, toppings_pp)
+        self.deadline = None        #of choose_toppings and choose_and_cut, set by the first of them
+
+    async def make(self, index, instances):
+        self.worker.pizzas = None
+        await self.worker.call(NEW, new_request.pack(index, self.num_toppings, *self.shop_size, instances), self.rng, self.states,
+                               None, "player " + str(index))     #not timed, as remote_player
+        return self
+
+    async def customer_gen(self, num_cust, rng=None):
+        data, offset = await self.worker.call(GENERATE, generate_payload(num_cust, rng), self.rng, self.states, deadline_in(self.budget), "customer_gen")
+        return generated(data, offset, rng)
+
+    async def choose_toppings(self, preferences):
+        self.deadline = deadline_in(self.budget)
+        data, offset = await self.worker.call(TOPPINGS, toppings_payload(preferences), self.rng, self.states, self.deadline, "choose_toppings")
+        return unpack_array(data, offset)[0]
+
+    async def choose_and_cut(self, pizzas, remaining_pizza_ids, customer_amounts, deadline=None):
+        if self.deadline is None:
+            self.deadline = deadline_in(self.budget)
+        payload = cut_payload(self.worker, pizzas, remaining_pizza_ids, customer_amounts, search_end(self.deadline, deadline))
+        data, offset = await self.worker.call(CUT, payload, self.rng, self.states, self.deadline, "choose_and_cut")
+        self.worker.pizzas = pizzas
+        return cut_of(data, offset)
+
+
+class player_pool():
+    """Warm player processes, reused from game to game
+
+    Args:
+        games_per_process(int) : games a process serves before it is replaced, which bounds what players leak
+    """
+    def __init__(self, games_per_process=None):
+        self.games_per_process = int(constants.player_process_games if games_per_process is None else games_per_process)
+        self.idle = []
+
+    def acquire(self):
+        while self.idle:
+            worker = self.idle.pop()
+            if worker.alive():
+                return worker
+            worker.kill()
+        return player_process()
+
+    def release(self, worker):
+        worker.games = worker.games + 1
+        if worker.alive() and worker.games < self.games_per_process:
+            self.idle.append(worker)
+        else:
+            worker.kill()
+
+    def close(self):
+        for worker in self.idle:
+            worker.kill()
+        self.idle = []
+
+
+pools = {}
+
+
+def pool_for():
+    #One pool per process, shared by all the games this process plays
+    if os.getpid() not in pools:
+        pools[os.getpid()] = player_pool()
+    return pools[os.getpid()]
+
+
+def write_all(fd, data):
+    data = memoryview(data)
+    while len(data):
+        data = data[os.write(fd, data):]
+
+
+def read_exactly(fd, size):
+    chunks = []
+    while size:
+        chunk = os.read(fd, size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size = size - len(chunk)
+    return b"".join(chunks)
+
+
+def serve(requests, responses):
+    #the player process: answers requests until the simulator closes its pipe
+    from game import player_classes, anytime_cut
+    rng = np.random.default_rng()       #every request brings its state, the players keep this object like they keep the game rng
+    instance = None
+    pizzas = None
+    global_states = None        #as last sent, what this process holds
+    while True:
+        header = read_exactly(requests, frame.size)
+        if header is None:
+            return
+        length, opcode = frame.unpack(header)
+        data = read_exactly(requests, length)
+        try:
+            offset, global_states = unpack_states(data, 0, rng, global_states)
+            if opcode == NEW:
+                index, num_toppings, num_pizzas, toppings_pp, instances = new_request.unpack_from(data, offset)
+                made = [player_classes[index](num_toppings, rng, num_pizzas, toppings_pp) for number in range(instances)]
+                instance, pizzas = made[0], None
+                reply = b""
+            elif opcode == GENERATE:
+                num_cust = struct.unpack_from("<i", data, offset)[0]
+                generator_rng = np.random.default_rng()
+                unpack_rng(data, offset + 4, generator_rng)
+                preferences = instance.customer_gen(num_cust, generator_rng)
+                reply = struct.pack("<B", isinstance(preferences, list)) + pack_array(preferences) + pack_rng(generator_rng)
+            elif opcode == TOPPINGS:
+                listed = data[offset]
+                preferences, offset = unpack_array(data, offset + 1)
+                reply = pack_array(instance.choose_toppings(preferences.tolist() if listed else preferences))
+            elif opcode == CUT:
+                seconds, fresh = struct.unpack_from("<dB", data, offset)
+                deadline = time.monotonic() + seconds if seconds != math.inf else None
+                if fresh:
+                    pizzas, offset = unpack_array(data, offset + 9)
+                else:
+                    offset = offset + 9
+                remaining, offset = unpack_array(data, offset, "<i8")
+                customer_amounts, offset = unpack_array(data, offset)
+                pizza_id, center, theta = anytime_cut(instance, (pizzas, remaining.tolist(), customer_amounts), deadline)
+                reply = cut_reply.pack(int(pizza_id), float(center[0]), float(center[1]), float(theta))
+            else:
+                raise ValueError("unknown opcode " + str(opcode))
+            global_states = pack_global_states()
+            reply = pack_rng(rng) + global_states + reply
+            status = OK
+        except Exception as error:
+            reply = (type(error).__name__ + ": " + str(error)).encode("utf-8")
+            status = ERROR
+            global_states = None        #the call may have drawn before raising
+        write_all(responses, frame.pack(len(reply), status) + reply)
+
+
+if __name__ == '__main__':
+    #the protocol keeps the real stdout, what the players print goes to /dev/null
+    responses = os.dup(1)
+    os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+    sys.stdout = open(os.devnull, "w")
+    serve(0, responses)
@@ -5,10 +5,18 @@ import constants
 from utils import pizza_calculations
 
 class Player:
-    def __init__(self, num_toppings, rng: np.random.Generator) -> None:
-        """Initialise the player"""
+    def __init__(self, num_toppings, rng: np.random.Generator, num_pizzas=None, toppings_pp=None) -> None:
+        """Initialise the player
+
+        Args:
+            num_toppings(int) : topping types of the game
+            rng(Generator) : rng of the game
+            num_pizzas, toppings_pp(int) : shop size of the game, the constants.py defaults when None
+        """
         self.rng = rng
         self.num_toppings = num_toppings
+        self.num_pizzas = constants.number_of_initial_pizzas if num_pizzas is None else num_pizzas
+        self.toppings_pp = constants.number_of_toppings_pp if toppings_pp is None else toppings_pp
 
     def customer_gen(self, num_cust, rng = None):
         
@@ -63,20 +71,12 @@ class Player:
         """
         
         x_coords = [np.sin(np.pi/2)]
-        pizzas = np.zeros((10, 24, 3))
-        for j in range(constants.number_of_initial_pizzas):
-            pizza_indiv = np.zeros((24,3))
-            i = 0
-            while i<24:
-                angle = self.rng.random()*2*np.pi
-                dist = self.rng.random()*6
-                x = dist*np.cos(angle)
-                y = dist*np.sin(angle)
-                clash_exists = pizza_calculations.clash_exists(x, y, pizza_indiv, i)
-                if not clash_exists:
-                    pizza_indiv[i] = [x, y, i%self.num_toppings + 1]
-                    i = i+1
-            pizza_indiv = np.array(pizza_indiv)
+        toppings_pp = self.toppings_pp
+        pizzas = np.zeros((self.num_pizzas, toppings_pp, 3))
+        for j in range(self.num_pizzas):
+            pizza_indiv = np.zeros((toppings_pp,3))
+            pizza_indiv[:, :2] = pizza_calculations.place_toppings(toppings_pp, self.rng)
+            pizza_indiv[:, 2] = np.arange(toppings_pp)%self.num_toppings + 1
             pizzas[j] = pizza_indiv
         return list(pizzas)
     
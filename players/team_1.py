@@ -2,7 +2,7 @@ from tokenize import String
 import numpy as np
 from typing import Tuple, List
 import constants
-from utils import pizza_calculations
+from utils import pizza_calculations, pizza_layouts
 import math
 import random
 
@@ -10,10 +10,11 @@ import random
 BUFFER = 0.001
 
 class Player:
-    def __init__(self, num_toppings, rng: np.random.Generator) -> None:
+    def __init__(self, num_toppings, rng: np.random.Generator, num_pizzas=None, toppings_pp=None) -> None:
         """Initialise the player"""
         self.rng = rng
         self.num_toppings = num_toppings
+        self.num_pizzas = constants.number_of_initial_pizzas if num_pizzas is None else num_pizzas
         self.multiplier=40	# Pizza radius = 6*multiplier units
         self.xCenter = 12*self.multiplier	# Center Point x of pizza
         self.yCenter = 10*self.multiplier	# Center Point y of pizza
@@ -368,7 +369,7 @@ class Player:
 
             # we can use the approach distribution here to decide how many of each approach we want to use
             # We have 2 algos for now
-            num_runs_per_approach = self.list_sum_to_total(10, 2)
+            num_runs_per_approach = self.list_sum_to_total(self.num_pizzas, 2)
             print(f'num_runs_per_approach: {num_runs_per_approach}')
             #
             pizzas = []
@@ -393,7 +394,7 @@ class Player:
                 pizzas.append(self.circle_topping_3_v2(preferences))
             for i in range(num_runs_per_approach[2]):
                 pizzas.append(self.lines_topping_3(preferences))'''
-            for i in range(10):
+            for i in range(self.num_pizzas):
                 pizzas.append(self.lines_topping_3(preferences))
             return pizzas
 
@@ -403,7 +404,7 @@ class Player:
             THEN, we can loop through them for each value in the distribution to generate 10 pizzas"""
 
             # For now, we have 2 approaches for 4 toppings. need to manually code for however many approaches we have
-            num_runs_per_approach = self.list_sum_to_total(10, 4)
+            num_runs_per_approach = self.list_sum_to_total(self.num_pizzas, 4)
             print(f'num_runs_per_approach: {num_runs_per_approach}')
 
             pizzas = []
@@ -435,36 +436,48 @@ class Player:
         maximumS = -1000
         maximumCut = [self.xCenter, self.yCenter, np.pi/6, remaining_pizza_ids[0]] #default cut
 
-        for pizza_id in remaining_pizza_ids:
-            pizza = pizzas[pizza_id]
-            for radius in range(0, 6): 
-                for x in range(-radius*5, radius*5):
-                    x =  x/5
-                    for ySign in range(-1, 2, 2):
-                        y = self.circleCoordinates(x, ySign, radius)
-                        cut = [x, y, np.pi/6, pizza_id]
-                        
-                        xCord = (self.xCenter + x*self.multiplier)
-                        yCord = (self.yCenter - y*self.multiplier)
-                        obtained_pref, slice_areas_toppings = self.calculator.ratio_calculator(pizza, [xCord, yCord, np.pi/6], self.num_toppings, self.multiplier, self.xCenter, self.yCenter)
-                        obtained_pref = np.array(obtained_pref)
-                        random_pref, temp = self.calculator.ratio_calculator(pizza, [self.xCenter, self.yCenter, self.rng.random()*2*np.pi], self.num_toppings, self.multiplier, self.xCenter, self.yCenter)
-                        random_pref = np.array(random_pref)
-                        required_pref = np.array(customer_amounts)
-                        uniform_pref = np.ones((2, self.num_toppings))*(12/self.num_toppings)
-                        b = np.round(np.absolute(required_pref - uniform_pref), 3)
-                        c = np.round(np.absolute(obtained_pref - required_pref), 3)
-                        u = np.round(np.absolute(random_pref - uniform_pref), 3)
-                        s = (b-c).sum()
-                        if s > maximumS:
-                            maximumS = s
-                            maximumCut = cut           
+        #identical layouts score identically, so search only the first pizza of every distinct layout, and only once per customer amounts
+        layouts = pizza_layouts.of(pizzas)
+        amounts_key = ("team_1 cut", np.asarray(customer_amounts, dtype=np.float64).tobytes())
+        for pizza_id in layouts.distinct(remaining_pizza_ids):
+            s, cut = layouts.cached(pizza_id, amounts_key, lambda: self.best_cut(pizzas[pizza_id], customer_amounts))
+            if s > maximumS:
+                maximumS = s
+                maximumCut = cut + [pizza_id]
         x  = maximumCut[0]
         y = maximumCut[1]
         theta = maximumCut[2]
         pizza_id = maximumCut[3]
         return  pizza_id, [x,y], theta
 
+    def best_cut(self, pizza, customer_amounts):
+        #best score and cut [x, y, theta] on one pizza layout
+        maximumS = -1000
+        maximumCut = None
+        for radius in range(0, 6): 
+            for x in range(-radius*5, radius*5):
+                x =  x/5
+                for ySign in range(-1, 2, 2):
+                    y = self.circleCoordinates(x, ySign, radius)
+                    cut = [x, y, np.pi/6]
+                    
+                    xCord = (self.xCenter + x*self.multiplier)
+                    yCord = (self.yCenter - y*self.multiplier)
+                    obtained_pref, slice_areas_toppings = self.calculator.ratio_calculator(pizza, [xCord, yCord, np.pi/6], self.num_toppings, self.multiplier, self.xCenter, self.yCenter)
+                    obtained_pref = np.array(obtained_pref)
+                    random_pref, temp = self.calculator.compute_ratios(pizza, [self.xCenter, self.yCenter, self.rng.random()*2*np.pi], self.num_toppings, self.multiplier, self.xCenter, self.yCenter)     #a new random cut every time, not worth caching
+                    random_pref = np.array(random_pref)
+                    required_pref = np.array(customer_amounts)
+                    uniform_pref = np.ones((2, self.num_toppings))*(12/self.num_toppings)
+                    b = np.round(np.absolute(required_pref - uniform_pref), 3)
+                    c = np.round(np.absolute(obtained_pref - required_pref), 3)
+                    u = np.round(np.absolute(random_pref - uniform_pref), 3)
+                    s = (b-c).sum()
+                    if s > maximumS:
+                        maximumS = s
+                        maximumCut = cut           
+        return maximumS, maximumCut
+
     #this function will take in an x, sign of y, radius and return the y coordinate from the equation of a circle
     def circleCoordinates(self, x, ySign, radius):
         y = ySign*(math.sqrt((radius**2) - (x**2)))
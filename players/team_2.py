@@ -11,10 +11,11 @@ sys.path.append('..')
 from utils import pizza_calculations
 
 class Player:
-    def __init__(self, num_toppings, rng: np.random.Generator) -> None:
+    def __init__(self, num_toppings, rng: np.random.Generator, num_pizzas=None, toppings_pp=None) -> None:
         """Initialise the player"""
         self.rng = rng
         self.num_toppings = num_toppings
+        self.num_pizzas = constants.number_of_initial_pizzas if num_pizzas is None else num_pizzas
         self.calculator = pizza_calculations()
         self.multiplier=40	# Pizza radius = 6*multiplier units
         self.x = 12*self.multiplier	# Center Point x of pizza
@@ -137,9 +138,9 @@ class Player:
                                 self.topping_4+=1
         #print("these are the topping stats", self.uniform_, self.topping_1, self.topping_2, self.topping_3, self.topping_4)
         x_coords = [np.sin(np.pi/2)]
-        pizzas = np.zeros((10, 24, 3))
+        pizzas = np.zeros((self.num_pizzas, 24, 3))
         type_of_topping = 0
-        for j in range(constants.number_of_initial_pizzas):
+        for j in range(self.num_pizzas):
             pizza_indiv = np.zeros((24,3))
             i = 0
             first_dist = 0
@@ -228,20 +229,11 @@ class Player:
         """
         
         x_coords = [np.sin(np.pi/2)]
-        pizzas = np.zeros((10, 24, 3))
-        for j in range(constants.number_of_initial_pizzas):
+        pizzas = np.zeros((self.num_pizzas, 24, 3))
+        for j in range(self.num_pizzas):
             pizza_indiv = np.zeros((24,3))
-            i = 0
-            while i<24:
-                angle = self.rng.random()*2*np.pi
-                dist = self.rng.random()*6
-                x = dist*np.cos(angle)
-                y = dist*np.sin(angle)
-                clash_exists = pizza_calculations.clash_exists(x, y, pizza_indiv, i)
-                if not clash_exists:
-                    pizza_indiv[i] = [x, y, i%self.num_toppings + 1]
-                    i = i+1
-            pizza_indiv = np.array(pizza_indiv)
+            pizza_indiv[:, :2] = pizza_calculations.place_toppings(24, self.rng)
+            pizza_indiv[:, 2] = np.arange(24)%self.num_toppings + 1
             pizzas[j] = pizza_indiv
         return list(pizzas)
     '''
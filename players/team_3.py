@@ -5,10 +5,11 @@ import constants
 from utils import pizza_calculations
 #our team code
 class Player:
-    def __init__(self, num_toppings, rng: np.random.Generator) -> None:
+    def __init__(self, num_toppings, rng: np.random.Generator, num_pizzas=None, toppings_pp=None) -> None:
         """Initialise the player"""
         self.rng = rng
         self.num_toppings = num_toppings
+        self.num_pizzas = constants.number_of_initial_pizzas if num_pizzas is None else num_pizzas
         self.multiplier=40
         self.x = 12*self.multiplier	# Center Point x of pizza
         self.y = 10*self.multiplier	# Center Point y of pizza
@@ -69,8 +70,8 @@ class Player:
             pizzas(list) : List of size [10,24,3], where 10 is the pizza id, 24 is the topping id, innermost list of size 3 is [x coordinate of topping center, y coordinate of topping center, topping number of topping(1/2/3/4) (Note that it starts from 1, not 0)]
         """
         x_coords = [np.sin(np.pi/2)]
-        pizzas = np.zeros((10, 24, 3))
-        for j in range(10):  # Assuming we want to make 10 pizzas
+        pizzas = np.zeros((self.num_pizzas, 24, 3))
+        for j in range(self.num_pizzas):  # One pizza per customer
             pizza_indiv = np.zeros((24, 3))
             # Define the radius of the circle where the toppings will be placed
             inner_circle_radius = 3  # Radius for toppings 1 and 2
@@ -119,8 +120,8 @@ class Player:
             pizzas[j] = pizza_indiv
         return list(pizzas)
         """
-        pizzas = np.zeros((10, 24, 3))
-        for j in range(constants.number_of_initial_pizzas):
+        pizzas = np.zeros((self.num_pizzas, 24, 3))
+        for j in range(self.num_pizzas):
             pizza_indiv = np.zeros((24,3))
             i = 0
             while i<24:
@@ -149,6 +150,16 @@ class Player:
         Returns:
             Tuple[int, center, first cut angle]: Return the pizza id you choose, the center of the cut in format [x_coord, y_coord] where both are in inches relative of pizza center of radius 6, the angle of the first cut in radians. 
         """
+        for cut in self.choose_and_cut_anytime(pizzas, remaining_pizza_ids, customer_amounts):
+            pass
+        return cut
+
+    def choose_and_cut_anytime(self, pizzas, remaining_pizza_ids, customer_amounts):
+        """choose_and_cut as an anytime search, the simulator stops it when the customer's time is up
+
+        Yields:
+            Tuple[int, center, first cut angle]: The best cut so far, after every cut tried: the pizza id you choose, the center of the cut in format [x_coord, y_coord] where both are in inches relative of pizza center of radius 6, the angle of the first cut in radians. The simulator takes the latest one when the customer's time is up.
+        """
         final_id = remaining_pizza_ids[0]
         final_center = [0,0]
         final_angle = 0
@@ -162,6 +173,7 @@ class Player:
             if score > max_score:
                 final_center = final_center
                 final_angle = test_angle
+            yield final_id, final_center, final_angle
             test_angle += .01
         
         radius = 5.5
@@ -178,9 +190,8 @@ class Player:
                 if score > max_score:
                     final_center = test_center
                     final_angle = test_angle
+                yield final_id, final_center, final_angle
                 test_angle += .04
-            
-        return final_id, final_center, final_angle
 
     def get_score(self, pizzas, ids, preferences, cuts):
         B, C, U, obtained_preferences, center_offsets, slice_amount_metric = self.calculator.final_score(pizzas, ids, preferences, cuts, self.num_toppings, self.multiplier, self.x, self.y)
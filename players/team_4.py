@@ -6,10 +6,11 @@ from utils import pizza_calculations
 from itertools import chain
 
 class Player:
-    def __init__(self, num_toppings, rng: np.random.Generator) -> None:
+    def __init__(self, num_toppings, rng: np.random.Generator, num_pizzas=None, toppings_pp=None) -> None:
         """Initialise the player"""
         self.rng = rng
         self.num_toppings = num_toppings
+        self.num_pizzas = constants.number_of_initial_pizzas if num_pizzas is None else num_pizzas
 
     # def customer_gen(self, num_cust, rng = None):
         
@@ -84,9 +85,9 @@ class Player:
         return preferences_total
 
     def toppings_2(self):
-        pizzas = np.zeros((10, 24, 3))
+        pizzas = np.zeros((self.num_pizzas, 24, 3))
 
-        for j in range(constants.number_of_initial_pizzas):
+        for j in range(self.num_pizzas):
                 pizza_indiv = np.zeros((24,3))
                 for i in range(24):
                     angle = (i * np.pi / 12) + np.pi / 24
@@ -104,8 +105,8 @@ class Player:
         corr = np.corrcoef(arr, rowvar=False)
         idx = np.argsort(corr)
 
-        pizzas = np.zeros((10, 24, 3))
-        for j in range(constants.number_of_initial_pizzas):
+        pizzas = np.zeros((self.num_pizzas, 24, 3))
+        for j in range(self.num_pizzas):
                 pizza_indiv = np.zeros((24,3))
                 for i, t in enumerate(reversed(list(idx[0]))):
                     if not i:
@@ -153,19 +154,11 @@ class Player:
         if self.num_toppings == 4:
             return self.toppings_4(pref_opt)
         else:
-            for j in range(constants.number_of_initial_pizzas):
+            pizzas = np.zeros((self.num_pizzas, 24, 3))
+            for j in range(self.num_pizzas):
                         pizza_indiv = np.zeros((24,3))
-                        i = 0
-                        while i<24:
-                            angle = self.rng.random()*2*np.pi
-                            dist = self.rng.random()*6
-                            x = dist*np.cos(angle)
-                            y = dist*np.sin(angle)
-                            clash_exists = pizza_calculations.clash_exists(x, y, pizza_indiv, i)
-                            if not clash_exists:
-                                pizza_indiv[i] = [x, y, i%self.num_toppings + 1]
-                                i = i+1
-                        pizza_indiv = np.array(pizza_indiv)
+                        pizza_indiv[:, :2] = pizza_calculations.place_toppings(24, self.rng)
+                        pizza_indiv[:, 2] = np.arange(24)%self.num_toppings + 1
                         pizzas[j] = pizza_indiv
 
         return list(pizzas)
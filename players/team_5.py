@@ -10,10 +10,11 @@ from scipy.optimize import shgo, direct, dual_annealing, differential_evolution,
 
 
 class Player:
-    def __init__(self, num_toppings, rng: np.random.Generator) -> None:
+    def __init__(self, num_toppings, rng: np.random.Generator, num_pizzas=None, toppings_pp=None) -> None:
         """Initialise the player"""
         self.rng = rng
         self.num_toppings = num_toppings
+        self.num_pizzas = constants.number_of_initial_pizzas if num_pizzas is None else num_pizzas
         self.BUFFER = 0.001
         self.N4_RADIUS_BUFFER = 0.4  # TODO: Make min radius calculation more sophisticated so this isn't needed
         self.NUM_BRUTE_SAMPLES = 100
@@ -52,20 +53,11 @@ class Player:
 
     def _get_topping_default(self, preferences):
         x_coords = [np.sin(pi/2)]
-        pizzas = np.zeros((10, 24, 3))
-        for j in range(constants.number_of_initial_pizzas):
+        pizzas = np.zeros((self.num_pizzas, 24, 3))
+        for j in range(self.num_pizzas):
             pizza_indiv = np.zeros((24,3))
-            i = 0
-            while i<24:
-                angle = self.rng.random()*2*pi
-                dist = self.rng.random()*6
-                x = dist*np.cos(angle)
-                y = dist*np.sin(angle)
-                clash_exists = pizza_calculations.clash_exists(x, y, pizza_indiv, i)
-                if not clash_exists:
-                    pizza_indiv[i] = [x, y, i%self.num_toppings + 1]
-                    i = i+1
-            pizza_indiv = np.array(pizza_indiv)
+            pizza_indiv[:, :2] = pizza_calculations.place_toppings(24, self.rng)
+            pizza_indiv[:, 2] = np.arange(24)%self.num_toppings + 1
             pizzas[j] = pizza_indiv
         print(pizzas)
         return list(pizzas)
@@ -110,7 +102,7 @@ class Player:
             return inner + outer + arc
         perms = list(permutations([1,2,3,4]))
         # return [helper(perm) for perm in perms[0:10]]
-        return [helper([1,2,3,4]) for perm in range(10)]  # TODO: Use permuted pizzas
+        return [helper([1,2,3,4]) for perm in range(self.num_pizzas)]  # TODO: Use permuted pizzas
 
     def choose_toppings(self, preferences):
         """Function in which we choose position of toppings
@@ -0,0 +1,131 @@
+import os
+import time
+import cProfile
+import pstats
+import tracemalloc
+import constants as constants
+
+
+class profiled_call():
+    """Profiles one player call, used as a context manager
+
+    tracemalloc only runs for the duration of the call, so the peak it reports and the allocations it
+    finds still alive afterwards belong to the player code alone. When something else is already tracing
+    it is left running, the peak is then counted from what was traced on entry and the allocations
+    include those made before the call.
+    """
+    def __init__(self, profile, kind, allocations):
+        self.profile = profile
+        self.kind = kind
+        self.allocations = allocations
+
+    def __enter__(self):
+        self.started = self.allocations and not tracemalloc.is_tracing()
+        self.traced = 0
+        if self.started:
+            tracemalloc.start()
+        elif self.allocations:
+            self.traced = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        self.profile.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profile.profiler.disable()
+        wall = time.perf_counter() - self.start
+        peak, snapshot = 0, None
+        if self.allocations:
+            peak = max(tracemalloc.get_traced_memory()[1] - self.traced, 0)
+            snapshot = tracemalloc.take_snapshot()
+            if self.started:
+                tracemalloc.stop()
+        self.profile.record(self.kind, wall, peak, snapshot)
+        return False
+
+
+class player_profile():
+    """cProfile statistics and allocation sites of one player, accumulated over all its calls"""
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.kinds = {}     #call kind -> {"calls", "wall", "peak_max", "peak_total"}
+        self.sites = {}     #(file, line) -> [bytes, blocks] still allocated when a call returned
+        self.games = 0
+
+    def record(self, kind, wall, peak, snapshot):
+        totals = self.kinds.setdefault(kind, {"calls": 0, "wall": 0.0, "peak_max": 0, "peak_total": 0})
+        totals["calls"] = totals["calls"] + 1
+        totals["wall"] = totals["wall"] + wall
+        totals["peak_max"] = max(totals["peak_max"], peak)
+        totals["peak_total"] = totals["peak_total"] + peak
+        if snapshot is None:
+            return
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+        for statistic in snapshot.statistics("lineno"):
+            frame = statistic.traceback[0]
+            site = self.sites.setdefault((frame.filename, frame.lineno), [0, 0])
+            site[0] = site[0] + statistic.size
+            site[1] = site[1] + statistic.count
+
+
+def megabytes(size):
+    return f"{size/2**20:.2f} MB"
+
+
+class player_profiler():
+    """Profiles the player calls (customer_gen, choose_toppings, choose_and_cut) of every game
+
+    For each player it writes, to directory:
+        player_<n>.prof : the cProfile statistics (pstats format) of all its calls so far
+        player_<n>.txt : per call kind totals and peaks, then functions ranked by cumulative time
+                         and allocation sites ranked by bytes still held when the calls returned
+
+    Reports are rewritten after every game, so over a tournament they aggregate all the seeds played.
+
+    Args:
+        directory(str) : created if missing
+        top(int) : functions and allocation sites listed in the text reports
+        allocations(bool) : also trace allocations, which slows player code down several times
+    """
+    def __init__(self, directory, top=30, allocations=None):
+        self.directory = directory
+        self.top = top
+        self.allocations = constants.profile_allocations if allocations is None else allocations
+        self.profiles = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def call(self, player, kind):
+        return profiled_call(self.profiles.setdefault(player, player_profile()), kind, self.allocations)
+
+    def game_finished(self, players):
+        for player in set(players):
+            if player in self.profiles:
+                self.profiles[player].games = self.profiles[player].games + 1
+
+    def write(self):
+        for player, profile in self.profiles.items():
+            profile.profiler.dump_stats(os.path.join(self.directory, "player_" + str(player) + ".prof"))
+            with open(os.path.join(self.directory, "player_" + str(player) + ".txt"), "w") as f:
+                f.write("Player " + str(player) + " profile over " + str(profile.games) + " games\n\n")
+                for kind, totals in profile.kinds.items():
+                    line = f"{kind} : {totals['calls']} calls, {totals['wall']:.3f}s total, {totals['wall']/totals['calls']:.4f}s mean"
+                    if self.allocations:
+                        line = line + f", peak allocation {megabytes(totals['peak_max'])} max, {megabytes(totals['peak_total']/totals['calls'])} mean"
+                    f.write(line + "\n")
+                f.write("\nFunctions by cumulative time" + (" (times include tracemalloc overhead)" if self.allocations else "") + ":\n")
+                pstats.Stats(profile.profiler, stream=f).strip_dirs().sort_stats("cumulative").print_stats(self.top)
+                if not self.allocations:
+                    continue
+                f.write("Allocation sites by bytes still held when the calls returned (summed over calls):\n")
+                sites = sorted(profile.sites.items(), key=lambda site: site[1][0], reverse=True)[:self.top]
+                for (filename, lineno), (size, count) in sites:
+                    f.write(f"  {megabytes(size):>12} in {count:>8} blocks  {os.path.relpath(filename)}:{lineno}\n")
+
+
+profilers = {}
+
+
+def profiler_for(directory):
+    #One profiler per report directory and process, shared by all the games this process plays
+    if directory not in profilers:
+        profilers[directory] = player_profiler(directory)
+    return profilers[directory]
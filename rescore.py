@@ -0,0 +1,166 @@
+import time
+import argparse
+import multiprocessing
+import numpy as np
+from utils import pizza_calculations
+from journal import read_journal
+from shared_state import shared_arena, attach
+
+#Bulk re-scoring of journaled games: B, C, U, S, SliceMetric and CenterOffset of every customer, recomputed from the
+#journal with the batched kernels of pizza_calculations and no player code. Customers of all games are scored together,
+#in chunks spread over worker processes.
+
+score_seed = 9      #seed of the pizza_calculations rng drawing the random U cuts, every game gets a fresh calculator
+
+
+def score_customers(chunk):
+    """final_score for a batch of customers
+
+    Args:
+        chunk(tuple) : pizzas [N, toppings, 3], cuts [N, 3] (screen units), preferences [N, 2, num_toppings],
+                       random U cut angles [N], num_toppings, multiplier, x, y
+    Returns:
+        B, C, U(array) : [N, 2, num_toppings]
+        obtained(array) : [N, 2, num_toppings] obtained preferences
+        center_offsets, slice_metrics(array) : [N]
+    """
+    pizzas, cuts, preferences, random_thetas, num_toppings, multiplier, x, y = chunk
+    centers_x = (cuts[:, 0] - x)/multiplier
+    centers_y = -(cuts[:, 1] - y)/multiplier
+    obtained, slice_amounts = pizza_calculations.batch_ratios(pizzas, centers_x, centers_y, cuts[:, 2], num_toppings)
+    zeros = np.zeros(len(pizzas))
+    random_pref, unused = pizza_calculations.batch_ratios(pizzas, zeros, -zeros, random_thetas, num_toppings)
+    uniform = pizzas.shape[1]/2/num_toppings
+    B = np.round(np.absolute(preferences - uniform), 3)
+    C = np.round(np.absolute(obtained - preferences), 3)
+    U = np.round(np.absolute(random_pref - uniform), 3)
+    center_offsets = np.sqrt(((cuts[:, 0] - x)/multiplier)**2 + ((cuts[:, 1] - y)/multiplier)**2)
+    slice_areas = pizza_calculations.batch_slice_areas(centers_x, centers_y, cuts[:, 2])
+    wanted_amounts = np.empty_like(slice_amounts)
+    wanted_amounts[:, 0::2] = preferences[:, 1][:, None, :]*slice_areas[:, 0::2, None]/np.sum(slice_areas[:, 0::2], axis=1)[:, None, None]
+    wanted_amounts[:, 1::2] = preferences[:, 0][:, None, :]*slice_areas[:, 1::2, None]/np.sum(slice_areas[:, 1::2], axis=1)[:, None, None]
+    slice_metrics = np.sum(np.absolute(wanted_amounts - slice_amounts), axis=(1, 2))
+    return B, C, U, np.round(obtained, 3), center_offsets, slice_metrics
+
+
+def score_shared(task):
+    #score_customers on a range of a group the worker views in shared memory
+    handle, start, end, num_toppings, multiplier, x, y = task
+    arrays = attach(handle)
+    return score_customers((arrays["pizzas"][start:end], arrays["cuts"][start:end], arrays["preferences"][start:end], arrays["thetas"][start:end], num_toppings, multiplier, x, y))
+
+
+def customer_groups(games):
+    #Customers of all games flattened and grouped by shape (topping types, toppings per pizza, screen geometry)
+    groups = {}
+    for game_id, game in enumerate(games):
+        choices = np.asarray(game["pizza_choice_order"], dtype=np.int64)
+        if len(choices) != len(game["preferences"]):
+            continue        #game stopped before serving everyone, final_score was never computed for it
+        key = (game["num_toppings"], game["pizzas"].shape[1], game["multiplier"], game["x"], game["y"])
+        group = groups.setdefault(key, {"games": [], "pizzas": [], "cuts": [], "preferences": [], "thetas": []})
+        group["games"].append(np.full(len(choices), game_id))
+        group["pizzas"].append(game["pizzas"][choices])
+        group["cuts"].append(game["cuts"][choices])
+        group["preferences"].append(game["preferences"])
+        group["thetas"].append(np.random.default_rng(score_seed).random(len(choices))*2*np.pi)
+    for key, group in groups.items():
+        yield key, np.concatenate(group.pop("games")), {name: np.concatenate(values) for name, values in group.items()}
+
+
+def chunk_of(group, start, end):
+    #score_customers arguments for customers start:end of a group
+    (num_toppings, toppings_pp, multiplier, x, y), game_ids, arrays = group
+    return (arrays["pizzas"][start:end], arrays["cuts"][start:end], arrays["preferences"][start:end], arrays["thetas"][start:end], num_toppings, multiplier, x, y)
+
+
+def rescore(games, processes=1, chunk_size=20000):
+    """Scores of every customer of journaled games
+
+    Args:
+        games(list) : games as read_journal returns them
+        processes(int) : worker processes
+        chunk_size(int) : customers scored per batch
+    Returns:
+        scores(dict) : per customer arrays game, customer (1 based), U, B, C, S, SliceMetric, CenterOffset
+    """
+    groups = list(customer_groups(games))
+    batches = [(group, start) for group in groups for start in range(0, len(group[1]), chunk_size)]
+    if processes > 1 and len(batches) > 1:
+        #every group goes to shared memory once, a batch sent to a worker is a handle and a range
+        with shared_arena() as arena, multiprocessing.Pool(processes) as pool:
+            handles = {id(group): arena.put(group[2]) for group in groups}
+            scored = pool.map(score_shared, [(handles[id(group)], start, start + chunk_size) + chunk_of(group, 0, 0)[4:] for group, start in batches])
+    else:
+        scored = [score_customers(chunk_of(group, start, start + chunk_size)) for group, start in batches]
+    columns = {"game": [], "U": [], "B": [], "C": [], "S": [], "SliceMetric": [], "CenterOffset": []}
+    for (group, start), (B, C, U, obtained, center_offsets, slice_metrics) in zip(batches, scored):
+        columns["game"].append(group[1][start:start + chunk_size])
+        columns["U"].append(U.sum(axis=(1, 2)))
+        columns["B"].append(B.sum(axis=(1, 2)))
+        columns["C"].append(C.sum(axis=(1, 2)))
+        columns["S"].append((B - C).sum(axis=(1, 2)))
+        columns["SliceMetric"].append(slice_metrics)
+        columns["CenterOffset"].append(center_offsets)
+    scores = {name: np.concatenate(values) if values else np.zeros(0) for name, values in columns.items()}
+    order = np.argsort(scores["game"], kind="stable")
+    scores = {name: values[order] for name, values in scores.items()}
+    scores["game"] = scores["game"].astype(np.int64)
+    starts = np.searchsorted(scores["game"], scores["game"])
+    scores["customer"] = np.arange(len(scores["game"])) - starts + 1
+    return scores
+
+
+def game_totals(games, scores):
+    #per game totals of every metric, NaN for games that were not scored
+    totals = {name: np.full(len(games), np.nan) for name in ["U", "B", "C", "S", "SliceMetric", "CenterOffset"]}
+    scored = np.unique(scores["game"])
+    for name in totals:
+        totals[name][scored] = np.bincount(scores["game"], weights=scores[name], minlength=len(games))[scored]
+    return totals
+
+
+def check(games, totals, number):
+    #final_score on the first games, the way the simulator scores them, against the bulk totals
+    largest = 0.0
+    for game_id, game in enumerate(games[:number]):
+        if np.isnan(totals["U"][game_id]):
+            continue
+        B, C, U, obtained, center_offsets, slice_metrics = pizza_calculations().final_score(game["pizzas"], list(game["pizza_choice_order"]), game["preferences"], game["cuts"], game["num_toppings"], game["multiplier"], game["x"], game["y"])
+        expected = {"U": sum(u.sum() for u in U), "B": sum(b.sum() for b in B), "C": sum(c.sum() for c in C), "S": sum((b - c).sum() for b, c in zip(B, C)),
+                    "SliceMetric": np.sum(slice_metrics), "CenterOffset": np.sum(center_offsets)}
+        largest = max(largest, max(abs(expected[name] - totals[name][game_id]) for name in expected))
+    return largest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("journal", help="Decision journal written with --journal")
+    parser.add_argument("--processes", "-j", default=multiprocessing.cpu_count(), help="Worker processes")
+    parser.add_argument("--chunk", "-ch", default=20000, help="Customers scored per batch")
+    parser.add_argument("--out", "-o", default=None, help="npz file receiving per customer and per game scores")
+    parser.add_argument("--check", "-c", default=0, help="Also score this many games with final_score and report the largest difference")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    games = read_journal(args.journal)
+    loaded = time.perf_counter()
+    scores = rescore(games, int(args.processes), int(args.chunk))
+    totals = game_totals(games, scores)
+    scored = time.perf_counter()
+    print(f"{len(games)} games, {len(scores['game'])} customers : read in {loaded - start:.2f}s, scored in {scored - loaded:.2f}s")
+
+    players = np.array([game["player"] for game in games])
+    toppings = np.array([game["num_toppings"] for game in games])
+    for player in np.unique(players):
+        for num_toppings in np.unique(toppings[players == player]):
+            chosen = (players == player) & (toppings == num_toppings) & ~np.isnan(totals["S"])
+            means = ", ".join(f"{name} {np.mean(totals[name][chosen]):.3f}" for name in totals)
+            print(f"player {player} toppings {num_toppings} : {int(chosen.sum())} games, mean {means}")
+    if int(args.check):
+        print(f"Largest difference with final_score over {min(int(args.check), len(games))} games : {check(games, totals, int(args.check)):.3g}")
+    if args.out:
+        np.savez(args.out, **{"customer_" + name: values for name, values in scores.items()}, **{"game_" + name: values for name, values in totals.items()},
+                 game_player=players, game_num_toppings=toppings, game_generator=np.array([game["generator"] for game in games]),
+                 game_seed=np.array([game["seed"] for game in games]))
+        print("Scores written to " + args.out)
@@ -0,0 +1,201 @@
+import json
+import argparse
+import numpy as np
+
+#Structured game results. A game is kept as one record (a dict), persisted as one JSON line per game
+#at the chosen level, and the human-readable summary log is rendered from the record when asked for.
+
+levels = ["none", "summary", "full"]
+
+
+def game_record(pizzas, pizza_choice_order, preferences, cuts, scores, multiplier, x, y, run=None, cache=None):
+    """Everything there is to know about a finished game
+
+    Args:
+        pizzas(array) : [pizzas, toppings, 3] toppings of every pizza (pizza units)
+        pizza_choice_order(list) : pizza served to every customer
+        preferences(list) : [2, num_toppings] preference of every customer
+        cuts(array) : [pizzas, 3] cuts in screen units
+        scores(tuple) : what pizza_calculations.final_score returns
+        multiplier, x, y : screen scale and pizza center the cuts are expressed with
+        run(dict) : players, seeds and sizes of the game
+        cache(dict) : score cache statistics
+    Returns:
+        record(dict) : run, customers (in serving order), totals and cache. Arrays stay numpy arrays.
+    """
+    B, C, U, obtained_preferences, center_offsets, slice_amount_metrics = scores
+    customers = []
+    for i in range(len(pizza_choice_order)):
+        pizza_id = int(pizza_choice_order[i])
+        customers.append({
+            "customer": i + 1,
+            "pizza_id": pizza_id,
+            "cut": [(cuts[pizza_id][0] - x)/multiplier, (cuts[pizza_id][1] - y)/multiplier, cuts[pizza_id][2]],
+            "center_offset": center_offsets[i],
+            "toppings": np.asarray(pizzas[pizza_id]),
+            "U": U[i],
+            "B": B[i],
+            "C": C[i],
+            "desired": np.asarray(preferences[i]),
+            "obtained": obtained_preferences[i],
+            "slice_metric": slice_amount_metrics[i],
+        })
+    totals = {"U": sum(U[i].sum() for i in range(len(customers))), "B": sum(B[i].sum() for i in range(len(customers))),
+              "C": sum(C[i].sum() for i in range(len(customers))), "S": sum((B[i] - C[i]).sum() for i in range(len(customers))),
+              "SliceMetric": np.sum(slice_amount_metrics), "CenterOffset": np.sum(center_offsets)}
+    return {"run": run or {}, "customers": customers, "totals": totals, "cache": cache}
+
+
+def customer_scores(customer):
+    #U, B, C and S of one customer as numbers, the way the console and the tournament results show them
+    U, B, C = np.asarray(customer["U"]), np.asarray(customer["B"]), np.asarray(customer["C"])
+    return {"U": np.round(U.sum(), 2), "B": np.round(B.sum(), 2), "C": np.round(C.sum(), 2), "S": np.round((np.sum(B, axis = 1) - np.sum(C, axis = 1)).sum(), 2)}
+
+
+def at_level(record, level):
+    """JSON-ready copy of a record
+
+    summary keeps the run, the totals and, per customer, the pizza, cut and score sums.
+    full also keeps toppings, preferences and the per topping U, B, C matrices.
+    """
+    if level == "full":
+        customers = [{key: to_plain(value) for key, value in customer.items()} for customer in record["customers"]]
+    else:
+        customers = []
+        for customer in record["customers"]:
+            U, B, C = np.asarray(customer["U"]), np.asarray(customer["B"]), np.asarray(customer["C"])
+            customers.append({"customer": customer["customer"], "pizza_id": customer["pizza_id"], "cut": to_plain(customer["cut"]),
+                              "U": float(U.sum()), "B": float(B.sum()), "C": float(C.sum()), "S": float((B - C).sum()),
+                              "slice_metric": float(customer["slice_metric"]), "center_offset": float(customer["center_offset"])})
+    return {"level": level, "run": to_plain(record["run"]), "customers": customers, "totals": to_plain(record["totals"]), "cache": to_plain(record["cache"])}
+
+
+def to_plain(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def render_text(record):
+    """The summary log of a game (what summary_log_*.txt holds), from a record or a loaded JSON line"""
+    lines = []
+    for customer in record["customers"]:
+        if "toppings" not in customer:
+            #summary level records only carry the score sums
+            lines.append("Customer " + str(customer["customer"]) + " : pizza " + str(customer["pizza_id"]) + ", cut at (" + str(customer["cut"][0]) + ", " + str(customer["cut"][1]) + ") and angle " + str(customer["cut"][2]) + "radians, U " + str(customer["U"]) + ", B " + str(customer["B"]) + ", C " + str(customer["C"]) + ", S " + str(customer["S"]) + ", slice metric " + str(customer["slice_metric"]) + ", center offset " + str(customer["center_offset"]))
+            continue
+        U, B, C = np.asarray(customer["U"]), np.asarray(customer["B"]), np.asarray(customer["C"])
+        lines.append("")
+        lines.append("")
+        lines.append("Customer " + str(customer["customer"]) + " :")
+        lines.append("Pizza " + str(customer["pizza_id"]))
+        lines.append("Cut at (" + str(customer["cut"][0]) + ", " + str(customer["cut"][1]) + ") and angle " + str(customer["cut"][2]) + "radians.")
+        lines.append("Center offset : " + str(customer["center_offset"]))
+        for topping in np.asarray(customer["toppings"]):
+            lines.append("Topping " + str(topping[2]) + " at (" + str(topping[0]) + "," + str(topping[1]) + ")")
+        lines.append("U : " + str(U))
+        lines.append("Total : " + str(U.sum()))
+        lines.append("B : " + str(B))
+        lines.append("Total : " + str(B.sum()))
+        lines.append("C : " + str(C))
+        lines.append("Total : " + str(C.sum()))
+        lines.append("S : " + str(B - C))
+        lines.append("Total : " + str((B - C).sum()))
+        lines.append("Desired Preferences : " + str(np.asarray(customer["desired"])))
+        lines.append("Obtained Preferences : " + str(np.asarray(customer["obtained"])))
+        lines.append("Slice by slice amount differences sum : " + str(customer["slice_metric"]))
+        lines.append("")
+        lines.append("")
+    lines.extend(total_lines(record))
+    lines.append("")
+    if record.get("cache"):
+        lines.append(cache_line(record["cache"]))
+    return "\n".join(lines) + "\n"
+
+
+def total_lines(record):
+    totals = record["totals"]
+    return ["Total Score U : " + str(totals["U"]), "Total score B : " + str(totals["B"]), "Total score C : " + str(totals["C"]),
+            "Total score S : " + str(totals["S"]), "Total Slice by slice metric : " + str(totals["SliceMetric"]), "Total center offsets : " + str(totals["CenterOffset"])]
+
+
+def cache_line(cache):
+    line = f"Score cache : {cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions, hit rate {cache['hit_rate']:.1%}"
+    if "store" in cache:
+        line = line + f", {cache['store']['hits']} served from {cache['store_path']}"
+    return line
+
+
+def render_console(record):
+    #The per customer lines and totals printed at the end of a single game
+    lines = []
+    for customer in record["customers"]:
+        scores = customer_scores(customer)
+        lines.append(f"Customer {str(customer['customer'])}, pizza {str(customer['pizza_id'])}, U = {str(scores['U'])}, B = {str(scores['B'])}, C = {str(scores['C'])}, S = {str(scores['S'])}, SliceMetric = {str(customer['slice_metric'])}, CenterOffset = {str(customer['center_offset'])}")
+    lines.extend(total_lines(record))
+    if record.get("cache"):
+        lines.append(cache_line(record["cache"]))
+    return "\n".join(lines)
+
+
+class result_writer():
+    """Appends game records, one JSON line per game written in a single call
+
+    Args:
+        path(str) : JSONL file shared by all games (a tournament log), or a name containing {game}
+                    to get one file per game (the game number is taken from the run, else counted)
+        level(str) : none, summary or full (see at_level)
+    """
+    def __init__(self, path, level="summary"):
+        if level not in levels:
+            raise ValueError("Unknown result level " + str(level) + ", use one of " + ", ".join(levels))
+        self.path = path
+        self.level = level
+        self.games = 0
+
+    def write(self, record):
+        if self.level == "none":
+            return
+        self.games = self.games + 1
+        path = self.path.format(game=record["run"].get("game", self.games)) if "{game}" in self.path else self.path
+        line = json.dumps(at_level(record, self.level), separators=(",", ":")) + "\n"
+        with open(path, "a") as f:
+            f.write(line)
+
+
+writers = {}
+
+
+def writer_for(path, level):
+    #One writer per log and process, so {game} numbering runs across all the games this process plays
+    if (path, level) not in writers:
+        writers[(path, level)] = result_writer(path, level)
+    return writers[(path, level)]
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("log", help="JSONL result log")
+    parser.add_argument("--game", "-n", default=None, help="Render only this game (1 based position in the log)")
+    parser.add_argument("--out", "-o", default=None, help="Write the text here instead of printing it")
+    args = parser.parse_args()
+    records = read_records(args.log)
+    if args.game is not None:
+        records = [records[int(args.game) - 1]]
+    text = "".join(render_text(record) for record in records)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text, end="")
@@ -0,0 +1,254 @@
+import os
+import time
+import queue
+import argparse
+import multiprocessing
+import numpy as np
+import results
+from game import Game, game_inputs
+from pizza_no_gui import no_gui
+from shared_state import shared_arena, attach
+from player_process import pool_for, player_timeout, seeded_globals
+
+#Tournament grid: every player x generator x topping count x seed index is one job. Jobs are ordered longest first
+#(from the latencies of games already in the store) and handed out one at a time, so with several workers the
+#slow players start early and the tournament does not end on one long straggler. With common inputs the jobs of a
+#cell stay together instead, so that its customers are held in memory only while it is played.
+
+default_seconds = 1.0       #expected game time of a player the store has never seen
+
+
+def parse_values(text):
+    """Integers of a grid axis
+
+    Args:
+        text(str) : comma separated values and lo-hi ranges, e.g. "0,2-4"
+    """
+    values = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            values.extend(range(int(low), int(high) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+
+def job_seeds(base_seeds, generator, num_toppings, seed_index):
+    #Seeds of a job, derived from the tournament seeds with a SeedSequence. They do not depend on the player, so every
+    #player meets the same customers in the same cell of the grid.
+    entropy = [int(base_seeds["seed"]), int(base_seeds["gen_100_seed"]), int(base_seeds["gen_10_seed"])]
+    seed, gen_100_seed, gen_10_seed = np.random.SeedSequence(entropy, spawn_key=(generator, num_toppings, seed_index)).generate_state(3)
+    return {"seed": int(seed), "gen_100_seed": int(gen_100_seed), "gen_10_seed": int(gen_10_seed)}
+
+
+def job_for(player, generator, num_toppings, seed_index, base_seeds):
+    return dict(player=player, generator=generator, num_toppings=num_toppings, seed_index=seed_index, **job_seeds(base_seeds, generator, num_toppings, seed_index))
+
+
+def grid_jobs(players, generators, toppings, seed_indices, base_seeds):
+    """Every job of a tournament grid
+
+    Returns:
+        jobs(list) : dicts with player, generator, num_toppings, seed_index and the seeds of the game
+    """
+    jobs = []
+    for player in players:
+        for generator in generators:
+            for num_toppings in toppings:
+                for seed_index in seed_indices:
+                    jobs.append(job_for(player, generator, num_toppings, seed_index, base_seeds))
+    return jobs
+
+
+def expected_seconds(job, latency):
+    if (job["player"], job["num_toppings"]) in latency:
+        return latency[(job["player"], job["num_toppings"])]
+    if job["player"] in latency:
+        return latency[job["player"]]
+    known = [seconds for key, seconds in latency.items() if not isinstance(key, tuple)]
+    return max(known) if known else default_seconds       #unknown players go early, they may well be slow
+
+
+def longest_first(jobs, latency, by_cell=False):
+    """Jobs ordered by decreasing expected time, ties in grid order
+
+    Args:
+        latency(dict) : what tournament_store.latency returns
+        by_cell(bool) : keep the jobs of a cell together, cells ordered by their longest job and longest first within
+                        a cell, so that with common inputs only the cells being played are held in memory
+    """
+    seconds = [expected_seconds(job, latency) for job in jobs]
+    if not by_cell:
+        order = sorted(range(len(jobs)), key=lambda number: -seconds[number])
+        return [jobs[number] for number in order]
+    longest = {}
+    for number, job in enumerate(jobs):
+        longest[cell_of(job)] = max(longest.get(cell_of(job), 0), seconds[number])
+    cells = {cell: rank for rank, cell in enumerate(sorted(longest, key=lambda cell: -longest[cell]))}
+    order = sorted(range(len(jobs)), key=lambda number: (cells[cell_of(jobs[number])], -seconds[number]))
+    return [jobs[number] for number in order]
+
+
+def play_job(job, args, inputs=None):
+    """Plays one job through no_gui
+
+    Args:
+        job(dict) : a grid_jobs entry
+        args(Namespace) : tournament arguments, the job fills in player, generator, toppings and seeds
+        inputs(game_inputs) : customers of the job's cell generated beforehand, generated by the game when None
+    Returns:
+        outcome(dict) : the job, status, wall and player seconds, totals, record (summary level), the pickle entry
+                        of the game and the choose_and_cut timings, plus the worker pid
+    """
+    instance = job_instance(job, args, inputs)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with seeded_globals(job["seed"]):       #team_1 and generators 2 and 6 draw from the global states
+            instance.run()
+    except player_timeout as error:
+        status = "timeout: " + str(error)      #a result like any other, not played again on restart
+    except Exception as error:
+        status = "error: " + type(error).__name__ + ": " + str(error)      #played once more on restart, see tournament_store.put
+    return job_outcome(job, instance, status, time.perf_counter() - start, os.getpid())
+
+
+def job_instance(job, args, inputs):
+    #the no_gui instance of a job
+    job_args = argparse.Namespace(**vars(args))
+    job_args.player = job["player"]
+    job_args.generator_number = job["generator"]
+    job_args.num_toppings = job["num_toppings"]
+    job_args.seed, job_args.gen_100_seed, job_args.gen_10_seed = job["seed"], job["gen_100_seed"], job["gen_10_seed"]
+    instance = no_gui(job_args)
+    instance.inputs = inputs
+    instance.timer.enabled = True       #the store keeps the time spent in player calls of every game
+    return instance
+
+
+def job_outcome(job, instance, status, wall, worker):
+    #the outcome of a job its instance played
+    if status == "ok" and instance.record is None:
+        status = "not served"     #bad pizza shape or overlapping toppings
+    phases = instance.timer.phase_totals()
+    return dict(job, status=status, wall=wall, player_seconds=sum(phases[name]["wall"] for name in ["choose_toppings", "choose_and_cut"] if name in phases),
+                totals=instance.record["totals"] if instance.record is not None else None,
+                record=dict(results.at_level(instance.record, "summary"), cache=None) if instance.record is not None else None,     #cache statistics depend on the games the worker played before
+                tournament_result=instance.tournament_result, call_seconds=[call["wall"] for call in instance.timer.calls_of("choose_and_cut")],
+                worker=worker)
+
+
+def cell_of(job):
+    return (job["generator"], job["num_toppings"], job["seed_index"])
+
+
+def shared_inputs(jobs, args):
+    """Jobs with the customers of their cell, each cell generated once for all its players (common random numbers)
+
+    A cell's customers are generated when its first job is handed out and dropped after its last one.
+
+    Yields:
+        job, inputs(game_inputs)
+    """
+    remaining = {}
+    for job in jobs:
+        remaining[cell_of(job)] = remaining.get(cell_of(job), 0) + 1
+    generated = {}
+    for job in jobs:
+        cell = cell_of(job)
+        if cell not in generated:
+            game = Game(generator=job["generator"], num_toppings=job["num_toppings"], seed=job["seed"], gen_100_seed=job["gen_100_seed"], gen_10_seed=job["gen_10_seed"],
+                        num_pizzas=int(args.num_pizzas), toppings_pp=int(args.toppings_per_pizza),
+                        players=pool_for() if str(getattr(args, "out_of_process", "False")) == "True" else None, player_timeout=getattr(args, "player_timeout", None))
+            with seeded_globals(job["seed"]):       #as play_job does before the game generates them itself
+                generated[cell] = game.generate_inputs()
+        inputs = generated[cell]
+        remaining[cell] = remaining[cell] - 1
+        if not remaining[cell]:
+            del generated[cell]
+        yield job, inputs
+
+
+def share_inputs(arena, inputs):
+    """Puts the customers of a cell and the random states they left in the arena
+
+    Returns:
+        shared(tuple) : the arena handle and the few scalars the worker needs to rebuild the game_inputs
+    """
+    preferences_100 = np.asarray(inputs.preferences_100, dtype=np.float64)
+    np_random_state, random_state = inputs.np_random_state, inputs.random_state
+    handle = arena.put({"preferences": inputs.preferences, "preferences_100": preferences_100, "np_random_keys": np_random_state[1],
+                        "random_state": np.asarray(random_state[1], dtype=np.int64)})
+    return (handle, isinstance(inputs.preferences_100, list), inputs.rng_state, (np_random_state[0],) + tuple(np_random_state[2:]),
+            (random_state[0], random_state[2]))
+
+
+def attached_inputs(shared):
+    #game_inputs viewing the shared customers of a cell
+    handle, listed, rng_state, np_random_state, random_state = shared
+    arrays = attach(handle)
+    preferences_100 = arrays["preferences_100"].tolist() if listed else list(arrays["preferences_100"])     #as the generator returned them
+    return game_inputs(arrays["preferences"], preferences_100, rng_state, (np_random_state[0], arrays["np_random_keys"]) + np_random_state[1:],
+                       (random_state[0], tuple(arrays["random_state"].tolist()), random_state[1]))
+
+
+def play_jobs(jobs, args, processes=1, common_inputs=False, started=None):
+    """Outcomes in completion order. Workers take one job at a time, in the order given
+
+    With several processes and common inputs, the customers of a cell go to the workers through shared memory: a job
+    only carries their handle, and the cell is freed once all its jobs are finished. A few jobs per worker are queued
+    at a time.
+
+    Args:
+        common_inputs(bool) : generate the customers of a cell once and feed them to all its players
+        started(function) : called with every job handed to a worker
+    """
+    tasks = shared_inputs(jobs, args) if common_inputs else ((job, None) for job in jobs)
+    started = started if started is not None else (lambda job: None)
+    if processes <= 1:
+        for job, inputs in tasks:
+            started(job)
+            yield play_job(job, args, inputs)
+        return
+    unfinished = {}
+    for job in jobs:
+        unfinished[cell_of(job)] = unfinished.get(cell_of(job), 0) + 1
+    shared = {}     #cell -> shared inputs of the cells being played
+    finished = queue.SimpleQueue()
+    in_flight = 0
+    with shared_arena() as arena, multiprocessing.Pool(processes) as pool:
+        for job, inputs in tasks:
+            if inputs is not None:
+                if cell_of(job) not in shared:
+                    shared[cell_of(job)] = share_inputs(arena, inputs)
+                inputs = shared[cell_of(job)]
+            started(job)
+            pool.apply_async(play_one, ((job, args, inputs),), callback=finished.put, error_callback=finished.put)
+            in_flight = in_flight + 1
+            while in_flight >= 2*processes:
+                yield done(finished.get(), unfinished, shared, arena)
+                in_flight = in_flight - 1
+        for number in range(in_flight):
+            yield done(finished.get(), unfinished, shared, arena)
+
+
+def done(outcome, unfinished, shared, arena):
+    #bookkeeping of a finished job, frees the shared inputs of its cell after the last one
+    if isinstance(outcome, BaseException):
+        raise outcome
+    cell = cell_of(outcome)
+    unfinished[cell] = unfinished[cell] - 1
+    if not unfinished[cell] and cell in shared:
+        arena.free(shared.pop(cell)[0])
+    return outcome
+
+
+def play_one(task):
+    job, args, inputs = task
+    if isinstance(inputs, tuple):
+        inputs = attached_inputs(inputs)
+    return play_job(job, args, inputs)
@@ -0,0 +1,160 @@
+import os
+import time
+import atexit
+import sqlite3
+import numpy as np
+
+schema_version = 2      #bump when the layout of the tables or of the stored values changes
+
+
+class persistent_score_cache():
+    """On-disk (SQLite) cache of ratio_calculator/slice_area_calculator results shared between processes
+
+    Every process opens its own connection. The database runs in WAL mode so many tournament
+    workers can read while one of them appends, and writes are batched so a game does not pay
+    an fsync per cut. Results are stored as float64 bytes. The settings table records the schema
+    version and what the results depend on (kernel version, cut quantum): a store written with
+    other settings is emptied when it is opened.
+
+    Args:
+        path(str) : sqlite file, created if missing
+        max_entries(int) : entries kept after eviction, None for no limit
+        max_bytes(int) : approximate database size kept after eviction, None for no limit
+        flush_every(int) : number of new results buffered before they are written
+        settings(dict) : what the stored results depend on, compared as strings
+    """
+    def __init__(self, path, max_entries=1000000, max_bytes=None, flush_every=256, settings=None):
+        self.path = path
+        self.settings = dict({name: str(value) for name, value in (settings or {}).items()}, schema=str(schema_version))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.pending = {}
+        self.touched = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.connection = None
+        self.pid = None
+        atexit.register(self.close)
+
+    def connect(self):
+        #Connections are not shared across fork, so reopen whenever we find ourselves in a new process
+        if self.connection is None or self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)     #async_runner scores on a thread of its own
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.check_settings(self.connection)
+            self.pid = os.getpid()
+            self.pending = {}
+            self.touched = set()
+        return self.connection
+
+    def check_settings(self, connection):
+        #Empties the store when it was written with other settings, under a write lock so only one process does it
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            stored = dict(connection.execute("SELECT name, value FROM settings").fetchall())
+            if stored != self.settings:
+                connection.execute("DROP TABLE IF EXISTS scores")
+                connection.execute("DELETE FROM settings")
+                connection.executemany("INSERT INTO settings (name, value) VALUES (?, ?)", list(self.settings.items()))
+            connection.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, layout TEXT NOT NULL, value BLOB NOT NULL, used REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS scores_used ON scores (used)")
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def get(self, key):
+        key = repr(key)
+        if key in self.pending:
+            self.hits = self.hits + 1
+            return unpack_value(*self.pending[key])
+        row = self.connect().execute("SELECT layout, value FROM scores WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses = self.misses + 1
+            return None
+        self.hits = self.hits + 1
+        self.touched.add(key)
+        return unpack_value(*row)
+
+    def put(self, key, value):
+        self.connect()
+        self.pending[repr(key)] = pack_value(value)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.connection is None or self.pid != os.getpid() or (not self.pending and not self.touched):
+            return
+        now = time.time()
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany("INSERT OR IGNORE INTO scores (key, layout, value, used) VALUES (?, ?, ?, ?)", [(key, layout, value, now) for key, (layout, value) in self.pending.items()])
+            connection.executemany("UPDATE scores SET used = ? WHERE key = ?", [(now, key) for key in self.touched])
+            self.evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self.pending = {}
+        self.touched = set()
+
+    def evict(self, connection):
+        #Least recently used rows go first. Evicting down to 90% of the limit keeps eviction off most flushes
+        if self.max_entries is not None:
+            count = connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+            if count > self.max_entries:
+                self.delete_oldest(connection, count - int(0.9*self.max_entries))
+        if self.max_bytes is not None:
+            page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+            used_pages = connection.execute("PRAGMA page_count").fetchone()[0] - connection.execute("PRAGMA freelist_count").fetchone()[0]
+            if used_pages*page_size > self.max_bytes:
+                count, total = connection.execute("SELECT COUNT(*), SUM(LENGTH(value) + LENGTH(key)) FROM scores").fetchone()
+                if count:
+                    excess = used_pages*page_size - int(0.9*self.max_bytes)
+                    self.delete_oldest(connection, min(count, int(excess*count/max(total, 1)) + 1))
+
+    def delete_oldest(self, connection, number):
+        connection.execute("DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY used LIMIT ?)", (number,))
+        self.evictions = self.evictions + number
+
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.flush()
+            self.connection.close()
+        self.connection = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hits/lookups if lookups else 0.0}
+
+
+def pack_value(value):
+    """A ratio_calculator or slice_area_calculator result as float64 bytes and the layout to rebuild it
+
+    Args:
+        value(ndarray/list/tuple) : an array or list of floats, or a tuple of them
+    Returns:
+        layout(str) : "t" for a tuple, then for every part "a" (array) or "l" (list) and its shape, parts split by ";"
+        data(bytes) : the parts one after the other, little endian float64
+    """
+    parts = value if isinstance(value, tuple) else (value,)
+    layout = ";".join(("a" if isinstance(part, np.ndarray) else "l") + ",".join(str(size) for size in np.shape(part)) for part in parts)
+    data = b"".join(np.ascontiguousarray(part, dtype="<f8").tobytes() for part in parts)
+    return ("t" if isinstance(value, tuple) else "") + layout, data
+
+
+def unpack_value(layout, data):
+    #inverse of pack_value
+    parts = []
+    offset = 0
+    for part in layout.lstrip("t").split(";"):
+        shape = tuple(int(size) for size in part[1:].split(",") if size)
+        array = np.frombuffer(data, dtype="<f8", count=int(np.prod(shape)), offset=offset).reshape(shape).astype(np.float64)
+        offset = offset + array.nbytes
+        parts.append(array if part[0] == "a" else array.tolist())
+    return tuple(parts) if layout.startswith("t") else parts[0]
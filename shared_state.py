@@ -0,0 +1,111 @@
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+import constants as constants
+
+#Arrays handed to worker processes through shared memory. The dispatching process copies them once into a block of
+#an arena, and a task only carries their handle: the block name and the offset, shape and dtype of every array.
+#Workers map the block and get read-only views, nothing else crosses the process boundary.
+
+alignment = 64      #bytes, every array starts on a cache line
+
+
+class shared_arena():
+    """Shared memory blocks holding arrays for worker processes, owned by the process that dispatches the work
+
+    Arrays are packed into blocks of block_bytes (larger arrays get a block of their own). A block is unlinked once
+    every entry put in it is freed and the arena has moved on to a newer block, or when the arena is closed.
+
+    Make the arena before the worker processes: they then share the resource tracker of this process, instead of
+    starting their own, which would unlink the blocks they mapped when they exit.
+
+    Args:
+        block_bytes(int) : size of a block
+    """
+    def __init__(self, block_bytes=None):
+        resource_tracker.ensure_running()
+        self.block_bytes = int(constants.shared_block_bytes if block_bytes is None else block_bytes)
+        self.blocks = {}        #name -> [SharedMemory, entries not freed]
+        self.current = None
+        self.used = 0
+
+    def put(self, arrays):
+        """Copies arrays into the arena
+
+        Args:
+            arrays(dict) : name -> array
+        Returns:
+            handle(tuple) : block name and name -> (offset, shape, dtype) of every array, what attach needs
+        """
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+        size = sum(-(-array.nbytes//alignment)*alignment for array in arrays.values())
+        if self.current is None or self.used + size > self.current.size:
+            previous = self.current
+            self.current = shared_memory.SharedMemory(create=True, size=max(size, self.block_bytes, 1))
+            self.blocks[self.current.name] = [self.current, 0]
+            self.used = 0
+            if previous is not None and not self.blocks[previous.name][1]:
+                self.release(previous.name)
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = (self.used, array.shape, array.dtype.str)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=self.current.buf, offset=self.used)[...] = array
+            self.used = self.used + -(-array.nbytes//alignment)*alignment
+        self.blocks[self.current.name][1] = self.blocks[self.current.name][1] + 1
+        return (self.current.name, layout)
+
+    def free(self, handle):
+        #the workers are done with an entry
+        name = handle[0]
+        self.blocks[name][1] = self.blocks[name][1] - 1
+        if not self.blocks[name][1] and self.blocks[name][0] is not self.current:
+            self.release(name)
+
+    def release(self, name):
+        #workers still mapping the block keep their views, the memory goes when the last one unmaps it
+        block = self.blocks.pop(name)[0]
+        block.close()
+        block.unlink()
+        if block is self.current:
+            self.current = None
+
+    def close(self):
+        for name in list(self.blocks):
+            self.release(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+attached = {}       #blocks mapped by this process, by name
+
+
+def attach(handle):
+    """Read-only views of the arrays of an arena entry, in a worker process
+
+    Returns:
+        arrays(dict) : name -> array viewing the shared block
+    """
+    name, layout = handle
+    if name not in attached:
+        detach_unused()
+        attached[name] = shared_memory.SharedMemory(name=name)
+    block = attached[name]
+    arrays = {}
+    for array_name, (offset, shape, dtype) in layout.items():
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[array_name] = array
+    return arrays
+
+
+def detach_unused():
+    #unmaps the blocks no array views any more
+    for name in list(attached):
+        try:
+            attached[name].close()
+        except BufferError:
+            continue        #still viewed
+        del attached[name]
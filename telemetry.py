@@ -0,0 +1,207 @@
+import os
+import time
+import bisect
+import threading
+import numpy as np
+import constants as constants
+
+
+class latency_histogram():
+    """Fixed bucket histogram of call latencies (seconds)
+
+    Buckets grow geometrically from 0.1ms to ~10min so one histogram covers both instant and
+    pathological players. Quantiles are estimated by interpolating inside the bucket they fall in.
+    """
+    bounds = [float(bound) for bound in np.geomspace(0.0001, 655.36, 36)]
+
+    def __init__(self):
+        self.counts = [0]*(len(latency_histogram.bounds) + 1)    #last bucket is +Inf
+        self.total = 0.0
+        self.samples = 0
+        self.largest = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(latency_histogram.bounds, seconds)] += 1
+        self.total = self.total + seconds
+        self.samples = self.samples + 1
+        self.largest = max(self.largest, seconds)
+
+    def quantile(self, q):
+        if not self.samples:
+            return 0.0
+        rank = q*self.samples
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = latency_histogram.bounds[index - 1] if index else 0.0
+                upper = latency_histogram.bounds[index] if index < len(latency_histogram.bounds) else self.largest
+                return min(lower + (upper - lower)*(rank - seen)/count, self.largest)
+            seen = seen + count
+        return self.largest
+
+
+class tournament_telemetry():
+    """Progress, throughput, latency and worker utilization of a tournament
+
+    Metrics are kept in memory and written as an OpenMetrics text file every flush_seconds by a thread started
+    with start(), through a temporary file renamed over the previous one so a scraper never reads half a file.
+    Which worker plays a game is only known once it is finished, so games in progress count towards the
+    utilization of the tournament, not of a worker.
+
+    Args:
+        path(str) : OpenMetrics file to write
+        total_games(int) : games the tournament will play, used for the ETA
+        flush_seconds(float) : time between two writes
+        slots(int) : games played at once (processes or async games)
+    """
+    quantiles = [0.5, 0.95, 0.99]
+
+    def __init__(self, path, total_games, flush_seconds=None, slots=1):
+        self.path = path
+        self.total_games = total_games
+        self.flush_seconds = constants.telemetry_flush_seconds if flush_seconds is None else flush_seconds
+        self.slots = max(int(slots), 1)
+        self.started = time.time()
+        self.games = {}          #player -> games completed
+        self.latencies = {}      #player -> latency_histogram of choose_and_cut
+        self.workers = {}        #worker -> {"busy", "games", "last_progress"}
+        self.running = {}        #job -> time it was handed to a worker
+        self.lock = threading.Lock()        #the flush thread renders while games finish
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def worker(self, worker):
+        return self.workers.setdefault(str(worker), {"busy": 0.0, "games": 0, "last_progress": self.started})
+
+    def start(self):
+        self.thread = threading.Thread(target=self.flush_loop, name="telemetry", daemon=True)
+        self.thread.start()
+        return self
+
+    def flush_loop(self):
+        while not self.stopped.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self):
+        #stops the flush thread and writes the final metrics
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+
+    def game_started(self, job):
+        """Record a game handed to a worker
+
+        Args:
+            job(dict) : grid_jobs entry of the game
+        """
+        with self.lock:
+            self.running[job_key(job)] = time.time()
+
+    def game_finished(self, player, call_seconds, worker=0, game_seconds=None, job=None):
+        """Record a finished game
+
+        Args:
+            player(int) : player that played the game
+            call_seconds(list) : wall time of each of its choose_and_cut calls
+            worker(int/str) : worker that ran the game
+            game_seconds(float) : wall time of the whole game, measured from game_started when None
+            job(dict) : grid_jobs entry of the game, when game_started was told about it
+        """
+        now = time.time()
+        with self.lock:
+            since = self.running.pop(job_key(job), None) if job is not None else None
+            if game_seconds is None:
+                game_seconds = now - since if since is not None else 0.0
+            state = self.worker(worker)
+            state["busy"] = state["busy"] + game_seconds
+            state["games"] = state["games"] + 1
+            state["last_progress"] = now
+            player = str(player)
+            self.games[player] = self.games.get(player, 0) + 1
+            histogram = self.latencies.setdefault(player, latency_histogram())
+            for seconds in call_seconds:
+                histogram.observe(seconds)
+
+    def completed(self):
+        return sum(self.games.values())
+
+    def progress(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        completed = self.completed()
+        rate = completed/elapsed
+        eta = (self.total_games - completed)/rate if rate else float("inf")
+        return completed, rate, eta
+
+    def render(self):
+        now = time.time()
+        completed, rate, eta = self.progress()
+        #jobs queued in a pool are handed out oldest first, so the oldest slots of them are the ones being played
+        running = sorted(now - since for since in self.running.values())[-self.slots:]
+        busy = sum(state["busy"] for state in self.workers.values()) + sum(running)
+        lines = []
+        lines.append("# TYPE pizza_tournament_games_target gauge")
+        lines.append(f"pizza_tournament_games_target {self.total_games}")
+        lines.append("# TYPE pizza_tournament_games counter")
+        for player, games in sorted(self.games.items()):
+            lines.append(f'pizza_tournament_games_total{{player="{player}"}} {games}')
+        lines.append("# TYPE pizza_tournament_games_per_second gauge")
+        lines.append(f"pizza_tournament_games_per_second {rate:.6g}")
+        lines.append("# TYPE pizza_tournament_eta_seconds gauge")
+        lines.append(f"pizza_tournament_eta_seconds {eta:.6g}" if eta != float("inf") else "pizza_tournament_eta_seconds +Inf")
+        lines.append("# TYPE pizza_tournament_elapsed_seconds gauge")
+        lines.append(f"pizza_tournament_elapsed_seconds {now - self.started:.6g}")
+        lines.append("# TYPE pizza_tournament_games_running gauge")
+        lines.append(f"pizza_tournament_games_running {len(running)}")
+        lines.append("# TYPE pizza_tournament_longest_running_seconds gauge")
+        lines.append(f"pizza_tournament_longest_running_seconds {max(running, default=0.0):.6g}")
+        lines.append("# TYPE pizza_tournament_utilization_ratio gauge")
+        lines.append(f"pizza_tournament_utilization_ratio {busy/max((now - self.started)*self.slots, 1e-9):.6g}")
+
+        lines.append("# TYPE pizza_choose_and_cut_seconds histogram")
+        lines.append("# UNIT pizza_choose_and_cut_seconds seconds")
+        for player, histogram in sorted(self.latencies.items()):
+            cumulative = 0
+            for bound, count in zip(latency_histogram.bounds + ["+Inf"], histogram.counts):
+                cumulative = cumulative + count
+                bound = bound if isinstance(bound, str) else f"{bound:.6g}"
+                lines.append(f'pizza_choose_and_cut_seconds_bucket{{player="{player}",le="{bound}"}} {cumulative}')
+            lines.append(f'pizza_choose_and_cut_seconds_count{{player="{player}"}} {histogram.samples}')
+            lines.append(f'pizza_choose_and_cut_seconds_sum{{player="{player}"}} {histogram.total:.6g}')
+        lines.append("# TYPE pizza_choose_and_cut_quantile_seconds gauge")
+        lines.append("# UNIT pizza_choose_and_cut_quantile_seconds seconds")
+        for player, histogram in sorted(self.latencies.items()):
+            for q in tournament_telemetry.quantiles:
+                lines.append(f'pizza_choose_and_cut_quantile_seconds{{player="{player}",quantile="{q}"}} {histogram.quantile(q):.6g}')
+
+        lines.append("# TYPE pizza_worker_utilization_ratio gauge")
+        for worker, state in sorted(self.workers.items()):
+            lines.append(f'pizza_worker_utilization_ratio{{worker="{worker}"}} {state["busy"]/max(now - self.started, 1e-9):.6g}')
+        lines.append("# TYPE pizza_worker_games counter")
+        for worker, state in sorted(self.workers.items()):
+            lines.append(f'pizza_worker_games_total{{worker="{worker}"}} {state["games"]}')
+        lines.append("# TYPE pizza_worker_last_progress_timestamp_seconds gauge")
+        for worker, state in sorted(self.workers.items()):
+            lines.append(f'pizza_worker_last_progress_timestamp_seconds{{worker="{worker}"}} {state["last_progress"]:.3f}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        completed, rate, eta = self.progress()
+        line = f"Tournament : {completed}/{self.total_games} games, {rate:.2f} games/s, ETA {eta:.0f}s"
+        for player, histogram in sorted(self.latencies.items()):
+            line = line + f" | player {player} choose_and_cut p50 {histogram.quantile(0.5):.3f}s p95 {histogram.quantile(0.95):.3f}s p99 {histogram.quantile(0.99):.3f}s"
+        return line
+
+    def flush(self):
+        with self.lock:
+            text, summary = self.render(), self.summary()
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            f.write(text)
+        os.replace(temporary, self.path)
+        print(summary, flush=True)
+
+
+def job_key(job):
+    return (job["player"], job["generator"], job["num_toppings"], job["seed_index"])
@@ -0,0 +1,63 @@
+import os
+import sys
+import random
+import sqlite3
+import subprocess
+import numpy as np
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+from utils import pizza_calculations
+
+
+@pytest.fixture(autouse=True)
+def in_tmp(tmp_path, monkeypatch):
+    #games write their logs to the working directory, and the score cache is process wide
+    monkeypatch.chdir(tmp_path)
+    cache = pizza_calculations.cache
+    pizza_calculations.cache = None
+    yield tmp_path
+    if pizza_calculations.cache is not None and pizza_calculations.cache.store is not None:
+        pizza_calculations.cache.store.close()
+    pizza_calculations.cache = cache
+
+
+def tournament_args(*argv):
+    #tournament.py arguments, as its main parses them
+    import tournament
+    args = tournament.parser.parse_args([str(value) for value in argv])
+    args.tournament = True
+    return args
+
+
+def run_script(script, *argv):
+    #a script of the repository run in the working directory, its output
+    done = subprocess.run([sys.executable, os.path.join(root, script)] + [str(value) for value in argv], capture_output=True, text=True, timeout=600)
+    assert done.returncode == 0, done.stderr
+    return done.stdout
+
+
+def run_tournament(*argv):
+    return run_script("tournament.py", *argv)
+
+
+def run_main(*argv):
+    #a no gui game of main.py
+    return run_script("main.py", "-g", "False", *argv)
+
+
+def stored_games(path):
+    #what a tournament store holds, without the timings
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT player, generator, num_toppings, seed_index, seed, gen_100_seed, gen_10_seed, status, totals FROM games ORDER BY 1, 2, 3, 4").fetchall()
+    connection.close()
+    return rows
+
+
+def seeded_game(**options):
+    #a Game run from seeded globals, for the players and generators that draw from them
+    from game import Game
+    np.random.seed(7)
+    random.seed(7)
+    return Game(**options).run()
@@ -0,0 +1,64 @@
+import numpy as np
+
+#The per topping loop ratio_calculator ran before it was vectorized, kept as the reference of the kernels.
+#Only the branches a 0.375in topping can reach (1, 2 or 3 slices, or the center inside it) are kept.
+
+topping_area = np.pi*0.375*0.375
+
+
+def ratio_loop(pizza, cut, num_toppings, multiplier, x, y):
+    result = np.zeros((2, num_toppings))
+    center = [(cut[0]-x)/multiplier, -(cut[1]-y)/multiplier]
+    theta = cut[2]
+    topping_amts = [[0 for column in range(num_toppings)] for row in range(8)]
+    for top_abs_x, top_abs_y, kind in pizza:
+        kind = int(kind) - 1
+        distance_to_top = np.sqrt((top_abs_x-center[0])**2 + (top_abs_y - center[1])**2)
+        theta_edge = np.arctan(0.375 / distance_to_top)
+        if top_abs_x == center[0]:
+            theta_top = 0
+        else:
+            theta_top = np.arctan((top_abs_y - center[1])/(top_abs_x-center[0]))
+        if (top_abs_x-center[0])<=0 and (top_abs_y-center[1])>=0:
+            theta_top = theta_top + np.pi
+        if (top_abs_x-center[0])<=0 and (top_abs_y-center[1])<=0:
+            theta_top = theta_top + np.pi
+        theta_distance = (theta_top - theta + (np.pi * 10))%(2*np.pi)
+        slice_id = int(theta_distance*4//np.pi)
+
+        if distance_to_top <= 0.375:
+            result[1][kind] = result[1][kind] + topping_area/2
+            result[0][kind] = result[0][kind] + topping_area/2
+        elif (theta_edge + theta_distance)*4//np.pi == (-theta_edge + theta_distance)*4//np.pi:
+            result[1 if slice_id % 2 == 0 else 0][kind] += topping_area
+            topping_amts[slice_id][kind] = topping_amts[slice_id][kind] + topping_area
+        elif (theta_edge + theta_distance)*4//np.pi == (-theta_edge + theta_distance)*4//np.pi + 1:
+            small_angle_theta = min(theta_distance%(np.pi/4), (np.pi/4 - (theta_distance%(np.pi/4))))
+            phi = np.arcsin(distance_to_top*np.sin(small_angle_theta)/0.375)
+            area_smaller = (np.pi/2 - phi - (np.cos(phi)*np.sin(phi)))*0.375*0.375
+            if slice_id % 2 == 0:
+                result[1][kind] += topping_area - area_smaller
+                result[0][kind] += area_smaller
+            else:
+                result[1][kind] += area_smaller
+                result[0][kind] += topping_area - area_smaller
+            neighbour = (slice_id - 1)%8 if small_angle_theta == theta_distance%(np.pi/4) else (slice_id + 1)%8
+            topping_amts[slice_id][kind] += topping_area - area_smaller
+            topping_amts[neighbour][kind] += area_smaller
+        else:
+            small_angle_theta_1 = theta_distance%(np.pi/4)
+            small_angle_theta_2 = (np.pi/4)-small_angle_theta_1
+            phi_1 = np.arcsin(distance_to_top*np.sin(small_angle_theta_1)/0.375)
+            phi_2 = np.arcsin(distance_to_top*np.sin(small_angle_theta_2)/0.375)
+            area_smaller_1 = (np.pi/2 - phi_1 - (np.cos(phi_1)*np.sin(phi_1)))*0.375*0.375
+            area_smaller_2 = (np.pi/2 - phi_2 - (np.cos(phi_2)*np.sin(phi_2)))*0.375*0.375
+            if slice_id % 2 == 0:
+                result[1][kind] += topping_area - area_smaller_1 - area_smaller_2
+                result[0][kind] += area_smaller_1 + area_smaller_2
+            else:
+                result[1][kind] += area_smaller_1 + area_smaller_2
+                result[0][kind] += topping_area - area_smaller_1 - area_smaller_2
+            topping_amts[slice_id][kind] += topping_area - area_smaller_1 - area_smaller_2
+            topping_amts[(slice_id + 1)%8][kind] += area_smaller_2
+            topping_amts[(slice_id - 1)%8][kind] += area_smaller_1
+    return result/topping_area, np.array(topping_amts, dtype=np.float64)
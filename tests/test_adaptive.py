@@ -0,0 +1,82 @@
+import json
+import numpy as np
+from adaptive import running_stats, adaptive_tournament, play_rounds
+from conftest import run_tournament
+
+cells = [(0, 2, seed_index) for seed_index in range(500)]
+
+
+def synthetic(means, noise=1.0):
+    #plays a job as a player of the given mean S, the customers of the cell adding the same luck to every player
+    played = []
+
+    def play(jobs):
+        for job in jobs:
+            played.append(job)
+            luck = np.random.default_rng(job["seed_index"]).normal(0, 20)
+            own = np.random.default_rng([job["seed_index"], job["player"]]).normal(0, noise)
+            yield dict(job, totals={"S": means[job["player"]] + luck + own})
+    return play, played
+
+
+def make_job(player, cell):
+    return dict(player=player, generator=cell[0], num_toppings=cell[1], seed_index=cell[2])
+
+
+def test_running_stats():
+    values = np.random.default_rng(1).normal(3, 2, 50)
+    stats = running_stats()
+    for value in values:
+        stats.add(value)
+    assert stats.count == 50
+    assert abs(stats.mean - np.mean(values)) < 1e-12
+    assert abs(stats.variance() - np.var(values, ddof=1)) < 1e-12
+
+
+def test_separated_players_stop_early():
+    board = adaptive_tournament([0, 1, 2], 0.95, 20)
+    play, played = synthetic({0: 0.0, 1: 10.0, 2: 20.0})
+    games = play_rounds(board, cells, make_job, play, 10, 1500)
+    assert games == len(played) < 100
+    assert board.leaderboard() == [2, 1, 0]
+    assert board.uncertain_players() == []
+    assert [pair["verdict"] for pair in board.to_dict()["pairs"]] == ["separated", "separated"]
+
+
+def test_the_budget_is_never_exceeded():
+    board = adaptive_tournament([0, 1, 2], 0.95, 20)
+    play, played = synthetic({0: 0.0, 1: 0.01, 2: 0.02}, noise=5.0)
+    games = play_rounds(board, cells, make_job, play, 10, 100)
+    assert games == len(played) <= 100
+    assert board.uncertain_players() != []
+    for player in board.players:        #whole cells only
+        assert {job["seed_index"] for job in played if job["player"] == player} == {job["seed_index"] for job in played if job["player"] == 0}
+
+
+def test_identical_players_are_tied():
+    board = adaptive_tournament([0, 1], 0.95, 20)
+    play, played = synthetic({0: 5.0, 1: 5.0}, noise=0.0)
+    play_rounds(board, cells, make_job, play, 10, 1000)
+    assert len(played) == 2*20
+    assert board.separation(0, 1)[2] == "tied"
+
+
+def test_stored_games_are_not_played_again():
+    play, played = synthetic({0: 0.0, 1: 10.0})
+    first = adaptive_tournament([0, 1], 0.95, 20)
+    play_rounds(first, cells, make_job, play, 10, 1000)
+    stored = {(job["player"],) + cells[job["seed_index"]]: outcome["totals"]["S"] for job, outcome in zip(played, play(list(played)))}
+    played.clear()
+    again = adaptive_tournament([0, 1], 0.95, 20)
+    games = play_rounds(again, cells, make_job, play, 10, 1000, stored)
+    assert played == [] and games == len(stored)
+    assert again.to_dict() == first.to_dict()
+
+
+def test_an_adaptive_tournament_reports_its_leaderboard():
+    output = run_tournament("-p", "0,4", "-g_num", "0,4", "-num_top", "2", "-n", "30", "-ad", "True", "-b", "60", "-ad_o", "board.json", "-st", "t.sqlite")
+    assert "Leaderboard at 95% confidence" in output
+    with open("board.json") as f:
+        report = json.load(f)
+    assert report["games"] <= 60 and report["budget"] == 60 and report["grid"] == 120
+    assert sorted(entry["player"] for entry in report["leaderboard"]) == [0, 4]
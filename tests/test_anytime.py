@@ -0,0 +1,61 @@
+import time
+import pytest
+from game import Game, anytime_cut
+from player_process import player_pool
+
+
+class searching():
+    #an anytime player yielding cuts 0, 1, 2, ... of pizza 0
+    def __init__(self, steps):
+        self.steps = steps
+        self.closed = False
+
+    def choose_and_cut_anytime(self, pizzas, remaining_pizza_ids, customer_amounts):
+        try:
+            for step in range(self.steps):
+                yield 0, [0, 0], float(step)
+        finally:
+            self.closed = True
+
+
+class plain():
+    def choose_and_cut(self, pizzas, remaining_pizza_ids, customer_amounts):
+        return remaining_pizza_ids[-1], [0, 0], 0.5
+
+
+def test_without_a_deadline_the_search_finishes():
+    player = searching(50)
+    assert anytime_cut(player, (None, [0], None), None) == (0, [0, 0], 49.0)
+    assert player.closed
+
+
+def test_past_the_deadline_the_first_cut_is_taken():
+    player = searching(50)
+    assert anytime_cut(player, (None, [0], None), time.monotonic() - 1) == (0, [0, 0], 0.0)
+    assert player.closed
+
+
+def test_a_search_must_yield_a_cut():
+    with pytest.raises(ValueError):
+        anytime_cut(searching(0), (None, [0], None), None)
+
+
+def test_other_players_cut_as_always():
+    assert anytime_cut(plain(), (None, [3, 7], None), time.monotonic() - 1) == (7, [0, 0], 0.5)
+
+
+@pytest.mark.parametrize("player", [3, 6])
+def test_anytime_players_serve_within_the_time_limit(player):
+    start = time.monotonic()
+    result = Game(player=player, generator=0, num_toppings=2, seed=3, player_timeout=1.0).run()
+    assert result.status == "served"
+    assert time.monotonic() - start < 5
+
+
+def test_anytime_players_serve_within_the_time_limit_out_of_process():
+    pool = player_pool()
+    try:
+        result = Game(player=3, generator=0, num_toppings=2, seed=3, player_timeout=1.0, players=pool).run()
+    finally:
+        pool.close()
+    assert result.status == "served"
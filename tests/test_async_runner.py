@@ -0,0 +1,27 @@
+import pytest
+from async_runner import play_jobs_async
+from scheduler import grid_jobs, play_jobs, cell_of
+from conftest import tournament_args, run_tournament, stored_games
+
+base_seeds = {"seed": 40, "gen_100_seed": 40, "gen_10_seed": 45}
+jobs = grid_jobs([0, 4], [0, 2], [2, 3], range(1), base_seeds) + grid_jobs([1], [0], [2], range(1), base_seeds)     #team_1 draws from the global states
+
+
+def by_job(outcomes):
+    return {cell_of(outcome) + (outcome["player"],): (outcome["status"], outcome["totals"]) for outcome in outcomes}
+
+
+@pytest.mark.parametrize("common_inputs", [False, True])
+def test_async_games_are_the_same_games(common_inputs):
+    args = tournament_args()
+    started = []
+    played = by_job(play_jobs_async(jobs, args, 3, common_inputs, started.append))
+    assert played == by_job(play_jobs(jobs, args, 1, common_inputs))
+    assert len(played) == len(started) == len(jobs)
+
+
+def test_an_async_tournament_stores_the_same_games():
+    grid = ["-p", "0,4", "-g_num", "0,2", "-num_top", "2", "-n", "2"]
+    run_tournament(*grid, "-st", "own.sqlite")
+    run_tournament(*grid, "-as", "4", "-st", "async.sqlite")
+    assert stored_games("async.sqlite") == stored_games("own.sqlite")
@@ -0,0 +1,24 @@
+import os
+import json
+from conftest import run_script
+
+bench = os.path.join("benchmarks", "bench_games.py")
+
+
+def test_the_report_covers_every_game():
+    output = run_script(bench, "-p", "0,1,4", "-g_num", "0,1", "-num_top", "2", "-s", "2", "-j", "2", "-o", "games.json")
+    assert "12 games in" in output
+    with open("games.json") as f:
+        report = json.load(f)
+    assert report["throughput"]["games"] == 12 and report["processes"] == 2
+    assert [(game["player"], game["generator"], game["seed"]) for game in report["games"]] == [(player, generator, seed) for player in [0, 1, 4] for generator in [0, 1] for seed in [1, 2]]
+    assert all(game["status"] == "ok" if game["generator"] == 0 else game["status"].startswith("error: TypeError") for game in report["games"])     #generator 1 fails
+    assert report["players"]["default"]["games"] == 4 and report["players"]["default"]["failed"] == 2
+    assert report["players"]["team_4"]["choose_and_cut"]["count"] == 20
+    assert os.listdir(".") == ["games.json"]        #games run in a scratch directory
+
+
+def test_a_report_compares_with_an_earlier_one():
+    run_script(bench, "-p", "0,4", "-g_num", "0", "-num_top", "2", "-o", "before.json")
+    output = run_script(bench, "-p", "0,4", "-g_num", "0", "-num_top", "2", "-o", "after.json", "-c", "before.json")
+    assert "Throughput " in output and "default  mean game " in output and "team_4   mean game " in output
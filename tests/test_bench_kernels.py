@@ -0,0 +1,21 @@
+import os
+import sys
+import copy
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import bench_kernels
+
+
+def test_fewer_cuts_than_pizzas():
+    results = bench_kernels.run_benchmarks("ring_team4_t2/near_edge", 1, 0.0001, 3, 7)
+    assert set(results) == {"ring_team4_t2/near_edge/" + kernel for kernel in ["ratio_calculator", "slice_area_calculator", "final_score"]}
+    assert all(result["ops_per_sec"] > 0 for result in results.values())
+
+
+def test_final_score_cuts_do_not_depend_on_the_cut_count():
+    pizzas = bench_kernels.make_pizzas("random_default", 3, 7)
+    rng = np.random.default_rng(7)
+    first = bench_kernels.make_cuts(pizzas, "far_off_center", len(pizzas), copy.deepcopy(rng))
+    longer = bench_kernels.make_cuts(pizzas, "far_off_center", 40, rng)
+    assert all(a[0] == b[0] and a[1] == b[1] for a, b in zip(first, longer))
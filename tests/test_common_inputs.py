@@ -0,0 +1,25 @@
+import numpy as np
+from scheduler import grid_jobs, shared_inputs, cell_of
+from conftest import tournament_args, run_tournament, stored_games
+
+grid = ["-p", "0,4", "-g_num", "0,2,4", "-num_top", "2,3", "-n", "2"]
+
+
+def test_common_inputs_play_the_same_games():
+    run_tournament(*grid, "-st", "own.sqlite")
+    run_tournament(*grid, "-crn", "True", "-j", "2", "-st", "common.sqlite")
+    assert len(stored_games("own.sqlite")) == 24
+    assert stored_games("common.sqlite") == stored_games("own.sqlite")
+
+
+def test_a_cell_is_generated_once_for_all_its_players():
+    args = tournament_args(*grid)
+    jobs = grid_jobs([0, 4, 0], [2], [2, 3], range(2), {"seed": 40, "gen_100_seed": 40, "gen_10_seed": 45})
+    inputs = {}
+    for job, given in shared_inputs(sorted(jobs, key=cell_of), args):
+        inputs.setdefault(cell_of(job), []).append(given)
+    assert len(inputs) == 4
+    for cell, given in inputs.items():
+        assert len(given) == 3 and all(other is given[0] for other in given)
+    first, second = [inputs[cell] for cell in sorted(inputs)[:2]]
+    assert not np.array_equal(first[0].preferences, second[0].preferences)
@@ -0,0 +1,46 @@
+import threading
+import numpy as np
+import pytest
+from game import Game
+from player_process import seeded_globals
+from pizza_client import request
+from pizza_daemon import play_game, score_games, pizza_daemon
+
+spec = {"player": 4, "generator_number": 2, "num_toppings": 3, "seed": 12, "log_level": "summary"}
+
+
+def test_a_daemon_game_is_the_game():
+    reply = play_game(spec)
+    with seeded_globals(12):
+        result = Game(player=4, generator=2, num_toppings=3, seed=12, gen_100_seed=45, gen_10_seed=50).run()
+    assert reply["status"] == result.status == "served"
+    assert reply["totals"] == result.totals
+    assert reply["record"] is not None and reply["text"]
+    with pytest.raises(ValueError):
+        play_game(dict(spec, players=4))
+
+
+def test_scores_of_a_game_are_its_final_scores():
+    games = [Game(player=player, generator=0, num_toppings=num_toppings, seed=5).run() for player in [0, 4] for num_toppings in [2, 3]]
+    reply = score_games({"games": [{"num_toppings": result.preferences.shape[2], "pizzas": result.pizzas.tolist(), "preferences": result.preferences.tolist(),
+                                    "pizza_choice_order": result.pizza_choice_order.tolist(), "cuts": result.cuts.tolist()} for result in games]})
+    for result, scored in zip(games, reply["games"]):
+        for name in ["U", "B", "C", "S"]:
+            assert scored["totals"][name] == pytest.approx(result.totals[name], abs=1e-9)
+            assert np.allclose(scored["customers"][name], result.scores[name], atol=1e-9)
+
+
+def test_the_daemon_serves_over_http():
+    daemon = pizza_daemon("127.0.0.1", 0, 1)
+    url = "http://127.0.0.1:" + str(daemon.server.server_address[1])
+    serving = threading.Thread(target=daemon.serve)
+    serving.start()
+    try:
+        reply = request(url, "/game", spec)
+        assert reply["totals"] == play_game(spec)["totals"]
+        with pytest.raises(SystemExit):
+            request(url, "/game", dict(spec, players=4))
+        assert request(url, "/status")["served"] == {"/game": 1}
+    finally:
+        daemon.server.shutdown()
+        serving.join()
@@ -0,0 +1,53 @@
+import os
+import numpy as np
+from game import Game
+from player_process import seeded_globals
+
+
+def test_same_seeds_same_game():
+    first = Game(player=4, generator=0, num_toppings=3, seed=11).run()
+    second = Game(player=4, generator=0, num_toppings=3, seed=11).run()
+    assert first.status == second.status == "served"
+    assert first.totals == second.totals
+    assert np.array_equal(first.preferences, second.preferences)
+    assert np.array_equal(first.cuts, second.cuts)
+    assert np.array_equal(first.pizza_choice_order, second.pizza_choice_order)
+
+
+def test_results_stay_in_memory(tmp_path, capsys):
+    result = Game(player=0, generator=4, num_toppings=2).run()
+    assert os.listdir(tmp_path) == []
+    assert capsys.readouterr().out == ""
+    assert "Your shop is now open" in result.output
+    assert set(result.scores) == {"U", "B", "C", "S", "SliceMetric", "CenterOffset"}
+    assert abs(result.totals["S"] - np.sum(result.scores["S"])) < 1e-9
+    assert result.record is not None
+
+
+def test_generated_inputs_play_the_same_game():
+    with seeded_globals(5):
+        played = Game(player=4, generator=2, num_toppings=2, seed=5).run()
+    game = Game(player=4, generator=2, num_toppings=2, seed=5)
+    with seeded_globals(5):
+        inputs = game.generate_inputs()
+    from_inputs = game.run(inputs)
+    assert from_inputs.totals == played.totals
+    assert np.array_equal(from_inputs.preferences, played.preferences)
+
+
+def test_refused_pizzas_end_the_game():
+    class overlapping():
+        def __init__(self, num_toppings, rng, num_pizzas=None, toppings_pp=None):
+            self.num_pizzas, self.toppings_pp = num_pizzas, toppings_pp
+
+        def choose_toppings(self, preferences):
+            return [np.zeros((self.toppings_pp, 3)) + [0, 0, 1]]*self.num_pizzas
+
+    import game
+    game.player_classes.append(overlapping)
+    try:
+        result = Game(player=len(game.player_classes) - 1, generator=0, num_toppings=2).run()
+    finally:
+        game.player_classes.pop()
+    assert result.status == "overlap"
+    assert result.record is None and len(result.pizza_choice_order) == 0
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import constants
+from utils import pizza_calculations
+from scalar_kernels import ratio_loop
+from conftest import seeded_game
+
+multiplier, x, y = 40, 12*40, 10*40
+
+
+def random_pizza(rng, num_toppings, toppings_pp=24):
+    pizza = np.zeros((toppings_pp, 3))
+    pizza[:, :2] = pizza_calculations.place_toppings(toppings_pp, rng)
+    pizza[:, 2] = np.arange(toppings_pp)%num_toppings + 1
+    return pizza
+
+
+def random_cuts(rng, pizza, number):
+    #cuts in screen units: centers inside a topping, near the crust and anywhere in between
+    cuts = []
+    for i in range(number):
+        if i % 3 == 0:
+            topping = pizza[rng.integers(len(pizza))]
+            radius, angle = 0.3*rng.random(), rng.random()*2*np.pi
+            cx, cy = topping[0] + radius*np.cos(angle), topping[1] + radius*np.sin(angle)
+        else:
+            radius, angle = (5.9 if i % 3 == 1 else 5)*rng.random(), rng.random()*2*np.pi
+            cx, cy = radius*np.cos(angle), radius*np.sin(angle)
+        cuts.append([x + cx*multiplier, y - cy*multiplier, rng.random()*2*np.pi])
+    return cuts
+
+
+@pytest.mark.parametrize("num_toppings", [2, 3, 4])
+def test_ratios_match_the_scalar_loop(num_toppings):
+    rng = np.random.default_rng(num_toppings)
+    calculator = pizza_calculations()
+    for pizza_number in range(5):
+        pizza = random_pizza(rng, num_toppings)
+        for cut in random_cuts(rng, pizza, 60):
+            result, topping_amts = calculator.compute_ratios(pizza, cut, num_toppings, multiplier, x, y)
+            expected_result, expected_amts = ratio_loop(pizza, cut, num_toppings, multiplier, x, y)
+            assert np.max(np.abs(result - expected_result)) < 1e-12
+            assert np.max(np.abs(np.asarray(topping_amts) - expected_amts)) < 1e-12
+
+
+def test_ratios_of_larger_pizzas_match_the_scalar_loop():
+    rng = np.random.default_rng(5)
+    calculator = pizza_calculations()
+    pizza = random_pizza(rng, 3, 48)
+    for cut in random_cuts(rng, pizza, 30):
+        result, topping_amts = calculator.compute_ratios(pizza, cut, 3, multiplier, x, y)
+        assert np.max(np.abs(result - ratio_loop(pizza, cut, 3, multiplier, x, y)[0])) < 1e-12
+
+
+def test_shop_size_goes_to_the_players_not_to_constants():
+    shop_size = (constants.number_of_initial_pizzas, constants.number_of_toppings_pp)
+    result = seeded_game(player=0, generator=0, num_toppings=3, num_pizzas=12, toppings_pp=36)
+    assert result.status == "served"
+    assert np.shape(result.pizzas) == (12, 36, 3)
+    assert len(result.pizza_choice_order) == 12
+    assert (constants.number_of_initial_pizzas, constants.number_of_toppings_pp) == shop_size
+
+
+def test_players_default_to_the_constants():
+    from players.default_player import Player
+    pizzas = Player(2, np.random.default_rng(1)).choose_toppings(None)
+    assert np.shape(pizzas) == (constants.number_of_initial_pizzas, constants.number_of_toppings_pp, 3)
@@ -0,0 +1,56 @@
+import numpy as np
+from utils import pizza_calculations, pizza_layouts
+from conftest import seeded_game
+
+
+def layout(seed):
+    pizza = np.zeros((24, 3))
+    pizza[:, :2] = pizza_calculations.place_toppings(24, np.random.default_rng(seed))
+    pizza[:, 2] = np.arange(24)%3 + 1
+    return pizza
+
+
+def test_identical_pizzas_share_a_group_and_a_fingerprint():
+    pizzas = [layout(1), layout(2), layout(1), layout(1) + 0.0, layout(2)]
+    layouts = pizza_layouts(pizzas)
+    assert layouts.group_of(0) == [0, 2, 3]
+    assert layouts.group_of(4) == [1, 4]
+    assert layouts.fingerprints[0] == layouts.fingerprints[3] != layouts.fingerprints[1]
+    assert layouts.distinct([4, 3, 2, 1, 0]) == [4, 3]
+
+
+def test_negative_zero_is_the_same_layout():
+    pizza = layout(3)
+    pizza[0, 0] = 0.0
+    other = pizza.copy()
+    other[0, 0] = -0.0
+    assert pizza_calculations.pizza_fingerprint(pizza) == pizza_calculations.pizza_fingerprint(other)
+
+
+def test_cached_results_are_computed_once_per_layout():
+    layouts = pizza_layouts([layout(1), layout(2), layout(1)])
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert layouts.cached(0, "key", compute) == 1
+    assert layouts.cached(2, "key", compute) == 1
+    assert layouts.cached(1, "key", compute) == 2
+    assert layouts.cached(2, "other key", compute) == 3
+
+
+def test_of_returns_the_layouts_of_the_same_pizzas():
+    pizzas = [layout(1), layout(1)]
+    assert pizza_layouts.of(pizzas) is pizza_layouts.of(pizzas)
+    assert pizza_layouts.of(list(pizzas)) is not pizza_layouts.of(pizzas)
+
+
+def test_game_result_carries_the_layouts_of_its_pizzas():
+    result = seeded_game(player=4, generator=0, num_toppings=2)
+    assert result.status == "served"
+    assert sum(len(group) for group in result.pizza_layouts.groups.values()) == len(result.pizzas)
+    for pizza_id in range(len(result.pizzas)):
+        for other in result.pizza_layouts.group_of(pizza_id):
+            assert np.array_equal(result.pizzas[pizza_id], result.pizzas[other])
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from utils import pizza_calculations
+
+
+def rejection_loop(num_toppings_pp, rng):
+    #the choose_toppings loop place_toppings replaced, every candidate checked against every topping placed
+    pizza = np.zeros((num_toppings_pp, 3))
+    placed = 0
+    while placed < num_toppings_pp:
+        angle = rng.random()*2*np.pi
+        dist = rng.random()*6
+        x, y = dist*np.cos(angle), dist*np.sin(angle)
+        if not pizza_calculations.clash_exists(x, y, pizza, placed):
+            pizza[placed] = [x, y, 0]
+            placed = placed + 1
+    return pizza[:, :2]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_placements_are_the_same_as_before(seed):
+    assert np.array_equal(pizza_calculations.place_toppings(24, np.random.default_rng(seed)), rejection_loop(24, np.random.default_rng(seed)))
+
+
+def test_dense_placements_are_valid():
+    positions = pizza_calculations.place_toppings_poisson(60, np.random.default_rng(1))
+    pizza = np.concatenate([positions, np.ones((60, 1))], axis=1)
+    assert pizza_calculations.validate_pizzas([pizza])["valid"]
+    with pytest.raises(ValueError):
+        pizza_calculations.place_toppings_poisson(1000, np.random.default_rng(1))
+    with pytest.raises(ValueError):
+        pizza_calculations.place_toppings(1000, np.random.default_rng(1), max_attempts=5000)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from game import Game
+from player_process import player_pool, seeded_globals
+from scheduler import grid_jobs, play_job
+from conftest import tournament_args
+
+
+@pytest.fixture
+def pool():
+    pool = player_pool()
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize("player, generator", [(0, 2), (1, 0), (2, 0), (4, 2), (5, 4)])
+def test_out_of_process_games_are_the_same_games(pool, player, generator):
+    with seeded_globals(3):
+        alone = Game(player=player, generator=generator, num_toppings=3, seed=3).run()
+    with seeded_globals(3):
+        remote = Game(player=player, generator=generator, num_toppings=3, seed=3, players=pool).run()
+    assert remote.status == alone.status == "served"
+    assert remote.totals == alone.totals
+    assert np.array_equal(remote.cuts, alone.cuts)
+    assert np.array_equal(remote.pizza_choice_order, alone.pizza_choice_order)
+
+
+def test_player_processes_are_reused(pool):
+    Game(player=0, generator=0, num_toppings=2, players=pool).run()
+    worker = pool.idle[0]
+    Game(player=4, generator=0, num_toppings=2, players=pool).run()
+    assert pool.idle == [worker] and worker.games == 2
+    spent = player_pool(games_per_process=1)
+    Game(player=0, generator=0, num_toppings=2, players=spent).run()
+    assert spent.idle == []
+
+
+@pytest.mark.parametrize("out_of_process", ["False", "True"])
+def test_a_game_past_its_deadline_times_out(out_of_process):
+    job = grid_jobs([0], [0], [2], range(1), {"seed": 40, "gen_100_seed": 40, "gen_10_seed": 45})[0]
+    assert play_job(job, tournament_args("-op", out_of_process, "-pt", "0.000001"))["status"].startswith("timeout")
+    assert play_job(job, tournament_args("-op", out_of_process))["status"] == "ok"
@@ -0,0 +1,33 @@
+import os
+import pstats
+import tracemalloc
+from profiling import player_profiler
+from conftest import run_main
+
+
+def test_a_game_writes_its_player_reports():
+    run_main("-p", "4", "-prof", "profiles")
+    assert sorted(os.listdir("profiles")) == ["player_0.prof", "player_0.txt", "player_4.prof", "player_4.txt"]      #the generator is player 0
+    with open(os.path.join("profiles", "player_4.txt")) as f:
+        report = f.read()
+    assert report.startswith("Player 4 profile over 1 games")
+    assert "choose_toppings : 1 calls" in report and "choose_and_cut : 10 calls" in report
+    assert "Allocation sites" in report
+    assert pstats.Stats(os.path.join("profiles", "player_4.prof")).total_calls > 0
+
+
+def test_allocations_of_a_call_are_its_own(tmp_path):
+    profiler = player_profiler(str(tmp_path/"profiles"), allocations=True)
+    with profiler.call(1, "choose_toppings"):
+        held = [bytearray(1 << 20)]
+    assert not tracemalloc.is_tracing()
+    totals = profiler.profiles[1].kinds["choose_toppings"]
+    assert totals["calls"] == 1 and totals["peak_max"] >= 1 << 20
+    tracemalloc.start()
+    try:
+        with profiler.call(1, "choose_toppings"):
+            held.append(bytearray(1 << 10))
+        assert tracemalloc.is_tracing()        #left running, someone else started it
+    finally:
+        tracemalloc.stop()
+    assert profiler.profiles[1].kinds["choose_toppings"]["calls"] == 2
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+import rescore
+from journal import read_journal, decision_journal, journals
+from scheduler import grid_jobs, play_jobs
+from utils import pizza_calculations
+from conftest import tournament_args
+
+multiplier, x, y = 40, 12*40, 10*40
+
+
+@pytest.fixture
+def journaled(tmp_path):
+    #a few tournament games written to a journal, and their outcomes
+    path = str(tmp_path/"games.pzj")
+    args = tournament_args("-p", "0,4", "-g_num", "0,4", "-num_top", "2,3", "-n", "2", "-jr", path)
+    jobs = grid_jobs([0, 4], [0, 4], [2, 3], range(2), {"seed": 40, "gen_100_seed": 40, "gen_10_seed": 45})
+    outcomes = list(play_jobs(jobs, args))
+    for journal in journals.values():
+        journal.close()
+    journals.clear()
+    return read_journal(path), outcomes
+
+
+def test_slice_areas_match_the_scalar_kernel():
+    rng = np.random.default_rng(3)
+    radius, angle = 5.9*np.sqrt(rng.random(200)), rng.random(200)*2*np.pi
+    centers_x, centers_y, thetas = radius*np.cos(angle), radius*np.sin(angle), rng.random(200)*2*np.pi
+    batched = pizza_calculations.batch_slice_areas(centers_x, centers_y, thetas)
+    calculator = pizza_calculations()
+    for number in range(200):
+        scalar = calculator.compute_slice_areas([x + centers_x[number]*multiplier, y - centers_y[number]*multiplier, thetas[number]], multiplier, x, y)
+        assert np.max(np.abs(batched[number] - np.asarray(scalar))) < 1e-10
+
+
+def test_journal_keeps_every_game(journaled):
+    games, outcomes = journaled
+    assert len(games) == len(outcomes) == 16
+    played = sorted((outcome["player"], outcome["generator"], outcome["num_toppings"], outcome["seed"]) for outcome in outcomes)
+    assert sorted((game["player"], game["generator"], game["num_toppings"], game["seed"]) for game in games) == played
+    for game in games:
+        assert game["pizzas"].shape == (10, 24, 3) and game["preferences"].shape == (10, 2, game["num_toppings"])
+        assert sorted(game["pizza_choice_order"]) == list(range(10))
+
+
+def test_rescore_reproduces_final_score(journaled):
+    games, outcomes = journaled
+    scores = rescore.rescore(games)
+    totals = rescore.game_totals(games, scores)
+    assert rescore.check(games, totals, len(games)) < 6e-14
+    by_game = {(outcome["player"], outcome["generator"], outcome["num_toppings"], outcome["seed"]): outcome["totals"] for outcome in outcomes}
+    for number, game in enumerate(games):
+        stored = by_game[(game["player"], game["generator"], game["num_toppings"], game["seed"])]
+        for name in ["B", "C", "S"]:
+            assert totals[name][number] == pytest.approx(stored[name], abs=1e-9)
+
+
+def test_rescore_in_chunks_is_the_same(journaled):
+    games, outcomes = journaled
+    whole = rescore.rescore(games)
+    chunked = rescore.rescore(games, chunk_size=7)
+    for name in whole:
+        assert np.array_equal(whole[name], chunked[name])
+
+
+def test_an_incomplete_last_record_is_ignored(tmp_path, journaled):
+    games, outcomes = journaled
+    path = str(tmp_path/"cut.pzj")
+    journal = decision_journal(path)
+    for game in games[:2]:
+        journal.append(game["player"], game["generator"], game["num_toppings"], game, game["preferences"], game["pizzas"],
+                       game["pizza_choice_order"], game["cuts"], game["multiplier"], game["x"], game["y"])
+    journal.close()
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 10)
+    assert len(read_journal(path)) == 1
@@ -0,0 +1,29 @@
+import os
+import numpy as np
+import pytest
+import results
+from conftest import run_main, run_script, run_tournament
+
+
+def test_the_summary_log_renders_from_the_record():
+    run_main("-p", "4", "-num_top", "3", "-log_f", "game.jsonl")
+    run_script("results.py", "game.jsonl", "-o", "rendered.txt")
+    with open("rendered.txt") as rendered, open("summary_log_nogui.txt") as written:
+        assert rendered.read() == written.read()
+
+
+def test_levels_keep_what_they_promise():
+    run_main("-p", "4", "-log", "summary", "-log_f", "summary.jsonl")
+    run_main("-p", "4", "-log", "full", "-log_f", "full.jsonl")
+    summary, full = results.read_records("summary.jsonl")[0], results.read_records("full.jsonl")[0]
+    assert summary["totals"] == full["totals"] and summary["run"] == full["run"]
+    assert "toppings" not in summary["customers"][0] and len(full["customers"][0]["toppings"]) == 24
+    assert [customer["S"] for customer in summary["customers"]] == pytest.approx([np.sum(customer["B"]) - np.sum(customer["C"]) for customer in full["customers"]], abs=1e-3)
+
+
+def test_a_tournament_logs_every_game():
+    run_tournament("-p", "0,4", "-g_num", "0", "-num_top", "2", "-n", "2", "-log_f", "games.jsonl", "-st", "t.sqlite")
+    records = results.read_records("games.jsonl")
+    assert sorted(record["run"]["player"] for record in records) == [0, 0, 4, 4]
+    run_tournament("-p", "4", "-g_num", "0", "-num_top", "2", "-n", "2", "-log_f", "game_{game}.jsonl", "-st", "other.sqlite")
+    assert sorted(name for name in os.listdir(".") if name.startswith("game_")) == ["game_1.jsonl", "game_2.jsonl"]
@@ -0,0 +1,39 @@
+import pytest
+import tournament
+from tournament_store import tournament_store
+from conftest import tournament_args, run_tournament, stored_games
+
+grid = ["-p", "0,4", "-g_num", "0,2,4", "-num_top", "2"]
+
+
+def test_a_resumed_tournament_plays_the_same_games():
+    run_tournament(*grid, "-n", "4", "-st", "whole.sqlite")
+    run_tournament(*grid, "-n", "2", "-st", "resumed.sqlite")
+    output = run_tournament(*grid, "-n", "4", "-st", "resumed.sqlite")
+    assert "12 games played" in output
+    assert stored_games("resumed.sqlite") == stored_games("whole.sqlite")
+    assert "0 games played" in run_tournament(*grid, "-n", "4", "-st", "resumed.sqlite")
+
+
+def test_other_players_do_not_change_the_games():
+    run_tournament(*grid, "-n", "2", "-st", "both.sqlite")
+    run_tournament("-p", "4", "-g_num", "0,2,4", "-num_top", "2", "-n", "2", "-st", "one.sqlite")
+    assert stored_games("one.sqlite") == [row for row in stored_games("both.sqlite") if row[0] == 4]
+
+
+def test_a_store_of_other_settings_is_refused():
+    args = tournament_args(*grid, "-n", "1", "-st", "t.sqlite")
+    base_seeds = tournament.tournament_grid(args)[3]
+    store, completed = tournament.open_store(args, base_seeds)
+    assert completed == set()
+    store.put(dict(player=0, generator=0, num_toppings=2, seed_index=0, seed=40, gen_100_seed=40, gen_10_seed=45, status="ok",
+                   wall=0.1, player_seconds=0.1, totals=None, record=None, tournament_result=None))
+    store.close()
+    args.num_pizzas = 5
+    with pytest.raises(SystemExit):
+        tournament.open_store(args, base_seeds)
+    args.fresh = "True"
+    store, completed = tournament.open_store(args, base_seeds)
+    assert completed == set()
+    store.close()
+    assert tournament_store("t.sqlite").completed() == set()
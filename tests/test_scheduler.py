@@ -0,0 +1,73 @@
+import pickle as pkl
+from scheduler import parse_values, job_seeds, grid_jobs, longest_first, play_jobs, cell_of
+from tournament_store import tournament_store
+from conftest import tournament_args, run_tournament, stored_games
+
+base_seeds = {"seed": 40, "gen_100_seed": 40, "gen_10_seed": 45}
+
+
+def test_parse_values():
+    assert parse_values("0,2-4, 6") == [0, 2, 3, 4, 6]
+    assert parse_values(3) == [3]
+
+
+def test_every_player_of_a_cell_gets_its_seeds():
+    jobs = grid_jobs([0, 1, 2], [0, 4], [2, 3], range(3), base_seeds)
+    assert len(jobs) == 3*2*2*3
+    for job in jobs:
+        assert {name: job[name] for name in base_seeds} == job_seeds(base_seeds, job["generator"], job["num_toppings"], job["seed_index"])
+    assert len(set((job["seed"], job["gen_100_seed"]) for job in jobs)) == 2*2*3
+
+
+def test_longest_first():
+    jobs = grid_jobs([0, 1, 2], [0], [2, 3], range(2), base_seeds)
+    latency = {(1, 3): 5.0, 1: 3.0, 0: 0.5}
+    ordered = longest_first(jobs, latency)
+    assert [(job["player"], job["num_toppings"]) for job in ordered[:2]] == [(1, 3), (1, 3)]
+    assert {job["player"] for job in ordered[2:8]} == {1, 2}        #unknown players count as the slowest known one
+    assert {job["player"] for job in ordered[8:]} == {0}
+    by_cell = longest_first(jobs, latency, by_cell=True)
+    cells = [cell_of(job) for job in by_cell]
+    assert all(cells[number:number + 3] == [cells[number]]*3 for number in range(0, len(cells), 3))
+
+
+def test_parallel_games_are_the_same_games():
+    args = tournament_args("-n", "2")
+    jobs = grid_jobs([0, 4], [0, 4], [2, 3], range(2), base_seeds)
+    one = {cell_of(outcome) + (outcome["player"],): (outcome["status"], outcome["totals"]) for outcome in play_jobs(jobs, args)}
+    two = {cell_of(outcome) + (outcome["player"],): (outcome["status"], outcome["totals"]) for outcome in play_jobs(jobs, args, 2)}
+    assert one == two and len(one) == len(jobs)
+
+
+def test_tournament_store_and_results(tmp_path):
+    output = run_tournament("-p", "0,4", "-g_num", "0,4", "-num_top", "2", "-n", "3", "-st", "t.sqlite")
+    assert "12 games played" in output
+    rows = stored_games("t.sqlite")
+    assert len(rows) == 12 and all(row[7] == "ok" for row in rows)
+    with open("tournament_results.pkl", "rb") as f:
+        results = pkl.load(f)
+    assert len(results[0]) == len(results[4]) == 6
+
+
+def test_a_failure_is_retried_once_then_kept(tmp_path):
+    store = tournament_store(str(tmp_path/"t.sqlite"))
+    job = grid_jobs([1], [1], [2], range(1), base_seeds)[0]
+    failed = dict(job, status="error: TypeError: no", wall=0.1, player_seconds=0.0, totals=None, record=None, tournament_result=None)
+    store.put(failed)
+    assert store.completed() == set()
+    store.put(dict(failed, status="error: TypeError: another"))
+    assert store.completed() == set()
+    store.put(dict(failed, status="error: TypeError: another"))
+    assert store.completed() == {(1, 1, 2, 0)}
+    assert store.games()[0]["status"] == "failed: TypeError: another"
+    assert store.scores() == {(1, 1, 2, 0): None}
+    store.put(dict(failed, status="error: TypeError: another", seed=failed["seed"] + 1))
+    assert store.games()[0]["status"].startswith("error")
+
+
+def test_deterministic_failures_are_not_replayed(tmp_path):
+    run_tournament("-p", "1", "-g_num", "1", "-num_top", "2", "-n", "2", "-st", "t.sqlite")
+    assert all(row[7].startswith("error") for row in stored_games("t.sqlite"))
+    run_tournament("-p", "1", "-g_num", "1", "-num_top", "2", "-n", "2", "-st", "t.sqlite")
+    assert all(row[7].startswith("failed") for row in stored_games("t.sqlite"))
+    assert "0 games played" in run_tournament("-p", "1", "-g_num", "1", "-num_top", "2", "-n", "2", "-st", "t.sqlite")
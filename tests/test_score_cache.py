@@ -0,0 +1,70 @@
+import numpy as np
+from utils import score_cache, pizza_calculations
+from conftest import seeded_game
+
+multiplier, x, y = 40, 12*40, 10*40
+
+
+def test_least_recently_used_entries_go_first():
+    cache = score_cache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0] and cache.get("c") == [3.0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_limit_evicts():
+    cache = score_cache(max_entries=100, max_bytes=3*8*10)
+    for number in range(10):
+        cache.put(number, np.zeros(8))
+    assert cache.stats()["bytes"] <= 3*8*10
+    assert cache.get(9) is not None and cache.get(0) is None
+
+
+def test_values_are_copied_both_ways():
+    cache = score_cache()
+    value = (np.ones((2, 3)), [[1.0, 2.0]])
+    cache.put("key", value)
+    value[0][0, 0] = 5
+    value[1][0][0] = 5
+    first = cache.get("key")
+    assert first[0][0, 0] == 1 and first[1][0][0] == 1.0
+    first[0][0, 0] = 7
+    assert cache.get("key")[0][0, 0] == 1
+
+
+def test_cut_keys_absorb_floating_point_noise():
+    cache = score_cache(quantum=1e-9)
+    cut = [x + 1.25*multiplier, y - 0.5*multiplier, 0.3]
+    noisy = [cut[0] + 1e-12, cut[1] - 1e-12, cut[2] + 1e-13]
+    assert cache.cut_key(cut, multiplier, x, y) == cache.cut_key(noisy, multiplier, x, y)
+    assert cache.cut_key([float("nan"), 0, 0], multiplier, x, y) is None
+
+
+def test_cached_kernels_return_what_they_compute():
+    pizza = np.zeros((24, 3))
+    pizza[:, :2] = pizza_calculations.place_toppings(24, np.random.default_rng(1))
+    pizza[:, 2] = np.arange(24)%3 + 1
+    calculator = pizza_calculations()
+    cuts = [[x + 2*multiplier, y - multiplier, 0.7], [x, y, 1.1], [x - 3*multiplier, y + 2*multiplier, 2.5]]
+    uncached = [(calculator.ratio_calculator(pizza, cut, 3, multiplier, x, y), calculator.slice_area_calculator(cut, multiplier, x, y)) for cut in cuts]
+    pizza_calculations.enable_cache()
+    for repeat in range(2):
+        for cut, (ratios, areas) in zip(cuts, uncached):
+            cached_ratios = calculator.ratio_calculator(pizza, cut, 3, multiplier, x, y)
+            assert np.array_equal(cached_ratios[0], ratios[0]) and np.array_equal(cached_ratios[1], ratios[1])
+            assert calculator.slice_area_calculator(cut, multiplier, x, y) == areas
+    assert pizza_calculations.cache.stats()["hits"] == 2*len(cuts)
+
+
+def test_games_play_the_same_with_the_cache():
+    plain = seeded_game(player=4, generator=4, num_toppings=3)
+    pizza_calculations.enable_cache()
+    cached = seeded_game(player=4, generator=4, num_toppings=3)
+    again = seeded_game(player=4, generator=4, num_toppings=3)
+    assert cached.totals == plain.totals == again.totals
+    assert np.array_equal(cached.cuts, plain.cuts)
+    assert pizza_calculations.cache.stats()["hits"] > 0
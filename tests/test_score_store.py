@@ -0,0 +1,77 @@
+import sqlite3
+import numpy as np
+import pytest
+from score_store import persistent_score_cache, pack_value, unpack_value
+from utils import pizza_calculations
+from conftest import seeded_game
+
+
+@pytest.mark.parametrize("value", [np.arange(6, dtype=np.float64).reshape(2, 3), [0.5, 1.5, 2.5],
+                                   (np.ones((2, 4)), np.zeros((8, 4))), ([[1.0, 2.0], [3.0, 4.0]], np.array([1e-300, -2.5]))])
+def test_values_round_trip_as_float_bytes(value):
+    layout, data = pack_value(value)
+    assert isinstance(data, bytes)
+    back = unpack_value(layout, data)
+    assert type(back) is type(value)
+    for part, original in zip(back if isinstance(value, tuple) else [back], value if isinstance(value, tuple) else [value]):
+        assert type(part) is type(original)
+        assert np.array_equal(np.asarray(part), np.asarray(original))
+
+
+def test_results_persist_across_stores(tmp_path):
+    path = str(tmp_path/"scores.db")
+    store = persistent_score_cache(path, settings=dict(kernels=1))
+    store.put(("ratio", "abc", (1, 2, 3), 3), (np.ones((2, 3)), np.zeros((8, 3))))
+    store.close()
+    again = persistent_score_cache(path, settings=dict(kernels=1))
+    ratios, amounts = again.get(("ratio", "abc", (1, 2, 3), 3))
+    assert np.array_equal(ratios, np.ones((2, 3))) and np.array_equal(amounts, np.zeros((8, 3)))
+    assert again.get(("ratio", "abc", (1, 2, 4), 3)) is None
+    assert again.stats()["hits"] == 1 and again.stats()["misses"] == 1
+    again.close()
+
+
+def test_other_settings_empty_the_store(tmp_path):
+    path = str(tmp_path/"scores.db")
+    store = persistent_score_cache(path, settings=dict(kernels=1))
+    store.put("key", [1.0])
+    store.close()
+    newer = persistent_score_cache(path, settings=dict(kernels=2))
+    assert newer.get("key") is None
+    newer.close()
+    assert dict(sqlite3.connect(path).execute("SELECT name, value FROM settings").fetchall())["kernels"] == "2"
+
+
+def test_stores_of_the_pickle_layout_start_over(tmp_path):
+    path = str(tmp_path/"old.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE scores (key TEXT PRIMARY KEY, value BLOB NOT NULL, used REAL NOT NULL)")
+    connection.execute("INSERT INTO scores VALUES ('''key''', x'80', 1)")
+    connection.commit()
+    connection.close()
+    store = persistent_score_cache(path, settings=dict(kernels=1))
+    assert store.get("key") is None
+    store.put("key", [2.0])
+    store.flush()
+    assert store.get("key") == [2.0]
+    store.close()
+
+
+def test_eviction_keeps_the_most_recently_used(tmp_path):
+    store = persistent_score_cache(str(tmp_path/"scores.db"), max_entries=10, flush_every=1)
+    for number in range(30):
+        store.put(number, [float(number)])
+    assert store.stats()["evictions"] >= 20
+    assert store.get(29) == [29.0] and store.get(0) is None
+    store.close()
+
+
+def test_games_play_the_same_from_the_store(tmp_path):
+    plain = seeded_game(player=4, generator=4, num_toppings=3)
+    store = pizza_calculations.attach_store(str(tmp_path/"scores.db"))
+    first = seeded_game(player=4, generator=4, num_toppings=3)
+    store.flush()
+    pizza_calculations.cache.clear()
+    second = seeded_game(player=4, generator=4, num_toppings=3)
+    assert first.totals == plain.totals == second.totals
+    assert store.stats()["hits"] > 0
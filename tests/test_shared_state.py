@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+import rescore
+from game import Game
+from journal import read_journal, journals
+from player_process import seeded_globals
+from scheduler import grid_jobs, play_jobs, share_inputs, attached_inputs
+from shared_state import shared_arena, attach, attached, detach_unused, alignment
+from conftest import tournament_args
+
+
+def test_arrays_come_back_read_only():
+    arrays = {"floats": np.arange(12.0).reshape(3, 4), "ints": np.arange(5, dtype=np.int32), "column": np.ones((4, 4))[:, 1]}
+    with shared_arena(4096) as arena:
+        handle = arena.put(arrays)
+        assert all(offset % alignment == 0 for offset, shape, dtype in handle[1].values())
+        views = attach(handle)
+        for name, array in arrays.items():
+            assert np.array_equal(views[name], array) and views[name].dtype == array.dtype
+            with pytest.raises(ValueError):
+                views[name][...] = 0
+        del views
+        detach_unused()
+    assert attached == {}
+
+
+def test_blocks_go_once_freed_and_passed():
+    with shared_arena(1024) as arena:
+        first = arena.put({"a": np.zeros(100)})
+        big = arena.put({"b": np.zeros(1000)})       #larger than a block, a block of its own
+        assert big[0] != first[0]
+        arena.free(first)
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=first[0])
+        arena.free(big)
+        assert big[0] in arena.blocks       #still the current block
+    assert arena.blocks == {}
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=big[0])
+
+
+def test_shared_inputs_play_the_same_game():
+    game = Game(player=4, generator=2, num_toppings=3, seed=9)
+    with seeded_globals(9):
+        inputs = game.generate_inputs()
+    with shared_arena() as arena:
+        shared = attached_inputs(share_inputs(arena, inputs))
+        assert np.array_equal(shared.preferences, inputs.preferences)
+        assert type(shared.preferences_100) is type(inputs.preferences_100)
+        assert np.array_equal(np.asarray(shared.preferences_100), np.asarray(inputs.preferences_100))
+        assert shared.random_state == inputs.random_state
+        assert all(np.array_equal(a, b) for a, b in zip(shared.np_random_state, inputs.np_random_state))
+        assert Game(player=4, generator=2, num_toppings=3, seed=9).run(shared).totals == Game(player=4, generator=2, num_toppings=3, seed=9).run(inputs).totals
+        del shared
+        detach_unused()
+
+
+def test_rescore_in_processes_is_the_same(tmp_path):
+    path = str(tmp_path/"games.pzj")
+    jobs = grid_jobs([0, 4], [0, 4], [2, 3], range(2), {"seed": 40, "gen_100_seed": 40, "gen_10_seed": 45})
+    list(play_jobs(jobs, tournament_args("-jr", path)))
+    for journal in journals.values():
+        journal.close()
+    journals.clear()
+    games = read_journal(path)
+    alone = rescore.rescore(games, chunk_size=30)
+    shared = rescore.rescore(games, processes=2, chunk_size=30)
+    for name in alone:
+        assert np.array_equal(alone[name], shared[name])
@@ -0,0 +1,57 @@
+import os
+import time
+from telemetry import tournament_telemetry, latency_histogram
+
+
+def metric(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + " ") or line.startswith(name + "{"):
+            return float(line.rsplit(" ", 1)[1])
+    raise KeyError(name)
+
+
+def job(seed_index):
+    return dict(player=0, generator=1, num_toppings=2, seed_index=seed_index)
+
+
+def test_games_in_progress_count_from_dispatch(tmp_path):
+    telemetry = tournament_telemetry(str(tmp_path/"t.prom"), 4, flush_seconds=60, slots=2)
+    telemetry.game_started(job(0))
+    telemetry.game_started(job(1))
+    telemetry.game_started(job(2))       #queued behind the two slots
+    time.sleep(0.05)
+    text = telemetry.render()
+    assert metric(text, "pizza_tournament_games_running") == 2
+    assert metric(text, "pizza_tournament_longest_running_seconds") >= 0.05
+    assert metric(text, "pizza_tournament_utilization_ratio") > 0
+    telemetry.game_finished(0, [0.01, 0.02], worker=7, game_seconds=None, job=job(0))
+    assert telemetry.workers["7"]["busy"] >= 0.05
+    assert len(telemetry.running) == 2
+    telemetry.game_finished(0, [], worker=7, game_seconds=0.5, job=job(1))
+    assert telemetry.workers["7"]["games"] == 2 and telemetry.completed() == 2
+
+
+def test_the_file_is_written_while_games_run(tmp_path):
+    path = str(tmp_path/"t.prom")
+    telemetry = tournament_telemetry(path, 10, flush_seconds=0.05).start()
+    telemetry.game_started(job(0))
+    deadline = time.time() + 5
+    while not os.path.exists(path) and time.time() < deadline:
+        time.sleep(0.01)
+    with open(path) as f:
+        assert metric(f.read(), "pizza_tournament_games_running") == 1
+    telemetry.game_finished(0, [0.1], job=job(0))
+    telemetry.close()
+    with open(path) as f:
+        text = f.read()
+    assert text.endswith("# EOF\n")
+    assert metric(text, 'pizza_tournament_games_total{player="0"}') == 1
+    assert not telemetry.thread.is_alive()
+
+
+def test_histogram_quantiles_stay_within_the_samples():
+    histogram = latency_histogram()
+    for seconds in [0.001]*90 + [0.5]*10:
+        histogram.observe(seconds)
+    assert histogram.quantile(0.5) <= 0.0015
+    assert 0.1 < histogram.quantile(0.99) <= 0.5
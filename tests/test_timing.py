@@ -0,0 +1,26 @@
+import json
+from instrumentation import phase_timer
+from conftest import run_main
+
+
+def test_a_game_reports_its_phases():
+    output = run_main("-p", "4", "-num_top", "3", "-tm", "timing.json")
+    assert "Timing : " in output
+    with open("timing.json") as f:
+        report = json.load(f)
+    assert report["run"]["player"] == 4 and report["run"]["num_toppings"] == 3
+    assert list(report["phases"]) == ["setup", "customer_gen", "choose_toppings", "validate", "choose_and_cut", "final_score", "see_score"]
+    assert report["phases"]["choose_and_cut"]["calls"] == 10
+    cuts = [call for call in report["calls"] if call["phase"] == "choose_and_cut"]
+    assert [call["customer"] for call in cuts] == list(range(1, 11))
+    assert sorted(call["pizza_id"] for call in cuts) == list(range(10))
+    assert sum(total["wall"] for total in report["phases"].values()) <= report["total"]["wall"]
+
+
+def test_a_disabled_timer_records_nothing():
+    timer = phase_timer(enabled=False)
+    with timer.phase("choose_and_cut", customer=1) as first:
+        first.info["pizza_id"] = 3
+    with timer.phase("choose_and_cut", customer=2) as second:
+        assert second.info == {}
+    assert timer.calls == [] and timer.phase_totals() == {}
@@ -0,0 +1,49 @@
+import json
+from tracing import trace_recorder
+from conftest import run_tournament
+
+
+def read_trace(path):
+    #the file as a trace viewer reads it, the array left open
+    with open(path) as f:
+        return json.loads(f.read().rstrip().rstrip(",") + "]")
+
+
+def test_sampled_games_and_merged_kernels(tmp_path):
+    path = str(tmp_path/"trace.json")
+    recorder = trace_recorder(path, sample_every=2, merge_gap=0.5)
+    for game in range(4):
+        if recorder.begin_game(player=game):
+            recorder.kernel("ratio_calculator", 1.0, 1.1)
+            recorder.kernel("slice_area_calculator", 1.2, 1.3)
+            recorder.kernel("ratio_calculator", 3.0, 3.1)
+            recorder.span("choose_and_cut", 3.5, 0.1, {"customer": 1})
+        recorder.end_game()
+    recorder.close()
+    events = read_trace(path)
+    assert [event["args"]["player"] for event in events if event["name"] == "game"] == [0, 2]
+    kernels = [event for event in events if event.get("cat") == "kernel"]
+    assert [event["name"] for event in kernels] == ["ratio_calculator+slice_area_calculator", "ratio_calculator"]*2
+    assert kernels[0]["args"] == {"ratio_calculator": 1, "slice_area_calculator": 1}
+    assert abs(kernels[0]["dur"] - 0.3e6) < 1e-3
+
+
+def test_tracing_stops_at_max_events(tmp_path):
+    path = str(tmp_path/"trace.json")
+    recorder = trace_recorder(path, sample_every=1, max_events=5)
+    for game in range(4):
+        recorder.begin_game()
+        recorder.span("choose_toppings", 0.0, 0.1)
+        recorder.end_game()
+    recorder.close()
+    assert len([event for event in read_trace(path) if event["ph"] == "X"]) == 5
+
+
+def test_every_worker_gets_a_lane():
+    run_tournament("-p", "0,4", "-g_num", "0", "-num_top", "2", "-n", "3", "-j", "2", "-tr", "trace.json", "-tr_every", "1", "-st", "t.sqlite")
+    events = read_trace("trace.json")
+    games = [event for event in events if event["name"] == "game"]
+    assert len(games) == 6
+    lanes = {event["pid"] for event in events if event["ph"] == "M"}
+    assert {event["pid"] for event in games} <= lanes
+    assert {"choose_toppings", "choose_and_cut"} <= {event["name"] for event in events}
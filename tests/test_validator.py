@@ -0,0 +1,33 @@
+import numpy as np
+from utils import pizza_calculations
+
+
+def clash_loop(pizzas):
+    #the per topping checks validate_pizzas replaced
+    return any(pizza_calculations.clash_exists(pizza[number][0], pizza[number][1], pizza, number) for pizza in pizzas for number in range(len(pizza)))
+
+
+def test_valid_is_what_clash_exists_says():
+    rng = np.random.default_rng(2)
+    verdicts = []
+    for seed in range(100):
+        pizza = np.zeros((1, 24, 3))
+        pizza[0, :, :2] = pizza_calculations.place_toppings(24, np.random.default_rng(seed))
+        pizza[0, rng.integers(24), :2] += rng.normal(0, 1, 2)      #one topping moved, onto another or off the pizza now and then
+        verdicts.append(pizza_calculations.validate_pizzas(pizza)["valid"])
+        assert verdicts[-1] == (not clash_loop(pizza))
+    assert 10 < sum(verdicts) < 90
+
+
+def test_problems_are_reported():
+    pizzas = np.stack([np.concatenate([pizza_calculations.place_toppings(24, np.random.default_rng(seed)), np.ones((24, 1))], axis=1) for seed in range(3)])
+    assert pizza_calculations.validate_pizzas(pizzas) == {"valid": True, "boundary": [], "clashes": []}
+    pizzas[1, 5, :2] = [5.9, 0]
+    pizzas[2, 7, :2] = pizzas[2, 3, :2] + [0.5, 0]
+    report = pizza_calculations.validate_pizzas(pizzas, max_pairs=600)
+    assert not report["valid"]
+    assert [entry[:2] for entry in report["boundary"]] == [(1, 5)] and abs(report["boundary"][0][2] - 0.275) < 1e-12
+    assert (2, 3, 7) in [entry[:3] for entry in report["clashes"]]
+    assert abs(dict(((i, j, k), overlap) for i, j, k, overlap in report["clashes"])[(2, 3, 7)] - 0.25) < 1e-12
+    lines = pizza_calculations.describe_placement(report)
+    assert "Pizza 1 : topping 5 sticks out of the pizza by 0.275" in lines
@@ -0,0 +1,30 @@
+import os
+import work_queue
+from conftest import run_tournament, stored_games
+
+grid = ["-p", "0,4", "-g_num", "0,2,4", "-num_top", "2", "-n", "3"]
+
+
+def test_a_queued_tournament_plays_the_same_games():
+    run_tournament(*grid, "-st", "direct.sqlite")
+    output = run_tournament(*grid, "-st", "queued.sqlite", "-q", "queue", "-sh", "5")
+    assert "18 jobs written to queue in 4 shards" in output
+    assert work_queue.status("queue") == dict(pending=4, claimed=0, done=0, results=0)
+    assert work_queue.work("queue") == 4
+    assert work_queue.status("queue") == dict(pending=0, claimed=0, done=4, results=4)
+    work_queue.merge("queue")
+    assert stored_games("queued.sqlite") == stored_games("direct.sqlite")
+    assert os.path.exists("tournament_results.pkl")
+
+
+def test_a_shard_of_a_dead_worker_is_played_again():
+    run_tournament(*grid, "-st", "direct.sqlite")
+    run_tournament(*grid, "-st", "queued.sqlite", "-q", "queue", "-sh", "10")
+    name, path = work_queue.claim("queue")
+    assert work_queue.status("queue")["claimed"] == 1
+    assert work_queue.requeue_stale("queue", 60) == 0
+    os.utime(path, (0, 0))
+    assert work_queue.work("queue", stale_seconds=60) == 2
+    assert work_queue.status("queue") == dict(pending=0, claimed=0, done=2, results=2)
+    work_queue.merge("queue", "merged.sqlite")
+    assert stored_games("merged.sqlite") == stored_games("direct.sqlite")
@@ -1,6 +1,17 @@
-from pizza_no_gui import no_gui
+import os
+import sys
+import json
+import time
 import argparse
 import pickle as pkl
+import numpy as np
+from game import player_classes
+import constants as constants
+from scheduler import parse_values, job_for, grid_jobs, longest_first, play_jobs
+from adaptive import adaptive_tournament, play_rounds
+from tournament_store import tournament_store
+from telemetry import tournament_telemetry
+from tracing import tracer_for
 
 
 parser = argparse.ArgumentParser()
@@ -10,17 +21,163 @@ parser.add_argument("--seed", "-s", default=40, help="General seed for your own
 parser.add_argument("--gen_100_seed", "-s100", default=40, help="Seed for generating 100 preferences")
 parser.add_argument("--gen_10_seed", "-s10", default=45, help="Seed for generating 10 preferences")
 #parser.add_argument("--autoplayer_number", "-a_num", default=0, help="Which player is the autoplayer")
-parser.add_argument("--generator_number", "-g_num", default=0, help="Which player is the preference generator")
-parser.add_argument("--player", "-p", default=0, help="Team number playing the game if no gui")
-parser.add_argument("--num_toppings", "-num_top", default=2, help="Total different types of toppings")
+parser.add_argument("--generator_number", "-g_num", default="0", help="Preference generators, comma separated values and lo-hi ranges")
+parser.add_argument("--player", "-p", default="0", help="Players, comma separated values and lo-hi ranges (e.g. 0-6)")
+parser.add_argument("--num_toppings", "-num_top", default="2", help="Topping counts, comma separated values and lo-hi ranges")
+parser.add_argument("--num_pizzas", "-num_piz", default=10, help="Number of pizzas made (and customers served) in a game, if no gui")
+parser.add_argument("--toppings_per_pizza", "-top_pp", default=24, help="Toppings placed on every pizza, if no gui")
 parser.add_argument("--tournament", "-tmnt", default=True, help="Is this a tournament run or not")
-args = parser.parse_args()
-args.tournament = True
+parser.add_argument("--cache", "-cache", default="False", help="Cache cut scores in memory (constants.ratio_cache_size entries), -sc turns it on too")
+parser.add_argument("--score_cache", "-sc", default=None, help="SQLite file caching cut scores across runs and processes")
+parser.add_argument("--timing", "-tm", default=None, help="JSON file receiving per phase wall/cpu timings of no gui runs")
+parser.add_argument("--trace", "-tr", default=None, help="Chrome trace-event JSON file receiving a timeline of no gui games")
+parser.add_argument("--trace_every", "-tr_every", default=None, help="Trace one game in this many (default constants.trace_sample_every)")
+parser.add_argument("--profile", "-prof", default=None, help="Directory receiving per player cProfile/tracemalloc reports of the player calls, if no gui")
+parser.add_argument("--log_level", "-log", default="summary", help="Game results kept: none, summary or full")
+parser.add_argument("--log_file", "-log_f", default=None, help="JSONL file receiving one result record per game (use {game} in the name for one file per game)")
+parser.add_argument("--journal", "-jr", default=None, help="Binary decision journal receiving the inputs and cuts of every game, for rescore.py")
+parser.add_argument("--out_of_process", "-op", default="False", help="Run the generator and the player in a separate, reused process that is killed when a call runs past its deadline")
+parser.add_argument("--player_timeout", "-pt", default=None, help="Seconds for choose_toppings and all choose_and_cut calls of a game (default no limit). When given, anytime players stop searching in time, and a call past it fails the game with a timeout, killed with -op")
+parser.add_argument("--async_games", "-as", default=None, help="Play this many games at once from this one process, each with a player process of its own (out of process, -j is ignored)")
+parser.add_argument("--games", "-n", default=5000, help="Games (seeds) played in every player, generator and topping count cell")
+parser.add_argument("--processes", "-j", default=1, help="Games played in parallel")
+parser.add_argument("--store", "-st", default="tournament.sqlite", help="SQLite store receiving every game, keyed by player, generator, toppings and seed index. A tournament restarted on the same store only plays the games it is missing")
+parser.add_argument("--common_inputs", "-crn", default="False", help="Generate the customers of every generator, toppings and seed once and give them to every player")
+parser.add_argument("--adaptive", "-ad", default="False", help="Play seeds in rounds, only for players whose leaderboard place is uncertain, and stop when adjacent players are separated (-n is then the most seeds per cell)")
+parser.add_argument("--confidence", "-conf", default=None, help="Confidence level of an adaptive tournament (default constants.adaptive_confidence)")
+parser.add_argument("--budget", "-b", default=None, help="Most games an adaptive tournament plays")
+parser.add_argument("--adaptive_report", "-ad_o", default=None, help="JSON file receiving the leaderboard and confidence intervals of an adaptive tournament")
+parser.add_argument("--fresh", "-fr", default="False", help="Discard the games already in the store and start over")
+parser.add_argument("--telemetry", "-tel", default=None, help="OpenMetrics file with progress, throughput and latency of the tournament, rewritten every few seconds")
+parser.add_argument("--queue", "-q", default=None, help="Write the jobs as shards to this shared directory for work_queue.py workers instead of playing them")
+parser.add_argument("--shard_size", "-sh", default=None, help="Jobs per shard of a queue (default constants.queue_shard_size)")
 
-a = [[],[],[],[],[],[]]
-with open("tournament_results.pkl", "wb") as fp:
-    pkl.dump(a, fp)
 
-for i in range(5000): #placeholder for whatever tournament conditions we have.
-    instance = no_gui(args)
-    instance.run()
\ No newline at end of file
+def tournament_grid(args):
+    #players, generators, topping counts, tournament seeds and every job of the grid
+    base_seeds = {"seed": int(args.seed), "gen_100_seed": int(args.gen_100_seed), "gen_10_seed": int(args.gen_10_seed)}
+    players, generators, toppings = parse_values(args.player), parse_values(args.generator_number), parse_values(args.num_toppings)
+    return players, generators, toppings, base_seeds, grid_jobs(players, generators, toppings, range(int(args.games)), base_seeds)
+
+
+def open_store(args, base_seeds):
+    """The store of the tournament, checked against its settings
+
+    Returns:
+        store(tournament_store)
+        completed(set) : coordinates of the jobs that need not be played again
+    """
+    store = tournament_store(args.store)
+    if str(args.fresh) == "True":
+        store.clear()
+    settings = dict(base_seeds, num_pizzas=int(args.num_pizzas), toppings_pp=int(args.toppings_per_pizza), interface_size=int(args.interface_size),
+                    player_timeout=float(args.player_timeout) if args.player_timeout is not None else None)     #None : no deadline
+    mismatched = store.check_settings(settings)
+    if mismatched:
+        sys.exit(args.store + " holds a tournament played with other " + ", ".join(mismatched) + ". Use another store, or -fr True to start over.")
+    return store, store.completed()
+
+
+def write_results(store, grid):
+    """Writes tournament_results.pkl from the store and prints a per player summary
+
+    The results of the whole grid come from the store, whichever run or worker played them:
+    one list of games per player slot, in grid order.
+    """
+    games = store.games(grid)
+    a = [[] for player in player_classes]
+    for game in games:
+        if game["result"] is not None:
+            a[game["player"]].append(game["result"])
+    with open("tournament_results.pkl", "wb") as fp:
+        pkl.dump(a, fp)
+
+    print(f"{len(games)} of {len(grid)} games in {store.path}")
+    for player in sorted(set(game["player"] for game in games)):
+        games_of_player = [game for game in games if game["player"] == player]
+        scored = [game["totals"]["S"] for game in games_of_player if game["totals"] is not None]
+        line = f"player {player} : {len(games_of_player)} games, mean wall {np.mean([game['wall'] for game in games_of_player]):.3f}s"
+        if scored:
+            line = line + f", mean S {np.mean(scored):.3f}"
+        failed = len([game for game in games_of_player if game["status"].startswith("error")])
+        final = len([game for game in games_of_player if game["status"].startswith("failed")])
+        timed_out = len([game for game in games_of_player if game["status"].startswith("timeout")])
+        if len(scored) < len(games_of_player) - failed - final - timed_out:
+            line = line + f", {len(games_of_player) - failed - final - timed_out - len(scored)} not served"
+        if timed_out:
+            line = line + f", {timed_out} timed out"
+        if failed:
+            line = line + f", {failed} failed (played again on restart)"
+        if final:
+            line = line + f", {final} failed twice the same way (not played again)"
+        print(line)
+    return games
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    args.tournament = True
+
+    players, generators, toppings, base_seeds, grid = tournament_grid(args)
+    adaptive = str(args.adaptive) == "True"
+    store, completed = open_store(args, base_seeds)
+    jobs = [job for job in grid if (job["player"], job["generator"], job["num_toppings"], job["seed_index"]) not in completed]
+    resuming = len(jobs) < len(grid)
+    if resuming:
+        print(f"Resuming from {args.store} : {len(grid) - len(jobs)} of {len(grid)} games already played")
+    budget = int(args.budget) if args.budget is not None else len(grid)
+    if args.queue:
+        from work_queue import write_shards
+        if adaptive:
+            sys.exit("Adaptive tournaments decide their next games as they go, they cannot be queued.")
+        shards = write_shards(args.queue, longest_first(jobs, store.latency(), str(args.common_inputs) == "True"), args)
+        print(f"{len(jobs)} jobs written to {args.queue} in {shards} shards. Run python work_queue.py work {args.queue} on any number of workers, then python work_queue.py merge {args.queue}")
+        sys.exit()
+    if args.async_games and (args.trace or args.profile):
+        sys.exit("Async games are played together in one process, they cannot be traced or profiled.")
+
+    telemetry = tournament_telemetry(args.telemetry, budget if adaptive else len(jobs), slots=int(args.async_games or args.processes)).start() if args.telemetry else None
+    if not resuming and args.log_file and "{game}" not in args.log_file and os.path.exists(args.log_file):
+        os.remove(args.log_file)    #a new tournament starts a new log
+    if args.trace:
+        tracer_for(args.trace, args.trace_every, fresh=not resuming)    #the games append to the trace file
+    latency = store.latency()
+    played = 0
+
+    def play(jobs):
+        #plays jobs longest first, each finished game goes to the store before anything else sees it
+        global played
+        started = telemetry.game_started if telemetry is not None else None
+        if args.async_games:
+            from async_runner import play_jobs_async
+            outcomes = play_jobs_async(longest_first(jobs, latency, str(args.common_inputs) == "True"), args, int(args.async_games), str(args.common_inputs) == "True", started)
+        else:
+            outcomes = play_jobs(longest_first(jobs, latency, str(args.common_inputs) == "True"), args, int(args.processes), str(args.common_inputs) == "True", started)
+        for outcome in outcomes:
+            store.put(outcome)
+            played = played + 1
+            if telemetry is not None:
+                telemetry.game_finished(outcome["player"], outcome["call_seconds"], outcome["worker"], outcome["wall"], outcome)
+            yield outcome
+
+    start = time.perf_counter()
+    if adaptive:
+        confidence = float(args.confidence) if args.confidence is not None else constants.adaptive_confidence
+        board = adaptive_tournament(players, confidence, constants.adaptive_min_games)
+        cells = [(generator, num_toppings, seed_index) for seed_index in range(int(args.games)) for generator in generators for num_toppings in toppings]
+        counted = play_rounds(board, cells, lambda player, cell: job_for(player, *cell, base_seeds), play, constants.adaptive_round_cells, budget, store.scores())
+    else:
+        for outcome in play(jobs):
+            pass
+    if telemetry is not None:
+        telemetry.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"{played} games played in {elapsed:.1f}s")
+    write_results(store, grid)
+    if adaptive:
+        print(f"\nAdaptive tournament: {counted} games of a {budget} game budget ({len(grid)} in the full grid)")
+        print(board.report())
+        if args.adaptive_report:
+            with open(args.adaptive_report, "w") as f:
+                json.dump(dict(board.to_dict(), games=counted, budget=budget, grid=len(grid)), f, indent=1)
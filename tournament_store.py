@@ -0,0 +1,112 @@
+import json
+import time
+import pickle as pkl
+import sqlite3
+from instrumentation import to_json
+
+
+class tournament_store():
+    """SQLite store of tournament games, one row per job keyed by its coordinates
+
+    A job is (player, generator, num_toppings, seed_index). Every finished job is committed on its own, so a
+    tournament that dies keeps the games it finished, and a restart only plays the jobs missing or failed.
+    Playing a job again replaces its row. A game that raises is played once more: when it raises the same
+    error again from the same seeds, it is stored as failed and counts as played. The settings that change what a job plays (tournament seeds, shop size)
+    are kept in the store, and a store refuses to resume a tournament with other settings.
+
+    Args:
+        path(str) : sqlite file, created if missing
+    """
+    columns = ["player", "generator", "num_toppings", "seed_index", "seed", "gen_100_seed", "gen_10_seed", "status", "wall", "player_seconds", "totals", "record", "result", "finished"]
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS games (player INTEGER, generator INTEGER, num_toppings INTEGER, seed_index INTEGER, "
+                                "seed INTEGER, gen_100_seed INTEGER, gen_10_seed INTEGER, status TEXT, wall REAL, player_seconds REAL, "
+                                "totals TEXT, record TEXT, result BLOB, finished REAL, PRIMARY KEY (player, generator, num_toppings, seed_index))")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def check_settings(self, settings):
+        """Records the settings of a new store, or checks they match those of the tournament it holds
+
+        Returns:
+            mismatched(list) : names of the settings that differ, empty when the tournament can be resumed
+        """
+        stored = dict(self.connection.execute("SELECT name, value FROM settings").fetchall())
+        if not stored:
+            self.connection.executemany("INSERT INTO settings (name, value) VALUES (?, ?)", [(name, json.dumps(value)) for name, value in settings.items()])
+            return []
+        return sorted(name for name in set(stored) | set(settings) if name not in stored or name not in settings or json.loads(stored[name]) != settings[name])
+
+    def clear(self):
+        self.connection.execute("DELETE FROM games")
+        self.connection.execute("DELETE FROM settings")
+
+    def completed(self):
+        #coordinates of the jobs that need not be played again, games that raised are played again
+        rows = self.connection.execute("SELECT player, generator, num_toppings, seed_index FROM games WHERE status NOT LIKE 'error%'")
+        return set(rows.fetchall())
+
+    def scores(self):
+        #total S (None when not served) of the completed jobs, by coordinates
+        rows = self.connection.execute("SELECT player, generator, num_toppings, seed_index, totals FROM games WHERE status NOT LIKE 'error%'")
+        return {tuple(row[:4]): (json.loads(row[4]) or {}).get("S") for row in rows}
+
+    def put(self, outcome):
+        """Stores a finished job
+
+        Args:
+            outcome(dict) : job coordinates and seeds, status, wall, player_seconds, totals, record (summary level)
+                            and tournament_result (the pickle entry of the game)
+        """
+        row = [outcome[name] for name in self.columns[:10]]
+        if outcome["status"].startswith("error: ") and self.failed_before(outcome):
+            row[7] = "failed: " + outcome["status"][len("error: "):]      #would fail the same way on every restart
+        row = row + [json.dumps(outcome["totals"], default=to_json), json.dumps(outcome["record"], default=to_json),
+                     pkl.dumps(outcome["tournament_result"], protocol=pkl.HIGHEST_PROTOCOL), time.time()]
+        self.connection.execute("INSERT OR REPLACE INTO games (" + ", ".join(self.columns) + ") VALUES (" + ", ".join("?"*len(self.columns)) + ")", row)
+
+    def failed_before(self, outcome):
+        #whether the stored game of the job raised the same error from the same seeds
+        stored = self.connection.execute("SELECT seed, gen_100_seed, gen_10_seed, status FROM games WHERE player = ? AND generator = ? AND num_toppings = ? AND seed_index = ?",
+                                         [outcome[name] for name in self.columns[:4]]).fetchone()
+        return stored is not None and list(stored) == [outcome[name] for name in self.columns[4:8]]
+
+    def games(self, jobs=None):
+        """Stored games as dicts, in job order
+
+        Args:
+            jobs(list) : only the games of these jobs (grid_jobs entries), all games when None
+        """
+        rows = self.connection.execute("SELECT " + ", ".join(self.columns) + " FROM games ORDER BY player, generator, num_toppings, seed_index").fetchall()
+        wanted = None if jobs is None else set((job["player"], job["generator"], job["num_toppings"], job["seed_index"]) for job in jobs)
+        games = []
+        for row in rows:
+            if wanted is not None and tuple(row[:4]) not in wanted:
+                continue
+            game = dict(zip(self.columns, row))
+            game["totals"] = json.loads(game["totals"]) if game["totals"] else None
+            game["record"] = json.loads(game["record"]) if game["record"] else None
+            game["result"] = pkl.loads(game["result"]) if game["result"] is not None else None
+            games.append(game)
+        return games
+
+    def latency(self):
+        """Mean wall time of the games already played
+
+        Returns:
+            seconds(dict) : (player, num_toppings) -> mean seconds, and player -> mean seconds over all topping counts
+        """
+        seconds = {}
+        for player, num_toppings, wall in self.connection.execute("SELECT player, num_toppings, AVG(wall) FROM games WHERE status = 'ok' GROUP BY player, num_toppings"):
+            seconds[(player, num_toppings)] = wall
+        for player, wall in self.connection.execute("SELECT player, AVG(wall) FROM games WHERE status = 'ok' GROUP BY player"):
+            seconds[player] = wall
+        return seconds
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import constants as constants
+from instrumentation import to_json
+
+
+class trace_recorder():
+    """Chrome trace-event (JSON array format) writer for games
+
+    Spans are complete ("X") events in microseconds, with the process id as pid so every tournament
+    worker gets its own lane in the viewer. Events of a game are buffered and appended to the file in
+    one write when the game ends, so several worker processes can append to the same file. The
+    closing bracket of the array is never written, trace viewers accept the file as it is.
+
+    Calls to the ratio/slice area kernels come in thousands per customer, so kernel calls less than
+    merge_gap seconds apart are merged into one batch span, named after the kernels it contains and
+    counting the calls of each.
+
+    Args:
+        path(str) : trace file
+        sample_every(int) : trace one game in sample_every
+        max_events(int) : events written by this process before tracing stops, None for no limit
+        merge_gap(float) : largest pause (s) between kernel calls that still extends the current batch
+        fresh(bool) : start a new file instead of appending to an existing one
+    """
+    def __init__(self, path, sample_every=None, max_events=None, merge_gap=None, fresh=False):
+        self.path = path
+        self.sample_every = max(1, int(constants.trace_sample_every if sample_every is None else sample_every))
+        self.max_events = constants.trace_max_events if max_events is None else max_events
+        self.merge_gap = constants.trace_merge_gap if merge_gap is None else merge_gap
+        self.pid = os.getpid()
+        self.games = 0
+        self.written = 0
+        self.events = []
+        self.batch = None       #[start, end, {kernel: calls}] of the kernel batch being extended
+        self.tracing = False
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        header = "[\n" if os.fstat(self.fd).st_size == 0 else ""
+        os.write(self.fd, (header + self.encode({"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "worker " + str(self.pid)}})).encode())
+
+    @staticmethod
+    def encode(event):
+        return json.dumps(event, separators=(",", ":"), default=to_json) + ",\n"
+
+    def begin_game(self, **info):
+        #Decides whether this game is sampled, returns True when it is traced
+        self.tracing = self.games % self.sample_every == 0 and (self.max_events is None or self.written < self.max_events)
+        self.games = self.games + 1
+        self.game_info = dict(info, game=self.games)
+        self.game_start = time.perf_counter()
+        return self.tracing
+
+    def end_game(self):
+        if not self.tracing:
+            return
+        self.span("game", self.game_start, time.perf_counter() - self.game_start, self.game_info)
+        self.close_batch()
+        events = self.events
+        if self.max_events is not None:
+            events = events[:max(0, self.max_events - self.written)]
+        os.write(self.fd, "".join(self.encode(event) for event in events).encode())
+        self.written = self.written + len(events)
+        self.events = []
+        self.tracing = False
+
+    def span(self, name, start, duration, info=None, category="game"):
+        #start and duration in seconds (perf_counter clock)
+        if not self.tracing:
+            return
+        self.close_batch()
+        event = {"name": name, "cat": category, "ph": "X", "ts": start*1e6, "dur": duration*1e6, "pid": self.pid, "tid": self.pid}
+        if info:
+            event["args"] = info
+        self.events.append(event)
+
+    def kernel(self, name, start, end):
+        if not self.tracing:
+            return
+        batch = self.batch
+        if batch is not None and start - batch[1] <= self.merge_gap:
+            batch[1] = end
+            batch[2][name] = batch[2].get(name, 0) + 1
+            return
+        self.close_batch()
+        self.batch = [start, end, {name: 1}]
+
+    def close_batch(self):
+        if self.batch is not None:
+            start, end, calls = self.batch
+            self.batch = None
+            self.events.append({"name": "+".join(sorted(calls)), "cat": "kernel", "ph": "X", "ts": start*1e6, "dur": (end - start)*1e6, "pid": self.pid, "tid": self.pid, "args": calls})
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+tracers = {}
+
+
+def tracer_for(path, sample_every=None, fresh=False):
+    #One recorder per trace file and process, shared by all the games this process plays
+    key = (path, os.getpid())
+    if key not in tracers:
+        tracers[key] = trace_recorder(path, sample_every, fresh=fresh)
+    return tracers[key]
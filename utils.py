@@ -3,18 +3,210 @@ import numpy as np
 import constants
 import copy
 import math
+import hashlib
+import time
+from collections import OrderedDict
+from score_store import persistent_score_cache
 import shapely
 from shapely.geometry import LineString, Point
 
+class score_cache():
+    """Bounded LRU cache for ratio_calculator and slice_area_calculator results
+
+    Args:
+        max_entries(int) : maximum number of cached results
+        max_bytes(int) : optional maximum number of bytes held by the cached results
+        quantum(float) : resolution (inches/radians) at which cuts are considered the same
+    """
+    def __init__(self, max_entries=65536, max_bytes=None, quantum=1e-9):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.quantum = quantum
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store = None       #optional persistent_score_cache consulted on misses and written through on puts
+
+    def cut_key(self, cut, multiplier, x, y):
+        #Cut in pizza units, quantized so that floating point noise maps to the same entry. None if the cut is not finite
+        values = [(cut[0]-x)/multiplier, -(cut[1]-y)/multiplier, cut[2]]
+        if not all(math.isfinite(v) for v in values):
+            return None
+        return tuple(int(round(v/self.quantum)) for v in values)
+
+    @staticmethod
+    def copy_value(value):
+        #Results are lists/arrays the callers may modify, so both directions hand out copies
+        if isinstance(value, np.ndarray):
+            return value.copy()
+        if isinstance(value, tuple):
+            return tuple(score_cache.copy_value(v) for v in value)
+        if isinstance(value, list):
+            if value and isinstance(value[0], list):     #topping_amts, a list of 8 lists of floats
+                return [row[:] for row in value]
+            return value[:]
+        return value
+
+    @staticmethod
+    def value_size(value):
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (list, tuple)):
+            return 8*len(value) + sum(score_cache.value_size(v) for v in value)
+        return 8
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits = self.hits + 1
+            return self.copy_value(self.entries[key][0])
+        self.misses = self.misses + 1
+        if self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self.remember(key, value)
+                return self.copy_value(value)
+        return None
+
+    def put(self, key, value):
+        self.remember(key, value)
+        if self.store is not None:
+            self.store.put(key, value)
+
+    def remember(self, key, value):
+        if key in self.entries:
+            self.nbytes = self.nbytes - self.entries.pop(key)[1]
+        size = self.value_size(value)
+        self.entries[key] = (self.copy_value(value), size)
+        self.nbytes = self.nbytes + size
+        while len(self.entries) > self.max_entries or (self.max_bytes is not None and self.nbytes > self.max_bytes and len(self.entries) > 1):
+            old_key, (old_value, old_size) = self.entries.popitem(last=False)
+            self.nbytes = self.nbytes - old_size
+            self.evictions = self.evictions + 1
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {"entries": len(self.entries), "bytes": self.nbytes, "hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hits/lookups if lookups else 0.0}
+        if self.store is not None:
+            stats["store"] = self.store.stats()
+        return stats
+
+    def stats_since(self, before):
+        #stats of the lookups made since stats() returned before (entries and bytes as they are now), what one game did
+        stats = lookups_since(self.stats(), before)
+        if "store" in stats:
+            stats["store"] = lookups_since(stats["store"], before.get("store", {}))
+        return stats
+
+
+def lookups_since(stats, before):
+    #hits, misses and evictions counted from before, and their hit rate
+    stats = dict(stats, **{name: stats[name] - before.get(name, 0) for name in ["hits", "misses", "evictions"]})
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"]/lookups if lookups else 0.0
+    return stats
+
+
+class pizza_layouts():
+    """The pizzas of a game grouped by identical layout
+
+    The simulator groups the pizzas once choose_toppings returned them (Game.play), and a player gets the same groups
+    with pizza_layouts.of(pizzas) from the pizzas choose_and_cut is given. Every pizza id of a group shares its
+    fingerprint and the results cached for the layout, so a search runs once per distinct layout.
+
+    Args:
+        pizzas(list) : [num_pizzas, toppings_pp, 3] as returned by choose_toppings
+    """
+    recent = OrderedDict()      #id of pizzas -> (pizzas, their layouts), of the last few games
+    recent_size = 8
+
+    def __init__(self, pizzas):
+        self.fingerprints = [pizza_calculations.pizza_fingerprint(pizza) for pizza in pizzas]
+        self.groups = {}        #fingerprint -> ids of all the pizzas with that layout, increasing
+        for pizza_id, fingerprint in enumerate(self.fingerprints):
+            self.groups.setdefault(fingerprint, []).append(pizza_id)
+        self.results = {}       #(fingerprint, key) -> what cached computed for the layout
+
+    @staticmethod
+    def of(pizzas):
+        #layouts of pizzas, the same object for every caller holding the same pizzas (the simulator and its player)
+        entry = pizza_layouts.recent.get(id(pizzas))
+        if entry is None or entry[0] is not pizzas:
+            entry = (pizzas, pizza_layouts(pizzas))
+            pizza_layouts.recent[id(pizzas)] = entry
+            if len(pizza_layouts.recent) > pizza_layouts.recent_size:
+                pizza_layouts.recent.popitem(last=False)
+        pizza_layouts.recent.move_to_end(id(pizzas))
+        return entry[1]
+
+    def group_of(self, pizza_id):
+        #all the pizza ids (pizza_id included) with the layout of pizza_id
+        return self.groups[self.fingerprints[pizza_id]]
+
+    def distinct(self, pizza_ids):
+        #one representative (the first one) of every distinct layout among pizza_ids
+        seen = set()
+        distinct_ids = []
+        for pizza_id in pizza_ids:
+            if self.fingerprints[pizza_id] not in seen:
+                seen.add(self.fingerprints[pizza_id])
+                distinct_ids.append(pizza_id)
+        return distinct_ids
+
+    def cached(self, pizza_id, key, compute):
+        #compute() for the layout of pizza_id, computed by the first pizza of the layout asking for key
+        entry = (self.fingerprints[pizza_id], key)
+        if entry not in self.results:
+            self.results[entry] = compute()
+        return self.results[entry]
+
+
 class pizza_calculations():
+    #Shared by every calculator in the process (simulator and players) once enabled, so final_score reuses cuts the players already evaluated
+    cache = None
+    tracer = None   #tracing.trace_recorder receiving kernel calls while a traced game runs
+    kernel_version = 1      #bump when ratio_calculator or slice_area_calculator results change, persistent stores then start over
+
     def __init__(self):
         self.num_pizzas = constants.number_of_initial_pizzas
         self.rng = np.random.default_rng(int(9))
 
+    @staticmethod
+    def enable_cache():
+        #Turns the in-process score cache on (-cache True, or a persistent store), it is off unless asked for
+        if pizza_calculations.cache is None and constants.ratio_cache_size:
+            pizza_calculations.cache = score_cache(constants.ratio_cache_size, constants.ratio_cache_bytes, constants.cut_quantum)
+        return pizza_calculations.cache
+
+    @staticmethod
+    def attach_store(path, max_entries=None, max_bytes=None):
+        #Back the in-process cache with an on-disk one shared by every process pointing at path, enabling the cache
+        cache = pizza_calculations.enable_cache()
+        if cache is None:
+            print("The score cache is disabled (constants.ratio_cache_size = 0), ignoring the persistent store.")
+            return None
+        if cache.store is None or cache.store.path != path:
+            if cache.store is not None:
+                cache.store.close()
+            cache.store = persistent_score_cache(path, max_entries if max_entries is not None else constants.score_store_entries, max_bytes if max_bytes is not None else constants.score_store_bytes,
+                                                 settings=dict(kernels=pizza_calculations.kernel_version, quantum=repr(cache.quantum)))
+        return cache.store
+
+    @staticmethod
+    def pizza_fingerprint(pizza):
+        #Content hash of a pizza layout. Byte identical layouts (same toppings in the same order) share a fingerprint, -0.0 is folded into 0.0
+        pizza = np.ascontiguousarray(np.asarray(pizza, dtype=np.float64)) + 0.0
+        return hashlib.blake2b(pizza.tobytes(), digest_size=16).hexdigest()
+
 
     def final_score(self, pizzas, pizza_choices, preferences, cuts, num_toppings, multiplier, x, y):
-        #calculate U for all 10 pizzas
-        #calculate S for all 10 pizzas
+        #calculate U, B, C and S for every customer, on the pizza they were served
         #self.pizzas[self.pizza_id], self.cuts[self.pizza_id], self.num_toppings, self.multiplier, self.x, self.y 
         B = []
         C = []
@@ -29,10 +221,10 @@ class pizza_calculations():
             obtained_pref = np.array(obtained_pref)
             slice_areas = self.slice_area_calculator(cuts[pizza_id], multiplier, x, y)
             #Try to fix if theta is 0
-            random_pref, temp = self.ratio_calculator(pizzas[pizza_id], [x, y, self.rng.random()*2*np.pi], num_toppings, multiplier, x, y)
+            random_pref, temp = self.compute_ratios(pizzas[pizza_id], [x, y, self.rng.random()*2*np.pi], num_toppings, multiplier, x, y)      #random cuts never repeat, keep them out of the cache
             random_pref = np.array(random_pref)
             required_pref = np.array(preferences[i])
-            uniform_pref = np.ones((2, num_toppings))*(12/num_toppings)
+            uniform_pref = np.ones((2, num_toppings))*(len(pizzas[pizza_id])/2/num_toppings)     #each half gets half the toppings of the pizza
             b = np.round(np.absolute(required_pref - uniform_pref), 3)
             c = np.round(np.absolute(obtained_pref - required_pref), 3)
             u = np.round(np.absolute(random_pref - uniform_pref), 3)
@@ -46,157 +238,110 @@ class pizza_calculations():
             x_offset = (cuts[pizza_id][0] - x)/ multiplier
             y_offset = (cuts[pizza_id][1] - y)/ multiplier
             center_offsets.append(np.sqrt(x_offset**2 + y_offset**2))
-            sum = 0
-            sum_1 = 0
-            sum_2 = 0
-            for j in range(8):
-                if j%2 == 0:
-                    sum_2 = sum_2 + slice_areas[j]
-                else:
-                    sum_1 = sum_1 + slice_areas[j]
-            for k in range(num_toppings):
-                for l in range(8):
-                    if l%2 == 0:
-                        sum = sum + abs((preferences[i][1][k]*slice_areas[l]/sum_2) - slice_areas_toppings[l][k])
-                    else:
-                        sum = sum + abs((preferences[i][0][k]*slice_areas[l]/sum_1) - slice_areas_toppings[l][k])
-            slice_amount_metric.append(sum)
+            #Slices alternate between the two halves: even slices should hold preferences[i][1] in proportion to their area, odd ones preferences[i][0]
+            slice_areas = np.asarray(slice_areas)
+            wanted_amounts = np.empty((len(slice_areas), num_toppings))
+            wanted_amounts[0::2] = required_pref[1][None, :]*slice_areas[0::2, None]/np.sum(slice_areas[0::2])
+            wanted_amounts[1::2] = required_pref[0][None, :]*slice_areas[1::2, None]/np.sum(slice_areas[1::2])
+            slice_amount_metric.append(np.sum(np.absolute(wanted_amounts - np.asarray(slice_areas_toppings))))
 
         return B, C, U, obtained_preferences, center_offsets, slice_amount_metric
 
 
     
     def ratio_calculator(self, pizza, cut_1, num_toppings, multiplier, x, y):
-        cut = copy.deepcopy(cut_1)
-        result = np.zeros((2, num_toppings))
-        cut[0] = (cut[0]-x)/multiplier
-        cut[1] = -(cut[1]-y)/multiplier         #Because y axis is inverted in tkinter window
-        center = [cut[0], cut[1]]
-        theta  = cut[2]                
-
-        if cut[0]**2 + cut[1]**2 > 36:
+        tracer = pizza_calculations.tracer
+        if tracer is None:
+            return self.cached_ratios(pizza, cut_1, num_toppings, multiplier, x, y)
+        start = time.perf_counter()
+        value = self.cached_ratios(pizza, cut_1, num_toppings, multiplier, x, y)
+        tracer.kernel("ratio_calculator", start, time.perf_counter())
+        return value
+
+    def cached_ratios(self, pizza, cut_1, num_toppings, multiplier, x, y):
+        cache = pizza_calculations.cache
+        cut_key = None if cache is None else cache.cut_key(cut_1, multiplier, x, y)
+        if cut_key is None:
+            return self.compute_ratios(pizza, cut_1, num_toppings, multiplier, x, y)
+        key = ("ratio", pizza_calculations.pizza_fingerprint(pizza), cut_key, num_toppings)
+        value = cache.get(key)
+        if value is None:
+            value = self.compute_ratios(pizza, cut_1, num_toppings, multiplier, x, y)
+            cache.put(key, value)
+        return value
+
+    def compute_ratios(self, pizza, cut_1, num_toppings, multiplier, x, y):
+        center_x = (cut_1[0]-x)/multiplier
+        center_y = -(cut_1[1]-y)/multiplier         #Because y axis is inverted in tkinter window
+        if center_x**2 + center_y**2 > 36:
             print("You are trying to pass a cut with center outside the pizza to the utils function. This may fail.")
+        result, topping_amts = pizza_calculations.batch_ratios(np.asarray(pizza, dtype=np.float64)[None], np.array([center_x]), np.array([center_y]), np.array([cut_1[2]], dtype=np.float64), num_toppings)
+        return result[0], topping_amts[0]
 
-        topping_amts = [[0 for x in range(num_toppings)] for y in range(8)]
-        for topping_i in pizza:
-            top_abs_x = topping_i[0]
-            top_abs_y = topping_i[1]
-            distance_to_top = np.sqrt((top_abs_x-center[0])**2 + (top_abs_y - center[1])**2)
+    @staticmethod
+    def batch_ratios(pizzas, centers_x, centers_y, thetas, num_toppings):
+        """ratio_calculator for many cuts at once, each on its own pizza
+
+        Same geometry as the original per topping loop, evaluated for all toppings of all cuts at once. Every topping
+        falls in one of the cases below, depending on how many of the 8 slices (seen from the cut center) it spans.
+
+        Args:
+            pizzas(array) : [N, toppings, 3] pizza of every cut
+            centers_x, centers_y(array) : [N] cut centers in pizza units (y pointing up)
+            thetas(array) : [N] cut angles
+            num_toppings(int) : topping types
+        Returns:
+            result(array) : [N, 2, num_toppings] topping ratio in each half
+            topping_amts(array) : [N, 8, num_toppings] topping amount in each slice
+        """
+        count = len(pizzas)
+        area = np.pi*0.375*0.375
+        types = pizzas[:, :, 2].astype(np.int64) - 1       #type 0 (an unset topping) lands on the last type, like it always did
+        types = types % num_toppings
+        dx = pizzas[:, :, 0] - centers_x[:, None]
+        dy = pizzas[:, :, 1] - centers_y[:, None]
+        distance_to_top = np.sqrt(dx**2 + dy**2)
+        with np.errstate(divide='ignore', invalid='ignore'):
             theta_edge = np.arctan(0.375 / distance_to_top)
-            
-            if top_abs_x == center[0]:
-                theta_top = 0
-            else:
-                theta_top = np.arctan((top_abs_y - center[1])/(top_abs_x-center[0]))
-            #print(theta, theta_edge, theta_distance, theta_top)
-            if (top_abs_x-center[0])<=0 and (top_abs_y-center[1])>=0:
-                theta_top = theta_top + np.pi
-            if (top_abs_x-center[0])<=0 and (top_abs_y-center[1])<=0:
-                theta_top = theta_top + np.pi
-            topping_i[2] = int(topping_i[2])
-        
-            theta_distance = (theta_top - theta + (np.pi * 10))%(2*np.pi)
+            theta_top = np.where(dx == 0, 0.0, np.arctan(dy/dx))
+        theta_top = np.where((dx <= 0) & (dy >= 0), theta_top + np.pi, theta_top)
+        theta_top = np.where((dx <= 0) & (dy <= 0), theta_top + np.pi, theta_top)
+        theta_distance = (theta_top - thetas[:, None] + (np.pi * 10))%(2*np.pi)
+        slice_center = theta_distance*4//np.pi
+        spread = (theta_edge + theta_distance)*4//np.pi - (-theta_edge + theta_distance)*4//np.pi
+        in_topping = distance_to_top <= 0.375          #Chosen center is within the topping. Then by pizza theorem, 2 equal sized topping pieces
+        #Outside a topping theta_edge < pi/4, so a topping spans at most 3 slices: its own, and possibly the ones before/after
+        two_slices = ~in_topping & (spread == 1)
+        three_slices = ~in_topping & (spread == 2)
 
-            if distance_to_top <= 0.375:                                                                    #Chosen center is withing pizza topping. Then by pizza theorem, 2 equal sized topping pieces
-                result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + (np.pi*0.375*0.375/2)
-                result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + (np.pi*0.375*0.375/2)
-            
-            elif (theta_edge + theta_distance)*4//np.pi   ==  (-theta_edge + theta_distance)*4//np.pi:
-                if (theta_distance*4//np.pi) %2 == 0:
-                    result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + (np.pi*0.375*0.375)
-                else:
-                    result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + (np.pi*0.375*0.375)
-                topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] = topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] + (np.pi*0.375*0.375)
-            
-            elif (theta_edge + theta_distance)*4//np.pi ==  (-theta_edge + theta_distance)*4//np.pi + 1:    #Topping falls in 2 slices
-                if (theta_distance*4//np.pi) %2 == 0:
-                    small_angle_theta = min(theta_distance%(np.pi/4), (np.pi/4 - (theta_distance%(np.pi/4))))
-                    phi = np.arcsin(distance_to_top*np.sin(small_angle_theta)/0.375)
-                    area_smaller = (np.pi/2 - phi - (np.cos(phi)*np.sin(phi)))*0.375*0.375
-                    result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_smaller
-                    result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + area_smaller
-                else:
-                    small_angle_theta = min(theta_distance%(np.pi/4), (np.pi/4 - (theta_distance%(np.pi/4))))
-                    phi = np.arcsin(distance_to_top*np.sin(small_angle_theta)/0.375)
-                    area_smaller = (np.pi/2 - phi - (np.cos(phi)*np.sin(phi)))*0.375*0.375
-                    result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + area_smaller
-                    result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_smaller
-                if small_angle_theta == theta_distance%(np.pi/4):
-                    topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] = topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_smaller
-                    topping_amts[int(((theta_distance*4//np.pi) - 1)%8)][int(topping_i[2]) - 1] = topping_amts[int(((theta_distance*4//np.pi) - 1)%8)][int(topping_i[2]) - 1] + area_smaller
-                else:
-                    topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] = topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_smaller
-                    topping_amts[int(((theta_distance*4//np.pi) + 1)%8)][int(topping_i[2]) - 1] = topping_amts[int(((theta_distance*4//np.pi) + 1)%8)][int(topping_i[2]) - 1] + area_smaller
-            
-            
-            
-            elif (theta_edge + theta_distance)*4//np.pi ==  (-theta_edge + theta_distance)*4//np.pi + 2:    #Topping falls in 3 slices
-                small_angle_theta_1 = theta_distance%(np.pi/4)
-                small_angle_theta_2 = (np.pi/4)-small_angle_theta_1
-                phi_1 = np.arcsin(distance_to_top*np.sin(small_angle_theta_1)/0.375)
-                phi_2 = np.arcsin(distance_to_top*np.sin(small_angle_theta_2)/0.375)
-                area_smaller_1 = (np.pi/2 - phi_1 - (np.cos(phi_1)*np.sin(phi_1)))*0.375*0.375
-                area_smaller_2 = (np.pi/2 - phi_2 - (np.cos(phi_2)*np.sin(phi_2)))*0.375*0.375
-                if (theta_distance*4//np.pi) %2 == 0:
-                    result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_smaller_1 - area_smaller_2
-                    result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + area_smaller_1 + area_smaller_2
-                else:
-                    result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + area_smaller_1 + area_smaller_2
-                    result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_smaller_1 - area_smaller_2
-                topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] = topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_smaller_1 - area_smaller_2
-                topping_amts[int(((theta_distance*4//np.pi) + 1)%8)][int(topping_i[2]) - 1] = topping_amts[int(((theta_distance*4//np.pi) + 1)%8)][int(topping_i[2]) - 1] + area_smaller_2
-                topping_amts[int(((theta_distance*4//np.pi) - 1)%8)][int(topping_i[2]) - 1] = topping_amts[int(((theta_distance*4//np.pi) - 1)%8)][int(topping_i[2]) - 1] + area_smaller_1
-            
-            
-            else:       #just see the pattern from the above 2, draw some diagrams and you'll see how this came. Find areas of all small sectors, then minus accordingly later. This also takes care of the
-                # above conditions. It's a general case, but let's have everything here because why not
-                small_angle_theta = theta_distance%(np.pi/4)
-                small_areas_1 = []
-                small_areas_2 = []
-                while small_angle_theta<theta_edge:
-                    phi = np.arcsin(distance_to_top*np.sin(small_angle_theta)/0.375)
-                    area_smaller = (np.pi/2 - phi - (np.cos(phi)*np.sin(phi)))*0.375*0.375
-                    small_areas_1.append(area_smaller)
-                    small_angle_theta = small_angle_theta + (np.pi/4)
-                for i in range(len(small_areas_1)-1):
-                    small_areas_1[i] = small_areas_1[i] - small_areas_1[i+1]
-                
-                small_angle_theta = np.pi/4 - (theta_distance%(np.pi/4))
-                while small_angle_theta<theta_edge:
-                    phi = np.arcsin(distance_to_top*np.sin(small_angle_theta)/0.375)
-                    area_smaller = (np.pi/2 - phi - (np.cos(phi)*np.sin(phi)))*0.375*0.375
-                    small_areas_2.append(area_smaller)
-                    small_angle_theta = small_angle_theta + (np.pi/4)
-                for i in range(len(small_areas_2)-1):
-                    small_areas_2[i] = small_areas_2[i] - small_areas_2[i+1]
-
-                area_center = (np.pi*0.375*0.375) - np.sum(small_areas_1) - np.sum(small_areas_2)       #area of topping in slice where it's center lies.
-                
-                #To calculate the metric for slice areas
-                topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] = topping_amts[int(theta_distance*4//np.pi)][int(topping_i[2]) - 1] + area_center
-                for i in range(len(small_areas_1)):
-                    topping_amts[int(((theta_distance*4//np.pi) - (i+1))%8)][int(topping_i[2]) - 1] = topping_amts[int(((theta_distance*4//np.pi) - (i+1))%8)][int(topping_i[2]) - 1] + small_areas_1[i]
-                for i in range(len(small_areas_2)):
-                    topping_amts[int(((theta_distance*4//np.pi) + (i+1))%8)][int(topping_i[2]) - 1] = topping_amts[int(((theta_distance*4//np.pi) + (i+1))%8)][int(topping_i[2]) - 1] + small_areas_2[i]
-
-                for i in range(len(small_areas_1)):
-                    if i%2 == 1:
-                        area_center = area_center + small_areas_1[i]
-                    
-                for i in range(len(small_areas_2)):
-                    if i%2 == 1:
-                        area_center = area_center + small_areas_2[i]
-                if (theta_distance*4//np.pi) %2 == 0:
-                    result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + area_center
-                    result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_center
-                else:
-                    result[1][int(topping_i[2]) - 1] = result[1][int(topping_i[2]) - 1] + (np.pi*0.375*0.375) - area_center
-                    result[0][int(topping_i[2]) - 1] = result[0][int(topping_i[2]) - 1] + area_center
+        offset_1 = theta_distance%(np.pi/4)           #angle to the previous cut
+        offset_2 = np.pi/4 - offset_1                 #angle to the next cut
+        with np.errstate(invalid='ignore'):
+            #area of the topping cut off by the previous/next cut line, NaN if that line misses the topping
+            phi_1 = np.arcsin(distance_to_top*np.sin(offset_1)/0.375)
+            phi_2 = np.arcsin(distance_to_top*np.sin(offset_2)/0.375)
+        area_smaller_1 = (np.pi/2 - phi_1 - (np.cos(phi_1)*np.sin(phi_1)))*0.375*0.375
+        area_smaller_2 = (np.pi/2 - phi_2 - (np.cos(phi_2)*np.sin(phi_2)))*0.375*0.375
+        nearer_1 = np.minimum(offset_1, offset_2) == offset_1
+        before = np.where((two_slices & nearer_1) | three_slices, area_smaller_1, 0.0)         #piece in the previous slice
+        after = np.where((two_slices & ~nearer_1) | three_slices, area_smaller_2, 0.0)         #piece in the next slice
+        own = np.where(in_topping, 0.0, area - before - after)                                 #piece in the slice the topping center is in
 
-        for i in range(num_toppings):
-            result[0][i] = result[0][i]/(np.pi*0.375*0.375)
-            result[1][i] = result[1][i]/(np.pi*0.375*0.375)
-        return result, topping_amts
+        #even slices (from the first cut) make up half 1, odd slices half 0
+        even = (slice_center%2 == 0)
+        half_1 = np.where(in_topping, area/2, np.where(even, own, before + after))
+        half_0 = np.where(in_topping, area/2, np.where(even, before + after, own))
+        bins = types + (np.arange(count)*num_toppings)[:, None]
+        result = np.zeros((count, 2, num_toppings))
+        result[:, 1] = np.bincount(bins.ravel(), weights=half_1.ravel(), minlength=count*num_toppings).reshape(count, num_toppings)/area
+        result[:, 0] = np.bincount(bins.ravel(), weights=half_0.ravel(), minlength=count*num_toppings).reshape(count, num_toppings)/area
+
+        #topping amount in each of the 8 slices (all pieces are zero for toppings the center lies in, which were never counted)
+        slice_ids = np.where(in_topping, 0, slice_center).astype(np.int64)
+        slots = ((slice_ids[None] + np.array([0, -1, 1])[:, None, None])%8)*num_toppings + types[None] + (np.arange(count)*8*num_toppings)[None, :, None]
+        pieces = np.stack([own, before, after])
+        topping_amts = np.bincount(slots.transpose(1, 0, 2).ravel(), weights=pieces.transpose(1, 0, 2).ravel(), minlength=count*8*num_toppings)
+        return result, topping_amts.reshape(count, 8, num_toppings)
 
     def triangle_area(self, a,b,c):
         x1 = a[0]
@@ -208,6 +353,27 @@ class pizza_calculations():
         return (0.5*abs((x1*(y2 - y3)) + (x2*(y3 - y1)) + (x3*(y1 - y2))))
 
     def slice_area_calculator(self, cut_1, multiplier, x, y):
+        tracer = pizza_calculations.tracer
+        if tracer is None:
+            return self.cached_slice_areas(cut_1, multiplier, x, y)
+        start = time.perf_counter()
+        value = self.cached_slice_areas(cut_1, multiplier, x, y)
+        tracer.kernel("slice_area_calculator", start, time.perf_counter())
+        return value
+
+    def cached_slice_areas(self, cut_1, multiplier, x, y):
+        cache = pizza_calculations.cache
+        cut_key = None if cache is None else cache.cut_key(cut_1, multiplier, x, y)
+        if cut_key is None:
+            return self.compute_slice_areas(cut_1, multiplier, x, y)
+        key = ("slices", cut_key)
+        value = cache.get(key)
+        if value is None:
+            value = self.compute_slice_areas(cut_1, multiplier, x, y)
+            cache.put(key, value)
+        return value
+
+    def compute_slice_areas(self, cut_1, multiplier, x, y):
         center_x = (copy.deepcopy(cut_1[0])-x)/multiplier
         center_y = -(copy.deepcopy(cut_1[1])-y)/multiplier
         center = [center_x, center_y]
@@ -278,11 +444,264 @@ class pizza_calculations():
                 else:
                     area_slice[i] = area_sector - area_2 - area_1
         return area_slice
+
+    @staticmethod
+    def batch_slice_areas(centers_x, centers_y, thetas, radius=6):
+        """compute_slice_areas for many cuts at once, same construction and slice order
+
+        Args:
+            centers_x, centers_y(array) : [N] cut centers in pizza units (y pointing up)
+            thetas(array) : [N] cut angles
+        Returns:
+            area_slice(array) : [N, 8] area of every slice
+        """
+        centers_x = np.asarray(centers_x, dtype=np.float64)
+        centers_y = np.asarray(centers_y, dtype=np.float64)
+        dist_centers = np.sqrt(centers_x**2 + centers_y**2)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            angle_centerline = np.where(centers_x == 0, 0.0, np.arctan(centers_y/centers_x))[:, None]
+            theta = np.asarray(thetas, dtype=np.float64)[:, None] + np.arange(4)*np.pi/4
+            theta_diag = angle_centerline - theta
+            sin_diag = np.sin(theta_diag)
+            sinin_1 = np.arcsin(sin_diag*dist_centers/radius)
+            y1 = radius*np.sin(theta_diag - sinin_1)/sin_diag
+            y2 = radius*np.sin(theta_diag - np.pi + sinin_1)/sin_diag
+        #cut i meets the crust at circ_pts[i] and circ_pts[i+4]
+        sign = np.where(centers_x < 0, -1.0, 1.0)[:, None]
+        direction_x = np.cos(angle_centerline - theta_diag)
+        direction_y = np.sin(angle_centerline - theta_diag)
+        through_origin = sin_diag == 0
+        circ_pts = np.empty((len(centers_x), 8, 2))
+        with np.errstate(invalid='ignore'):
+            circ_pts[:, :4, 0] = np.where(through_origin, radius*np.cos(angle_centerline), centers_x[:, None] + sign*y1*direction_x)
+            circ_pts[:, :4, 1] = np.where(through_origin, radius*np.sin(angle_centerline), centers_y[:, None] + sign*y1*direction_y)
+            circ_pts[:, 4:, 0] = np.where(through_origin, -radius*np.cos(angle_centerline), centers_x[:, None] + sign*y2*direction_x)
+            circ_pts[:, 4:, 1] = np.where(through_origin, -radius*np.sin(angle_centerline), centers_y[:, None] + sign*y2*direction_y)
+
+        first = circ_pts
+        second = np.roll(circ_pts, -1, axis=1)
+        center = np.stack([centers_x, centers_y], axis=-1)[:, None, :]
+        origin = np.zeros_like(center)
+
+        def cross(a, b):
+            return a[..., 0]*b[..., 1] - a[..., 1]*b[..., 0]
+
+        def segment_intersection(p, q, r, t):
+            #where segments p-q and r-t cross, and whether they do
+            d1 = q - p
+            d2 = t - r
+            denominator = cross(d1, d2)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                along_1 = cross(r - p, d2)/denominator
+                along_2 = cross(r - p, d1)/denominator
+            hit = (denominator != 0) & (along_1 >= 0) & (along_1 <= 1) & (along_2 >= 0) & (along_2 <= 1)
+            #crossings within rounding of an end point, where only shapely's exact predicates can tell hit from miss
+            near_end = lambda along: (np.abs(along) < 1e-9) | (np.abs(along - 1) < 1e-9)
+            grazing = (denominator != 0) & (near_end(along_1) | near_end(along_2))
+            return hit, p + np.nan_to_num(along_1)[..., None]*d1, grazing
+
+        def triangle_area(a, b, c):
+            return 0.5*np.abs(a[..., 0]*(b[..., 1] - c[..., 1]) + b[..., 0]*(c[..., 1] - a[..., 1]) + c[..., 0]*(a[..., 1] - b[..., 1]))
+
+        hit_1, int_pt_1, grazing_1 = segment_intersection(first, center, second, origin)
+        hit_2, int_pt_2, grazing_2 = segment_intersection(first, origin, second, center)
+        product_magnitudes = np.sqrt(np.sum(first**2, axis=-1))*np.sqrt(np.sum(second**2, axis=-1))
+        theta_sector = np.arccos(np.clip(np.round(np.sum(first*second, axis=-1), 4)/np.round(product_magnitudes, 4), -1, 1))
+        area_sector = theta_sector*radius**2/2
+        area_1 = triangle_area(origin, center, second)
+        area_2 = triangle_area(center, origin, first)
+        area_slice = np.where(theta_sector >= np.pi/4, area_sector + area_2 + area_1, area_sector - area_2 - area_1)
+        area_slice = np.where(hit_2, area_sector + triangle_area(center, int_pt_2, first) - triangle_area(origin, int_pt_2, second), area_slice)
+        area_slice = np.where(hit_1, area_sector + triangle_area(center, second, int_pt_1) - triangle_area(origin, int_pt_1, first), area_slice)
+        #cut centered on the origin, every edge ends there and each slice is its sector
+        at_origin = dist_centers == 0
+        area_slice = np.where(at_origin, area_sector, area_slice)
+        for row in np.flatnonzero(np.any((grazing_1 | grazing_2) & ~at_origin, axis=1)):
+            #degenerate cut (center on a slice edge), let compute_slice_areas decide
+            area_slice[row] = pizza_calculations().compute_slice_areas([centers_x[row], -centers_y[row], np.asarray(thetas)[row]], 1, 0, 0)
+        return area_slice
                     
 
 
 
 
+    @staticmethod
+    def place_toppings(num_toppings_pp, rng, pizza_radius=6, topping_radius=0.375, max_attempts=None):
+        """Places non overlapping toppings by rejection sampling, checking clashes through a spatial hash
+
+        Candidates are drawn exactly like the old choose_toppings loops (angle, then distance, both uniform), so a
+        given rng state gives the same layout as before, but each clash check only looks at the 3x3 neighbouring
+        grid cells instead of every topping placed so far.
+
+        Args:
+            num_toppings_pp(int) : number of toppings to place
+            rng(numpy generator object) : generator the candidates are drawn from
+            pizza_radius(float) : radius of the pizza
+            topping_radius(float) : radius of a topping
+            max_attempts(int) : candidates tried before giving up, defaults to 1000 per topping
+
+        Returns:
+            positions(ndarray) : array of size [num_toppings_pp, 2] with the topping centers
+        """
+        if max_attempts is None:
+            max_attempts = 1000*max(num_toppings_pp, 1)
+        min_distance = 2*topping_radius
+        cells = {}
+        positions = np.zeros((num_toppings_pp, 2))
+        placed = 0
+        attempts = 0
+        while placed < num_toppings_pp:
+            if attempts >= max_attempts:
+                raise ValueError("Could only place " + str(placed) + " of " + str(num_toppings_pp) + " toppings in " + str(max_attempts) + " attempts.")
+            attempts = attempts + 1
+            angle = rng.random()*2*np.pi
+            dist = rng.random()*pizza_radius
+            x = dist*np.cos(angle)
+            y = dist*np.sin(angle)
+            if math.sqrt(x*x + y*y) + topping_radius > pizza_radius:
+                continue
+            cell_x = int(math.floor(x/min_distance))
+            cell_y = int(math.floor(y/min_distance))
+            clash = False
+            for neighbour_x in range(cell_x - 1, cell_x + 2):
+                for neighbour_y in range(cell_y - 1, cell_y + 2):
+                    for other in cells.get((neighbour_x, neighbour_y), ()):
+                        if math.sqrt((positions[other][0] - x)**2 + (positions[other][1] - y)**2) < min_distance:
+                            clash = True
+                            break
+                    if clash:
+                        break
+                if clash:
+                    break
+            if clash:
+                continue
+            positions[placed] = [x, y]
+            cells.setdefault((cell_x, cell_y), []).append(placed)
+            placed = placed + 1
+        return positions
+
+    @staticmethod
+    def place_toppings_poisson(num_toppings_pp, rng, pizza_radius=6, topping_radius=0.375, candidates=30):
+        """Places non overlapping toppings with Bridson's Poisson disk sampling, for layouts too dense for rejection sampling
+
+        A maximal Poisson disk set is grown over the pizza (background grid holding at most one topping per cell),
+        then num_toppings_pp of its points are picked at random.
+
+        Args:
+            num_toppings_pp(int) : number of toppings to place
+            rng(numpy generator object) : generator used for every random choice
+            pizza_radius(float) : radius of the pizza
+            topping_radius(float) : radius of a topping
+            candidates(int) : candidates tried around an active point before it is retired
+
+        Returns:
+            positions(ndarray) : array of size [num_toppings_pp, 2] with the topping centers
+        """
+        min_distance = 2*topping_radius
+        allowed_radius = pizza_radius - topping_radius      #topping centers must stay this close to the pizza center
+        if num_toppings_pp == 0:
+            return np.zeros((0, 2))
+        if allowed_radius < 0:
+            raise ValueError("A topping of radius " + str(topping_radius) + " does not fit on a pizza of radius " + str(pizza_radius) + ".")
+        cell_size = min_distance/math.sqrt(2)
+        offset = allowed_radius
+        grid_size = int(math.ceil(2*allowed_radius/cell_size)) + 1
+        grid = [[-1]*grid_size for i in range(grid_size)]       #index of the point in every cell, plain lists as numpy scalar indexing dominates otherwise
+        points = []
+
+        def cell_of(point):
+            return int((point[0] + offset)//cell_size), int((point[1] + offset)//cell_size)
+
+        def fits(point):
+            if point[0]*point[0] + point[1]*point[1] > allowed_radius*allowed_radius:
+                return False
+            cell_x, cell_y = cell_of(point)
+            for neighbour_x in range(max(cell_x - 2, 0), min(cell_x + 3, grid_size)):
+                row = grid[neighbour_x]
+                for neighbour_y in range(max(cell_y - 2, 0), min(cell_y + 3, grid_size)):
+                    other = row[neighbour_y]
+                    if other >= 0:
+                        dx = points[other][0] - point[0]
+                        dy = points[other][1] - point[1]
+                        if dx*dx + dy*dy < min_distance*min_distance:
+                            return False
+            return True
+
+        def add(point):
+            cell_x, cell_y = cell_of(point)
+            grid[cell_x][cell_y] = len(points)
+            points.append(point)
+            active.append(len(points) - 1)
+
+        active = []
+        angle = rng.random()*2*np.pi
+        dist = allowed_radius*math.sqrt(rng.random())
+        add((dist*math.cos(angle), dist*math.sin(angle)))
+        while active:
+            active_id = int(rng.integers(len(active)))
+            center = points[active[active_id]]
+            angles = (rng.random(candidates)*2*np.pi).tolist()
+            dists = (min_distance*np.sqrt(1 + 3*rng.random(candidates))).tolist()     #uniform over the annulus [min_distance, 2*min_distance]
+            for candidate_angle, candidate_dist in zip(angles, dists):
+                candidate = (center[0] + candidate_dist*math.cos(candidate_angle), center[1] + candidate_dist*math.sin(candidate_angle))
+                if fits(candidate):
+                    add(candidate)
+                    break
+            else:
+                active[active_id] = active[-1]
+                active.pop()
+        if len(points) < num_toppings_pp:
+            raise ValueError("Only " + str(len(points)) + " toppings of radius " + str(topping_radius) + " fit on this pizza, " + str(num_toppings_pp) + " were requested.")
+        chosen = rng.choice(len(points), size=num_toppings_pp, replace=False)
+        return np.array(points)[chosen]
+
+    @staticmethod
+    def validate_pizzas(pizzas, pizza_radius=6, topping_radius=0.375, max_pairs=4000000):
+        """Checks every topping of every pizza at once, same rules as clash_exists (inside the pizza, no two toppings overlapping)
+
+        Args:
+            pizzas(list) : List of size [num_pizzas, num_toppings_pp, 3]
+            pizza_radius(float) : radius of the pizza
+            topping_radius(float) : radius of a topping
+            max_pairs(int) : topping pairs compared per batch, bounds the memory used for big games
+
+        Returns:
+            report(dict) : {"valid": bool,
+                            "boundary": list of (pizza_id, topping_id, distance the topping sticks out of the pizza),
+                            "clashes": list of (pizza_id, topping_id_1, topping_id_2, overlap between the two toppings)}
+        """
+        positions = np.asarray(pizzas, dtype=np.float64)[..., :2]
+        num_pizzas, num_toppings_pp = positions.shape[0], positions.shape[1]
+        overshoot = np.sqrt(positions[..., 0]**2 + positions[..., 1]**2) + topping_radius - pizza_radius
+        boundary = [(int(i), int(j), float(overshoot[i, j])) for i, j in zip(*np.nonzero(overshoot > 0))]
+
+        clashes = []
+        upper = np.triu(np.ones((num_toppings_pp, num_toppings_pp), dtype=bool), k=1)
+        batch = max(1, max_pairs//max(num_toppings_pp*num_toppings_pp, 1))
+        for start in range(0, num_pizzas, batch):
+            xs = positions[start:start + batch, :, 0]
+            ys = positions[start:start + batch, :, 1]
+            dx = xs[:, :, None] - xs[:, None, :]
+            dy = ys[:, :, None] - ys[:, None, :]
+            distances = np.sqrt(dx*dx + dy*dy)
+            for i, j, k in zip(*np.nonzero((distances < 2*topping_radius) & upper)):
+                clashes.append((int(start + i), int(j), int(k), float(2*topping_radius - distances[i, j, k])))
+        return {"valid": not boundary and not clashes, "boundary": boundary, "clashes": clashes}
+
+    @staticmethod
+    def describe_placement(report, limit=10):
+        #Human readable lines for a validate_pizzas report, at most limit of them per kind of problem
+        lines = []
+        for pizza_id, topping_id, overshoot in report["boundary"][:limit]:
+            lines.append("Pizza " + str(pizza_id) + " : topping " + str(topping_id) + " sticks out of the pizza by " + str(np.round(overshoot, 4)))
+        if len(report["boundary"]) > limit:
+            lines.append("... and " + str(len(report["boundary"]) - limit) + " more toppings outside the pizza")
+        for pizza_id, topping_1, topping_2, overlap in report["clashes"][:limit]:
+            lines.append("Pizza " + str(pizza_id) + " : toppings " + str(topping_1) + " and " + str(topping_2) + " overlap by " + str(np.round(overlap, 4)))
+        if len(report["clashes"]) > limit:
+            lines.append("... and " + str(len(report["clashes"]) - limit) + " more overlapping pairs")
+        return lines
+
     def clash_exists(x, y, pizza, topping_id):
         current_pizza = np.array(pizza)
         current_topping = np.array([x, y])
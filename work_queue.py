@@ -0,0 +1,164 @@
+import os
+import time
+import socket
+import argparse
+import pickle as pkl
+import constants as constants
+from scheduler import play_jobs
+
+#File based work queue, for tournaments spread over the machines sharing a directory. No broker: a shard is claimed
+#by renaming it, which only one worker can do, and every file is written under a temporary name then renamed.
+#
+#Layout of a queue directory:
+#    args.pkl    tournament arguments the workers play with
+#    pending/    shards waiting, <issue>-<number>.pkl holding a list of jobs, claimed in name order
+#    claimed/    shards being played, renamed to <shard>@<host>-<pid> by their worker, touched after every game
+#    results/    <shard>, the outcomes of a played shard
+#    done/       claims of the shards whose results are written
+
+folders = ["pending", "claimed", "results", "done"]
+
+
+def write_atomic(path, value):
+    temporary = path + ".tmp." + socket.gethostname() + "-" + str(os.getpid())
+    with open(temporary, "wb") as f:
+        pkl.dump(value, f, protocol=pkl.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def write_shards(directory, jobs, args):
+    """Queues jobs in shards, in the order given (longest first)
+
+    Returns:
+        shards(int) : number of shards written
+    """
+    for folder in folders:
+        os.makedirs(os.path.join(directory, folder), exist_ok=True)
+    write_atomic(os.path.join(directory, "args.pkl"), args)
+    shard_size = int(args.shard_size) if args.shard_size is not None else constants.queue_shard_size
+    issue = time.strftime("%Y%m%d%H%M%S")
+    shards = 0
+    for start in range(0, len(jobs), shard_size):
+        write_atomic(os.path.join(directory, "pending", f"{issue}-{shards:06d}.pkl"), jobs[start:start + shard_size])
+        shards = shards + 1
+    return shards
+
+
+def claim(directory):
+    #first pending shard this worker manages to rename, None when there is none left
+    worker = "@" + socket.gethostname() + "-" + str(os.getpid())
+    for name in sorted(os.listdir(os.path.join(directory, "pending"))):
+        if not name.endswith(".pkl"):
+            continue
+        claimed = os.path.join(directory, "claimed", name + worker)
+        try:
+            os.rename(os.path.join(directory, "pending", name), claimed)
+        except FileNotFoundError:
+            continue        #another worker got it first
+        return name, claimed
+    return None
+
+
+def requeue_stale(directory, stale_seconds):
+    #puts back the shards whose worker has not finished a game for stale_seconds (it died, or its machine did)
+    requeued = 0
+    for name in os.listdir(os.path.join(directory, "claimed")):
+        path = os.path.join(directory, "claimed", name)
+        try:
+            if time.time() - os.path.getmtime(path) < stale_seconds:
+                continue
+            os.rename(path, os.path.join(directory, "pending", name.split("@")[0]))
+            requeued = requeued + 1
+        except FileNotFoundError:
+            continue
+    return requeued
+
+
+def work(directory, processes=1, stale_seconds=None):
+    """Plays shards until the queue is empty
+
+    Returns:
+        shards(int) : shards this worker played
+    """
+    stale_seconds = constants.queue_stale_seconds if stale_seconds is None else stale_seconds
+    with open(os.path.join(directory, "args.pkl"), "rb") as f:
+        args = pkl.load(f)
+    played = 0
+    while True:
+        claimed = claim(directory)
+        if claimed is None:
+            if requeue_stale(directory, stale_seconds):
+                continue
+            return played
+        name, path = claimed
+        with open(path, "rb") as f:
+            jobs = pkl.load(f)
+        outcomes = []
+        for outcome in play_jobs(jobs, args, processes, str(args.common_inputs) == "True"):
+            outcomes.append(dict(outcome, host=socket.gethostname()))
+            try:
+                os.utime(path)      #still alive
+            except FileNotFoundError:
+                pass
+        write_atomic(os.path.join(directory, "results", name), outcomes)
+        try:
+            os.rename(path, os.path.join(directory, "done", os.path.basename(path)))
+        except FileNotFoundError:
+            pass        #requeued as stale meanwhile, whoever plays it again writes the same results
+        played = played + 1
+        print(f"{name} : {len(outcomes)} games", flush=True)
+
+
+def status(directory):
+    counts = {}
+    for folder in folders:
+        counts[folder] = len([name for name in os.listdir(os.path.join(directory, folder)) if ".tmp." not in name])
+    return counts
+
+
+def merge(directory, store_path=None):
+    """Puts the results of every shard into the tournament store and writes tournament_results.pkl
+
+    Outcomes go in by job coordinates (then shard name), so the store does not depend on which worker
+    played what or in which order. A shard played twice (requeued) writes the same rows twice.
+    """
+    from tournament import tournament_grid, open_store, write_results
+    with open(os.path.join(directory, "args.pkl"), "rb") as f:
+        args = pkl.load(f)
+    if store_path:
+        args.store = store_path
+    args.fresh = "False"
+    players, generators, toppings, base_seeds, grid = tournament_grid(args)
+    store, completed = open_store(args, base_seeds)
+    outcomes = []
+    for name in sorted(os.listdir(os.path.join(directory, "results"))):
+        if ".tmp." in name:
+            continue
+        with open(os.path.join(directory, "results", name), "rb") as f:
+            outcomes.extend((outcome["player"], outcome["generator"], outcome["num_toppings"], outcome["seed_index"], name, number, outcome)
+                            for number, outcome in enumerate(pkl.load(f)))
+    outcomes.sort(key=lambda entry: entry[:6])
+    for entry in outcomes:
+        store.put(entry[-1])
+    counts = status(directory)
+    if counts["pending"] or counts["claimed"]:
+        print(f"{counts['pending']} shards pending and {counts['claimed']} being played, merging the {counts['results']} finished ones")
+    write_results(store, grid)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", help="work (play shards until none is left), merge (results into the tournament store) or status")
+    parser.add_argument("queue", help="Queue directory written by tournament.py -q")
+    parser.add_argument("--processes", "-j", default=1, help="Games a worker plays in parallel")
+    parser.add_argument("--stale", "-stale", default=None, help="Seconds without progress after which a claimed shard is played again (default constants.queue_stale_seconds)")
+    parser.add_argument("--store", "-st", default=None, help="Tournament store to merge into (default the one of the tournament)")
+    args = parser.parse_args()
+    if args.command == "work":
+        print(f"{work(args.queue, int(args.processes), float(args.stale) if args.stale is not None else None)} shards played")
+    elif args.command == "merge":
+        merge(args.queue, args.store)
+    elif args.command == "status":
+        print(", ".join(f"{count} {folder}" for folder, count in status(args.queue).items()))
+    else:
+        parser.error("Unknown command " + args.command)